@@ -0,0 +1,260 @@
+"""
+Async EODHD API Client for SuperPerformanceScreener
+Same method surface as EODHDClient, but requests run concurrently over a pooled
+keep-alive connection with a bounded number in flight, paced by the shared
+rate governor
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Any
+from datetime import datetime, timedelta
+import logging
+
+import aiohttp
+
+from price_series import PriceSeries, date_to_ordinal, ordinal_to_date
+from history_cache import HistoryCache
+from history_store import HistoryStore
+from rate_governor import RateGovernor, get_default_governor
+from response_cache import ResponseCache
+from single_flight import AsyncSingleFlight
+from eodhd_client import (
+    validate_api_key,
+    average_volume,
+    parse_exchange_tickers,
+    group_bulk_rows,
+    conditional_headers,
+    decode_body,
+    request_key
+)
+from config import (
+    EODHD_BASE_URL,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    ASYNC_MAX_IN_FLIGHT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncEODHDClient:
+    """
+    Asyncio client for the EODHD API
+    
+    Use it as an async context manager so the pooled session is closed:
+    
+        async with AsyncEODHDClient(max_in_flight=20) as client:
+            histories = await client.get_many_historical_data(tickers, start, end)
+    
+    Response cache and history cache lookups read and write files, so they run
+    in worker threads (asyncio.to_thread) rather than stalling the event loop.
+    Requests for the same ticker's history take turns, so each sees what the
+    previous one cached instead of fetching and storing the same days again.
+    """
+    
+    def __init__(self, api_key: str = None, max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+                 governor: RateGovernor = None, history_store: HistoryStore = None,
+                 response_cache: ResponseCache = None):
+        self.api_key = validate_api_key(api_key)
+        self.governor = governor or get_default_governor()
+        self.max_in_flight = max(1, max_in_flight)
+        self.cache = {}
+        self.history_cache = HistoryCache(history_store)
+        self._history_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.response_cache = response_cache
+        self._in_flight = AsyncSingleFlight()
+        self._session = None
+        self._semaphore = None
+    
+    async def __aenter__(self) -> 'AsyncEODHDClient':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared keep-alive session on first use (inside the running loop)"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT),
+                headers={'Accept-Encoding': 'gzip, deflate'}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+    
+    async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Any:
+        """Make API request; concurrent identical requests share one fetch"""
+        return await self._in_flight.do(request_key(endpoint, params),
+                                        lambda: self._request_with_retry(endpoint, params))
+    
+    async def _request_with_retry(self, endpoint: str, params: Dict[str, Any] = None) -> Any:
+        """Make API request with retry logic, holding one of the in-flight slots"""
+        # Fresh metadata responses from earlier runs need no request at all
+        cached = None
+        if self.response_cache:
+            cached = await asyncio.to_thread(self.response_cache.get, endpoint, params)
+        if cached and cached['fresh']:
+            return cached['body']
+        
+        url = f"{EODHD_BASE_URL}/{endpoint}"
+        params = dict(params or {})
+        params['api_token'] = self.api_key
+        session = self._get_session()
+        
+        delay = RETRY_DELAY
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    # Rate limiting: wait for a token from the shared governor
+                    await self.governor.acquire_async()
+                    async with session.get(url, params=params, headers=conditional_headers(cached)) as response:
+                        self.governor.observe(response.status, response.headers.get('Retry-After'))
+                        not_modified = response.status == 304 and cached is not None
+                        if not not_modified:
+                            response.raise_for_status()
+                            result = decode_body(params, await response.read())
+                            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                
+                if not_modified:
+                    await asyncio.to_thread(self.response_cache.renew, endpoint, params)
+                    return cached['body']
+                if self.response_cache:
+                    await asyncio.to_thread(self.response_cache.put, endpoint, params, result, etag, last_modified)
+                return result
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    logger.error(f"EODHD API request failed: {e}")
+                    raise
+                logger.warning(f"EODHD API request failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+    
+    async def get_stock_volume(self, ticker: str) -> Optional[int]:
+        """Get the average daily volume for a stock ticker"""
+        try:
+            # Get recent data to calculate average volume
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=30)  # Last 30 days
+            
+            historical_data = await self.get_historical_data(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            
+            # Calculate average volume from recent data
+            return average_volume(historical_data)
+            
+        except Exception as e:
+            logger.error(f"Error getting volume for {ticker}: {e}")
+            return None
+    
+    async def get_exchange_symbols(self, exchange: str) -> List[Dict[str, Any]]:
+        """Get the full symbol list (Code, Name, Exchange, Type, ...) for an exchange"""
+        try:
+            result = await self._make_request(f"exchange-symbol-list/{exchange}")
+            return result if isinstance(result, list) else []
+        except Exception as e:
+            logger.error(f"Error getting {exchange} symbol list: {e}")
+            return []
+    
+    async def get_exchange_stocks(self, exchange: str) -> List[str]:
+        """Get all stocks for a specific exchange (NYSE or NASDAQ)"""
+        result = await self.get_exchange_symbols(exchange)
+        
+        if not result:
+            logger.warning(f"No results for {exchange} exchange")
+            return []
+        
+        tickers = parse_exchange_tickers(result)
+        logger.info(f"Found {len(tickers)} stocks for {exchange}")
+        return tickers
+    
+    async def _fetch_history(self, ticker: str, start_day: int, end_day: int) -> PriceSeries:
+        """Download the bars for [start_day, end_day] (day ordinals) from the API"""
+        result = await self._make_request(
+            f"eod/{ticker}.US",
+            {
+                "from": ordinal_to_date(start_day),
+                "to": ordinal_to_date(end_day),
+                "fmt": "csv"
+            }
+        )
+        return result if result is not None else PriceSeries.empty()
+    
+    async def get_historical_data(self, ticker: str, start_date: str, end_date: str) -> Optional[PriceSeries]:
+        """Get historical OHLC data for a stock ticker as a columnar PriceSeries"""
+        try:
+            start_day, end_day = date_to_ordinal(start_date), date_to_ordinal(end_date)
+            
+            # Only the parts of the range not already cached are downloaded. With a
+            # history store these calls map and write files, so they leave the loop.
+            async with self._history_locks[ticker]:
+                gaps = await asyncio.to_thread(self.history_cache.missing, ticker, start_day, end_day)
+                for gap_start, gap_end in gaps:
+                    bars = await self._fetch_history(ticker, gap_start, gap_end)
+                    await asyncio.to_thread(self.history_cache.store, ticker, gap_start, gap_end, bars)
+                
+                historical_data = await asyncio.to_thread(self.history_cache.get, ticker, start_day, end_day)
+            if historical_data is not None and len(historical_data) > 0:
+                return historical_data
+        except Exception as e:
+            logger.error(f"Error getting historical data for {ticker}: {e}")
+        
+        return None
+    
+    async def get_many_historical_data(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, Optional[PriceSeries]]:
+        """Fetch histories for many tickers concurrently, bounded by max_in_flight"""
+        results = await asyncio.gather(
+            *(self.get_historical_data(ticker, start_date, end_date) for ticker in tickers)
+        )
+        return dict(zip(tickers, results))
+    
+    async def get_bulk_last_day(self, exchange: str = 'US', date: str = None) -> Optional[Dict[str, PriceSeries]]:
+        """
+        Get one trading day's bar for every symbol on an exchange (latest day unless `date` is given)
+        
+        An empty dict means the request succeeded but the market was closed that
+        day; None means the request failed.
+        """
+        params = {"fmt": "json"}
+        if date:
+            params["date"] = date
+        
+        try:
+            result = await self._make_request(f"eod-bulk-last-day/{exchange}", params)
+            return group_bulk_rows(result or [])
+        except Exception as e:
+            logger.error(f"Error getting bulk EOD data for {exchange}: {e}")
+            return None
+    
+    async def get_stock_fundamentals(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Get fundamental data for a stock"""
+        cache_key = f"fundamentals:{ticker}"
+        if cache_key in self.cache:
+            return self.cache[cache_key]
+        
+        try:
+            result = await self._make_request(f"fundamentals/{ticker}.US")
+            
+            if result:
+                self.cache[cache_key] = result
+                return result
+        except Exception as e:
+            logger.error(f"Error getting fundamentals for {ticker}: {e}")
+        
+        return None
+    
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        """Search for stocks by name or ticker"""
+        try:
+            result = await self._make_request("search", {"q": query})
+            return result if result else []
+        except Exception as e:
+            logger.error(f"Error searching stocks: {e}")
+            return []
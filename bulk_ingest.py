@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Bulk EOD ingestion for SuperPerformanceScreener
+Brings the local history store up to date with one eod-bulk-last-day request per
+trading day instead of one eod request per ticker
+"""
+import argparse
+import logging
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+from eodhd_client import EODHDClient
+from history_store import HistoryStore
+from price_series import PriceSeries, ordinal_to_date
+from config import BULK_EXCHANGE, BULK_MAX_DAYS, HISTORY_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+def business_days_between(after_day: int, through_day: int) -> List[int]:
+    """Weekdays in (after_day, through_day] as day ordinals"""
+    days = np.arange(after_day + 1, through_day + 1, dtype=np.int64)
+    return days[np.is_busday(days.astype('datetime64[D]'))].tolist()
+
+def bulk_refresh(client: EODHDClient, tickers: List[str], max_days: int = BULK_MAX_DAYS,
+                 exchange: str = BULK_EXCHANGE) -> Dict[str, Any]:
+    """
+    Append the newest trading days to every stored ticker in `tickers`
+
+    The latest bulk day is always fetched; older days are fetched (newest first,
+    up to `max_days` in total) only as far back as the most stale stored ticker
+    needs. A bulk request that succeeds with no rows is a market holiday and
+    still covers its day; only a failed request leaves a day uncovered. A ticker
+    is refreshed from the bulk data when every weekday after its last stored day
+    is covered; anything further behind, or behind across a failed day, falls
+    back to a per-ticker request for just the missing range. Tickers with no
+    stored history are left for the normal fetch path.
+    """
+    store = client.history_cache.history_store
+    if store is None:
+        raise ValueError("Bulk refresh needs an EODHDClient with a history store")
+
+    summary = {'as_of': None, 'bulk_requests': 1, 'refreshed': 0, 'backfilled': 0,
+               'up_to_date': 0, 'not_stored': 0, 'failed': 0}
+
+    latest = client.get_bulk_last_day(exchange)
+    if not latest:
+        logger.warning("Bulk EOD request failed or returned no data; nothing refreshed")
+        return summary
+
+    as_of = max(int(series.dates[-1]) for series in latest.values())
+    summary['as_of'] = ordinal_to_date(as_of)
+
+    behind = {}
+    for ticker in tickers:
+        span = store.span(ticker)
+        if span is None:
+            summary['not_stored'] += 1
+        elif span[1] >= as_of:
+            summary['up_to_date'] += 1
+        else:
+            behind[ticker] = span
+
+    if not behind:
+        return summary
+
+    # Fetch the older days the stalest tickers need, within the request budget
+    bulk_days = {as_of: latest}
+    oldest = min(last_day for _, last_day in behind.values())
+    for day in reversed(business_days_between(oldest, as_of)[-max_days:]):
+        if day not in bulk_days:
+            summary['bulk_requests'] += 1
+            bulk_days[day] = client.get_bulk_last_day(exchange, ordinal_to_date(day))
+    # Holidays come back empty but are covered; failed requests come back as None
+    covered = {day for day, bars in bulk_days.items() if bars is not None}
+    if len(covered) < len(bulk_days):
+        logger.warning(f"{len(bulk_days) - len(covered)} bulk EOD requests failed; "
+                       f"tickers behind across those days are backfilled per ticker")
+
+    for ticker, (start_day, last_day) in behind.items():
+        # The in-memory copy (if any) is stale once the store moves on
+        client.history_cache.discard(ticker)
+
+        try:
+            if all(day in covered for day in business_days_between(last_day, as_of)):
+                bars = PriceSeries.concat([
+                    bulk_days[day][ticker] for day in sorted(covered)
+                    if day > last_day and ticker in bulk_days[day]
+                ])
+                store.append(ticker, bars, through_day=as_of)
+                summary['refreshed'] += 1
+            elif client.get_historical_data(ticker, ordinal_to_date(start_day), ordinal_to_date(as_of)) is not None:
+                summary['backfilled'] += 1
+            else:
+                summary['failed'] += 1
+        except Exception as e:
+            logger.error(f"Error refreshing {ticker}: {e}")
+            summary['failed'] += 1
+
+    return summary
+
+def main():
+    """Refresh every ticker already in the local store"""
+    parser = argparse.ArgumentParser(description='Refresh the local price history store from bulk EOD data')
+    parser.add_argument('--store-dir', default=HISTORY_STORE_DIR, help='Directory of the local price history store')
+    parser.add_argument('--max-days', type=int, default=BULK_MAX_DAYS,
+                        help=f'Most trading days to fetch in bulk before backfilling per ticker (default: {BULK_MAX_DAYS})')
+    parser.add_argument('--eodhd-key', help='EODHD API key (overrides .env)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = HistoryStore(args.store_dir)
+    tickers = store.tickers()
+    if not tickers:
+        print(f"❌ No stored histories in {args.store_dir}. Run a screen first to populate the store.")
+        sys.exit(1)
+
+    print(f"📦 Refreshing {len(tickers)} stored tickers from bulk EOD data...")
+    with EODHDClient(args.eodhd_key, history_store=store) as client:
+        summary = bulk_refresh(client, tickers, max_days=args.max_days)
+
+    print(f"📅 Data as of: {summary['as_of'] or 'N/A'} ({summary['bulk_requests']} bulk requests)")
+    print(f"✅ Refreshed from bulk: {summary['refreshed']}")
+    print(f"🔁 Backfilled per ticker: {summary['backfilled']}")
+    print(f"ℹ️ Already up to date: {summary['up_to_date']}")
+    if summary['failed']:
+        print(f"⚠️ Failed: {summary['failed']}")
+
+if __name__ == "__main__":
+    main()
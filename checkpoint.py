@@ -0,0 +1,137 @@
+"""
+Checkpoint journal for SuperPerformanceScreener
+Records every finished ticker of a comprehensive run in an append-only JSON Lines
+file, so an interrupted run can resume where it stopped
+"""
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+
+from config import CHECKPOINT_FILE, CHECKPOINT_SYNC_EVERY, CHECKPOINT_SYNC_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Record statuses
+ANALYZED = 'analyzed'
+LOW_VOLUME = 'low_volume'
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for the non-JSON values a move can carry"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class CheckpointJournal:
+    """
+    One JSON line per finished ticker: {"ticker", "exchange", "status", "moves"}
+
+    Records are only ever appended. Each one is flushed to the OS as soon as it
+    is written, so a crash of the process loses nothing. fsync runs once every
+    `sync_every` records or `sync_seconds` seconds, whichever comes first, so
+    that losing power costs at most one batch. A line torn by a crash mid-write
+    is ignored when the journal is read back, and it is cut off before new
+    records are appended. Safe to write from several threads.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_FILE, sync_every: int = CHECKPOINT_SYNC_EVERY,
+                 sync_seconds: float = CHECKPOINT_SYNC_SECONDS):
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.sync_seconds = sync_seconds
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'CheckpointJournal':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Every complete record in the journal, keyed by ticker (the latest record wins)"""
+        records = {}
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[record['ticker']] = record
+        except OSError:
+            pass
+        return records
+
+    def open(self, resume: bool = False):
+        """Start writing: append to the existing journal when resuming, otherwise start a new one"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume and os.path.exists(self.path):
+            self._drop_torn_tail()
+            self._file = open(self.path, 'ab')
+        else:
+            self._file = open(self.path, 'wb')
+        self._last_sync = time.monotonic()
+
+    def _drop_torn_tail(self):
+        """Cut the file back to its last complete line"""
+        with open(self.path, 'r+b') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                logger.warning(f"Dropping {len(data) - end} bytes of an incomplete checkpoint record")
+                f.truncate(end)
+
+    def record(self, ticker: str, exchange: str, status: str, moves: Optional[List[Dict[str, Any]]] = None):
+        """Append one finished ticker"""
+        if self._file is None:
+            raise ValueError("Checkpoint journal is not open")
+
+        line = json.dumps({
+            'ticker': ticker,
+            'exchange': exchange,
+            'status': status,
+            'moves': moves or []
+        }, default=_to_json).encode() + b'\n'
+
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_seconds:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Force everything written so far to disk"""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        """Sync and close the journal"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self._unsynced:
+                self._sync()
+            self._file.close()
+            self._file = None
@@ -5,34 +5,140 @@ Analyzes ALL NYSE and NASDAQ stocks with >200k average volume
 """
 import sys
 sys.path.append('.')
-from main import SuperPerformanceScreener
+from main import SuperPerformanceScreener, ResultExporter
+from stock_analyzer import StockAnalyzer
+from history_store import HistoryStore
+from bulk_ingest import bulk_refresh
+from pipeline import Pipeline, Stage
+from checkpoint import CheckpointJournal, ANALYZED, LOW_VOLUME
+from incremental import MoveStateStore, analyze_incremental
+from result_store import ResultStore
+from consolidation import consolidate_ticker
+from sharding import (
+    parse_shard, select_shard, shard_label, shard_path, write_shard_results, load_shard_results
+)
+from config import (
+    HISTORY_STORE_DIR, VOLUME_WINDOWS, PIPELINE_FETCH_WORKERS, PIPELINE_QUEUE_SIZE, CHECKPOINT_FILE, MOVE_STATE_DIR,
+    RESULT_STORE_FILE, MERGE_OVERLAPPING_MOVES
+)
+import argparse
 import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-import time
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Analyzer, history store and move state store reused by every task that runs in the same worker process
+_worker_analyzer = None
+_worker_store = None
+_worker_move_states = None
+
+def analyze_history(analyzer, ticker, exchange, volume, historical_data, move_states=None):
+    """
+    Run the CPU-bound move analysis for one ticker's history and return its valid moves
+    
+    With a MoveStateStore only the part of the history that can still change is
+    reanalyzed.
+    """
+    if move_states is not None:
+        valid_moves = analyze_incremental(analyzer, ticker, historical_data, move_states)
+    else:
+        # Skip the full move analysis when no window can reach the Growth thresholds
+        if not analyzer.can_superperform(historical_data):
+            return []
+        
+        # Analyze for growth moves
+        moves = analyzer.analyze_stock(ticker, historical_data)
+        
+        # Filter to only valid moves
+        valid_moves = analyzer.filter_valid_moves(moves)
+    
+    # Add exchange and volume info to each move
+    for move in valid_moves:
+        move['exchange'] = exchange
+        move['avg_volume'] = volume
+    
+    return valid_moves
+
+def _analyze_history_in_worker(ticker, exchange, volume, historical_data, move_state_dir=None):
+    """Process-pool entry point for analyze_history"""
+    global _worker_analyzer, _worker_move_states
+    if _worker_analyzer is None:
+        _worker_analyzer = StockAnalyzer()
+    if move_state_dir and (_worker_move_states is None or _worker_move_states.root != move_state_dir):
+        _worker_move_states = MoveStateStore(move_state_dir)
+    move_states = _worker_move_states if move_state_dir else None
+    return analyze_history(_worker_analyzer, ticker, exchange, volume, historical_data, move_states)
+
+def _analyze_stored_history_in_worker(ticker, exchange, volume, store_dir, first_day, last_day, move_state_dir=None):
+    """Process-pool entry point that maps the history from the local store instead of receiving it"""
+    global _worker_store
+    if _worker_store is None or _worker_store.root != store_dir:
+        _worker_store = HistoryStore(store_dir)
+    
+    stored = _worker_store.load(ticker)
+    if stored is None:
+        raise ValueError(f"No stored history for {ticker}")
+    return _analyze_history_in_worker(ticker, exchange, volume, stored.between(first_day, last_day), move_state_dir)
+
 class ComprehensiveScreener:
     """Comprehensive screener for all NYSE/NASDAQ stocks"""
     
-    def __init__(self):
-        self.screener = SuperPerformanceScreener()
+    def __init__(self, workers: int = 1, history_store_dir: str = HISTORY_STORE_DIR, bulk_refresh: bool = False,
+                 fetch_workers: int = PIPELINE_FETCH_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 checkpoint_path: str = CHECKPOINT_FILE, resume: bool = False,
+                 move_state_dir: str = None, shard=None, result_store_path: str = RESULT_STORE_FILE,
+                 merge_overlaps: bool = MERGE_OVERLAPPING_MOVES, merge_only: bool = False):
+        # Merging shard files only exports, so it needs no API client or caches
+        self.screener = None if merge_only else SuperPerformanceScreener(history_store_dir=history_store_dir)
+        self.exporter = self.screener or ResultExporter()
+        self.history_store_dir = history_store_dir
+        self.bulk_refresh = bulk_refresh and bool(history_store_dir)
+        self.as_of_date = None
+        self.workers = max(1, workers)
+        self.fetch_workers = max(1, fetch_workers)
+        self.queue_size = max(1, queue_size)
         self.results = []
         self.processed_count = 0
+        self.volume_skipped = 0
         self.error_count = 0
+        self.total_stocks = 0
+        self._counter_lock = threading.Lock()
+        self.shard = shard
+        if shard and checkpoint_path:
+            checkpoint_path = shard_path(checkpoint_path, *shard)
+        self.journal = CheckpointJournal(checkpoint_path) if checkpoint_path else None
+        self.resume = resume and self.journal is not None
+        self.move_state_dir = move_state_dir
+        self.move_states = MoveStateStore(move_state_dir) if move_state_dir else None
+        self.result_store_path = result_store_path
+        self.result_store = None
+        self.run_id = None
+        self.merge_overlaps = merge_overlaps
         
     def get_all_exchange_stocks(self):
         """Get comprehensive list of all NYSE and NASDAQ stocks"""
         print("🔍 Discovering ALL NYSE and NASDAQ stocks...")
         
+        # The local symbol master holds every listed NYSE/NASDAQ common stock
+        symbol_master = self.screener.symbol_master
+        if symbol_master.ensure(self.screener.eodhd_client):
+            unique_stocks = symbol_master.universe()
+            if unique_stocks:
+                print(f"📚 Symbol master ({symbol_master.built_at:%Y-%m-%d %H:%M}): {len(unique_stocks)} stocks")
+                print(f"   NYSE: {len([s for s in unique_stocks if s[1] == 'NYSE'])}")
+                print(f"   NASDAQ: {len([s for s in unique_stocks if s[1] == 'NASDAQ'])}")
+                return unique_stocks
+        
         all_stocks = []
         
-        # Since the exchange listing API isn't working, we'll use a comprehensive approach
-        # combining major indices, known stock lists, and expanding from there
+        # Fallback when the symbol lists can't be fetched: combine major indices,
+        # known stock lists, and expand from there
         
-        print("📈 Using comprehensive stock discovery approach...")
+        print("📈 Symbol master unavailable, using built-in stock list...")
         
         # Start with major indices and known stocks
         major_stocks = [
@@ -146,9 +252,11 @@ class ComprehensiveScreener:
         
         all_stocks.extend(major_stocks)
         
-        # Remove duplicates and sort
-        unique_stocks = list(set(all_stocks))
-        unique_stocks.sort(key=lambda x: x[0])  # Sort by ticker
+        # Remove duplicates (one exchange per ticker, first listing wins) and sort by ticker
+        exchanges = {}
+        for ticker, exchange in all_stocks:
+            exchanges.setdefault(ticker, exchange)
+        unique_stocks = sorted(exchanges.items())
         
         print(f"📊 Total unique stocks found: {len(unique_stocks)}")
         print(f"   NYSE: {len([s for s in unique_stocks if s[1] == 'NYSE'])}")
@@ -156,72 +264,227 @@ class ComprehensiveScreener:
         
         return unique_stocks
     
-    def filter_by_volume(self, stocks):
-        """Filter stocks by >200k average volume"""
-        print("🔍 Filtering stocks by volume (>200k)...")
+    def refresh_store(self, stocks):
+        """Bring the local history store up to date from bulk end-of-day data"""
+        print("📦 Refreshing local history store from bulk EOD data...")
         
-        volume_filtered = []
-        total_stocks = len(stocks)
+        summary = bulk_refresh(self.screener.eodhd_client, [ticker for ticker, _ in stocks])
+        self.as_of_date = summary['as_of']
         
-        for i, (ticker, exchange) in enumerate(stocks):
-            try:
-                print(f"   Checking volume for {ticker} ({exchange}) - {i+1}/{total_stocks}")
-                
-                # Get average volume
-                volume = self.screener.eodhd_client.get_stock_volume(ticker)
-                
-                if volume and volume >= 200000:
-                    volume_filtered.append((ticker, exchange, volume))
-                    print(f"     ✅ {ticker}: {volume:,.0f} volume")
-                else:
-                    print(f"     ❌ {ticker}: {volume or 'N/A'} volume (below threshold)")
-                
-                # Rate limiting
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"     ⚠️ Error checking {ticker}: {e}")
-                continue
+        print(f"   📅 Data as of: {summary['as_of'] or 'N/A'} ({summary['bulk_requests']} bulk requests)")
+        print(f"   ✅ {summary['refreshed']} refreshed from bulk, {summary['backfilled']} backfilled per ticker, "
+              f"{summary['up_to_date']} already current, {summary['not_stored']} not yet stored")
+    
+    def fetch_history(self, ticker, exchange):
+        """Fetch the full available history for a stock (None if there is none)"""
+        # Use maximum historical range (20+ years back)
+        start_date = '2000-01-01'
+        # After a bulk refresh the store is complete through its as-of date, so stop there
+        end_date = self.as_of_date or datetime.now().strftime('%Y-%m-%d')
+        
+        print(f"   📊 Analyzing {ticker} ({exchange})")
+        
+        # Get historical data
+        historical_data = self.screener.eodhd_client.get_historical_data(ticker, start_date, end_date)
         
-        print(f"📊 Volume filtered stocks: {len(volume_filtered)} out of {total_stocks}")
-        return volume_filtered
+        if not historical_data:
+            print(f"     ❌ No historical data for {ticker}")
+            return None
+        
+        print(f"     📈 Found {len(historical_data)} data points")
+        return historical_data
+    
+    def check_volume(self, ticker, historical_data):
+        """Average volume from the fetched history if it passes the >200k filter, else None (no API calls)"""
+        averages = self.screener.analyzer.average_volumes(historical_data, as_of_date=self.as_of_date)
+        volume = averages[VOLUME_WINDOWS[0]]
+        volumes_text = ', '.join(
+            f"{average:,.0f}" if average is not None else 'N/A' for average in averages.values()
+        )
+        
+        if self.screener.analyzer.meets_volume_requirement(averages):
+            print(f"     ✅ {ticker}: {volumes_text} volume")
+            return volume
+        
+        with self._counter_lock:
+            self.volume_skipped += 1
+        print(f"     ❌ {ticker}: {volumes_text} volume (below threshold)")
+        return None
+    
+    def _checkpoint(self, ticker, exchange, status, moves=None):
+        """Journal a finished ticker (when checkpointing is enabled)"""
+        if self.journal is not None:
+            self.journal.record(ticker, exchange, status, moves)
+    
+    def _start_result_run(self, source):
+        """Open the result store and register this run in it (when the store is enabled)"""
+        if self.result_store_path:
+            self.result_store = ResultStore(self.result_store_path)
+            self.run_id = self.result_store.start_run(source=source)
     
-    def analyze_stock_comprehensive(self, ticker, exchange, volume):
-        """Analyze a single stock with comprehensive historical data"""
+    def _store_moves(self, moves):
+        """Queue one stock's consolidated moves for the result store"""
+        if self.result_store is not None and moves:
+            self.result_store.add_moves(self.run_id, consolidate_ticker(moves, self.merge_overlaps))
+    
+    def _close_result_store(self):
+        if self.result_store is not None:
+            self.result_store.close()
+            self.result_store = None
+    
+    def resume_from_checkpoint(self, stocks):
+        """Restore the work journaled by an interrupted run and return the stocks still to do"""
+        done = self.journal.load()
+        if not done:
+            print("ℹ️ No checkpoint to resume from, starting from the first stock")
+            return stocks
+        
+        for record in done.values():
+            if record['status'] == ANALYZED:
+                self.processed_count += 1
+                self.results.extend(record['moves'])
+                self._store_moves(record['moves'])
+            elif record['status'] == LOW_VOLUME:
+                self.volume_skipped += 1
+        
+        remaining = [(ticker, exchange) for ticker, exchange in stocks if ticker not in done]
+        print(f"🔁 Resuming: {len(stocks) - len(remaining)} stocks already done, "
+              f"{len(self.results)} moves restored, {len(remaining)} to go")
+        return remaining
+    
+    def analyze_stock_comprehensive(self, ticker, exchange):
+        """
+        Analyze a single stock with comprehensive historical data
+        
+        Returns the stock's valid moves, or None when it has no history, does not
+        meet the volume requirement or fails.
+        """
         try:
-            # Use maximum historical range (20+ years back)
-            start_date = '2000-01-01'
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            
-            print(f"   📊 Analyzing {ticker} ({exchange}) - Volume: {volume:,.0f}")
-            
-            # Get historical data
-            historical_data = self.screener.eodhd_client.get_historical_data(ticker, start_date, end_date)
-            
-            if not historical_data:
-                print(f"     ❌ No historical data for {ticker}")
-                return []
+            historical_data = self.fetch_history(ticker, exchange)
             
-            print(f"     📈 Found {len(historical_data)} data points")
+            if historical_data is None:
+                return None
             
-            # Analyze for growth moves
-            moves = self.screener.analyzer.analyze_stock(ticker, historical_data)
+            volume = self.check_volume(ticker, historical_data)
+            if volume is None:
+                self._checkpoint(ticker, exchange, LOW_VOLUME)
+                return None
             
-            # Filter to only valid moves
-            valid_moves = self.screener.analyzer.filter_valid_moves(moves)
+            valid_moves = analyze_history(self.screener.analyzer, ticker, exchange, volume, historical_data,
+                                          self.move_states)
             
             print(f"     🎯 Found {len(valid_moves)} valid moves")
             
-            # Add exchange and volume info to each move
-            for move in valid_moves:
-                move['exchange'] = exchange
-                move['avg_volume'] = volume
-            
             return valid_moves
             
         except Exception as e:
+            self.error_count += 1
             print(f"     ❌ Error analyzing {ticker}: {e}")
-            return []
+            return None
+    
+    def _record_stock_result(self, ticker, exchange, moves, total, start_time):
+        """Collect one stock's moves, journal it and print progress"""
+        self._checkpoint(ticker, exchange, ANALYZED, moves)
+        self._store_moves(moves)
+        self.processed_count += 1
+        
+        if moves:
+            self.results.extend(moves)
+            print(f"   ✅ Added {len(moves)} moves for {ticker}")
+        else:
+            print(f"   ℹ️ No valid moves for {ticker}")
+        
+        # Progress update every 10 stocks
+        if self.processed_count % 10 == 0:
+            elapsed = datetime.now() - start_time
+            print(f"\n📊 Progress: {self.processed_count}/{total} stocks processed")
+            print(f"⏱️ Elapsed time: {elapsed}")
+            print(f"🎯 Total moves found so far: {len(self.results)}")
+    
+    def _analyze_pipelined(self, stocks, start_time, total=None):
+        """
+        Stream stocks through fetch → volume filter → analysis → results
+        
+        Fetcher threads download histories and apply the volume filter while the
+        analysis stage works on earlier stocks, and results are recorded as soon
+        as each stock finishes. Bounded queues between the stages keep the number
+        of histories held in memory fixed however many stocks are screened. With
+        more than one worker the analysis runs in a process pool; with the local
+        history store enabled, workers map each history from disk rather than
+        having it pickled across to them. A worker that dies breaks the whole
+        pool, so the pool is rebuilt and the stock resubmitted once.
+        """
+        total = total or len(stocks)
+        client = self.screener.eodhd_client
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pool_lock = threading.Lock()
+        
+        def rebuild_pool(broken):
+            nonlocal pool
+            with pool_lock:
+                # Every stock in flight sees the same broken pool; only the first rebuilds it
+                if pool is broken:
+                    print("     ⚠️ An analysis worker died, restarting the process pool")
+                    broken.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(max_workers=self.workers)
+                return pool
+        
+        def run_in_pool(fn, *args):
+            current = pool
+            try:
+                return current.submit(fn, *args).result()
+            except BrokenProcessPool:
+                return rebuild_pool(current).submit(fn, *args).result()
+        
+        def fetch(stock):
+            ticker, exchange = stock
+            historical_data = self.fetch_history(ticker, exchange)
+            if historical_data is None:
+                return None
+            volume = self.check_volume(ticker, historical_data)
+            if volume is None:
+                self._checkpoint(ticker, exchange, LOW_VOLUME)
+                client.history_cache.discard(ticker)
+                return None
+            return ticker, exchange, volume, historical_data
+        
+        def analyze(job):
+            ticker, exchange, volume, historical_data = job
+            try:
+                if pool is None:
+                    return ticker, exchange, analyze_history(self.screener.analyzer, ticker, exchange, volume,
+                                                             historical_data, self.move_states)
+                if self.history_store_dir:
+                    moves = run_in_pool(
+                        _analyze_stored_history_in_worker, ticker, exchange, volume, self.history_store_dir,
+                        int(historical_data.dates[0]), int(historical_data.dates[-1]), self.move_state_dir
+                    )
+                else:
+                    moves = run_in_pool(_analyze_history_in_worker, ticker, exchange, volume, historical_data,
+                                        self.move_state_dir)
+                return ticker, exchange, moves
+            finally:
+                # Each history is analyzed once, so don't keep it around
+                client.history_cache.discard(ticker)
+        
+        def report_error(stage, item, error):
+            print(f"     ❌ Error in {stage} for {item[0]}: {error}")
+        
+        pipeline = Pipeline(
+            [
+                Stage('fetch', fetch, workers=self.fetch_workers, queue_size=self.queue_size),
+                Stage('analyze', analyze, workers=self.workers, queue_size=self.queue_size)
+            ],
+            sink_queue_size=self.queue_size,
+            on_error=report_error
+        )
+        
+        try:
+            pipeline.run(stocks, lambda result: self._record_stock_result(*result, total, start_time))
+        finally:
+            self.error_count += pipeline.errors
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
     
     def run_comprehensive_analysis(self):
         """Run the complete comprehensive analysis"""
@@ -238,103 +501,186 @@ class ComprehensiveScreener:
                 print("❌ No stocks found. Exiting.")
                 return
             
-            # Step 2: Filter by volume
-            volume_filtered = self.filter_by_volume(all_stocks)
+            # Each machine of a sharded run screens only its own share of the universe
+            if self.shard:
+                universe_size = len(all_stocks)
+                all_stocks = select_shard(all_stocks, *self.shard)
+                print(f"🧩 Shard {self.shard[0]}/{self.shard[1]}: {len(all_stocks)} of {universe_size} stocks")
             
-            if not volume_filtered:
-                print("❌ No stocks meet volume criteria. Exiting.")
-                return
+            if self.bulk_refresh:
+                self.refresh_store(all_stocks)
             
-            # Step 3: Analyze each stock
-            print(f"\n🔬 Analyzing {len(volume_filtered)} stocks for superperformance...")
+            # Finished stocks are journaled as they complete, so an interrupted run can resume.
+            # Their moves also go to the result store, in batches, as the run goes.
+            total = self.total_stocks = len(all_stocks)
+            self._start_result_run(f"shard {self.shard[0]}/{self.shard[1]}" if self.shard else 'comprehensive')
+            if self.resume:
+                all_stocks = self.resume_from_checkpoint(all_stocks)
+            if self.journal is not None:
+                self.journal.open(resume=self.resume)
+            
+            # Step 2: Fetch, volume-filter and analyze each stock. The volume filter
+            # reads the history being analyzed, so it costs no extra requests.
+            print(f"\n🔬 Analyzing {len(all_stocks)} stocks for superperformance (volume >200k)...")
             print("=" * 80)
             
-            for i, (ticker, exchange, volume) in enumerate(volume_filtered):
-                self.processed_count += 1
-                
-                print(f"\n[{self.processed_count}/{len(volume_filtered)}] Processing {ticker}")
-                
-                # Analyze the stock
-                moves = self.analyze_stock_comprehensive(ticker, exchange, volume)
-                
-                if moves:
-                    self.results.extend(moves)
-                    print(f"   ✅ Added {len(moves)} moves for {ticker}")
-                else:
-                    print(f"   ℹ️ No valid moves for {ticker}")
-                
-                # Progress update every 10 stocks
-                if self.processed_count % 10 == 0:
-                    elapsed = datetime.now() - start_time
-                    print(f"\n📊 Progress: {self.processed_count}/{len(volume_filtered)} stocks processed")
-                    print(f"⏱️ Elapsed time: {elapsed}")
-                    print(f"🎯 Total moves found so far: {len(self.results)}")
-                
-                # Rate limiting
-                time.sleep(1)
+            if self.workers > 1 or self.fetch_workers > 1:
+                print(f"⚙️ Using {self.fetch_workers} fetch threads and {self.workers} analysis workers")
+                self._analyze_pipelined(all_stocks, start_time, total)
+            else:
+                for i, (ticker, exchange) in enumerate(all_stocks):
+                    print(f"\n[{i + 1}/{len(all_stocks)}] Processing {ticker}")
+                    
+                    # Analyze the stock
+                    moves = self.analyze_stock_comprehensive(ticker, exchange)
+                    if moves is not None:
+                        self._record_stock_result(ticker, exchange, moves, total, start_time)
             
-            # Step 4: Export results
+            # Step 3: Export results
             print(f"\n🎉 Analysis complete!")
-            print(f"📊 Processed {self.processed_count} stocks")
+            print(f"📊 Processed {self.processed_count} stocks ({self.volume_skipped} below volume threshold)")
             print(f"🎯 Found {len(self.results)} total moves")
             print(f"⏱️ Total time: {datetime.now() - start_time}")
             
-            if self.results:
-                print("\n📤 Exporting results to Google Sheets...")
-                
-                # Consolidate overlapping moves
-                consolidated_results = self.screener.consolidate_overlapping_moves(self.results)
-                print(f"📋 Consolidated to {len(consolidated_results)} unique moves")
-                
-                # Export to Google Sheets
-                self.screener.output_results(consolidated_results)
-                
-                spreadsheet_url = self.screener.sheets_client.get_spreadsheet_url()
-                print(f"\n🎉 Results successfully exported to: {spreadsheet_url}")
-                
-                # Save results to local file as backup
-                self.save_results_backup(consolidated_results)
-                
+            if self.shard:
+                self.save_shard_results(complete=True)
             else:
-                print("❌ No results found to export")
+                self.export_results()
                 
         except KeyboardInterrupt:
             print("\n⚠️ Analysis interrupted by user")
-            if self.results:
+            if self.journal is not None:
+                print(f"💾 Progress saved to {self.journal.path}; run again with --resume to continue")
+            if self.shard:
+                self.save_shard_results(complete=False)
+            elif self.results:
                 print(f"📊 Partial results: {len(self.results)} moves found")
                 print("📤 Exporting partial results...")
-                self.screener.output_results(self.results)
+                self.exporter.output_results(self.results, self.merge_overlaps)
         except Exception as e:
             print(f"❌ Error during comprehensive analysis: {e}")
             import traceback
             traceback.print_exc()
+            if self.shard:
+                self.save_shard_results(complete=False)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            self._close_result_store()
+    
+    def export_results(self):
+        """Consolidate the collected moves, save them to the result store and export them to Google Sheets"""
+        if not self.results:
+            print("❌ No results found to export")
+            # A streamed run that found nothing is still a finished run
+            if self.result_store is not None:
+                self.save_results_backup([])
+            return
+        
+        # Consolidate overlapping moves
+        consolidated_results = self.exporter.consolidate_overlapping_moves(self.results, self.merge_overlaps)
+        print(f"📋 Consolidated to {len(consolidated_results)} unique moves")
+        
+        # Keep the results in the local result store first, so it never depends on Google Sheets
+        self.save_results_backup(consolidated_results)
+        
+        # Export to Google Sheets (printed to the console when Sheets is not configured)
+        print("\n📤 Exporting results to Google Sheets...")
+        self.exporter.output_results(consolidated_results, self.merge_overlaps)
+        
+        if self.exporter.sheets_client is not None:
+            spreadsheet_url = self.exporter.sheets_client.get_spreadsheet_url()
+            print(f"\n🎉 Results successfully exported to: {spreadsheet_url}")
+    
+    def save_shard_results(self, complete):
+        """Write this shard's raw moves for the merge step instead of exporting them"""
+        index, count = self.shard
+        filename = f"comprehensive_results_{shard_label(index, count)}.json"
+        write_shard_results(filename, index, count, self.results, self.total_stocks, self.processed_count, complete)
+        if complete and self.result_store is not None:
+            self.result_store.finish_run(self.run_id)
+        state = "complete" if complete else "partial"
+        print(f"💾 Shard {index}/{count} results ({state}, {len(self.results)} moves) saved to: {filename}")
+        print(f"   Merge all {count} shard files with: python comprehensive_screener.py --merge <files>")
+    
+    def merge_shard_results(self, paths):
+        """Combine every shard's result file and export them like a single-machine run"""
+        print(f"🧩 Merging {len(paths)} shard result files...")
+        try:
+            self.results, warnings = load_shard_results(paths)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Cannot merge shard results: {e}")
+            return
+        
+        for warning in warnings:
+            print(f"⚠️ {warning}")
+        print(f"🎯 Found {len(self.results)} total moves")
+        self.export_results()
     
     def save_results_backup(self, results):
-        """Save results to local JSON file as backup"""
+        """
+        Save the consolidated results to the local result store
+        
+        A screening run has already streamed its moves into the store, so this
+        only finishes that run. Results that were not streamed (a shard merge)
+        are stored as a new run.
+        """
+        if not self.result_store_path:
+            return
         try:
-            filename = f"comprehensive_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            # Convert datetime objects to strings for JSON serialization
-            serializable_results = []
-            for result in results:
-                serializable_result = {}
-                for key, value in result.items():
-                    if isinstance(value, datetime):
-                        serializable_result[key] = value.isoformat()
-                    else:
-                        serializable_result[key] = value
-                serializable_results.append(serializable_result)
-            
-            with open(filename, 'w') as f:
-                json.dump(serializable_results, f, indent=2)
+            if self.result_store is None:
+                with ResultStore(self.result_store_path) as store:
+                    run_id = store.start_run(source='merge')
+                    store.add_moves(run_id, results)
+                    count = store.finish_run(run_id)
+            else:
+                run_id = self.run_id
+                count = self.result_store.finish_run(run_id)
             
-            print(f"💾 Results backed up to: {filename}")
+            print(f"💾 {count} moves saved to {self.result_store_path} as run {run_id}")
+            print(f"   Query them with: python result_store.py query --run {run_id}")
             
         except Exception as e:
-            print(f"⚠️ Could not save backup: {e}")
+            print(f"⚠️ Could not save results to the result store: {e}")
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Comprehensive SuperPerformanceScreener')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes for move analysis (default: 1, analyze in this process)')
+    parser.add_argument('--fetch-workers', type=int, default=PIPELINE_FETCH_WORKERS,
+                        help=f'Threads downloading histories while analysis runs (default: {PIPELINE_FETCH_WORKERS})')
+    parser.add_argument('--queue-size', type=int, default=PIPELINE_QUEUE_SIZE,
+                        help=f'Most stocks waiting between pipeline stages (default: {PIPELINE_QUEUE_SIZE})')
+    parser.add_argument('--store-dir', default=HISTORY_STORE_DIR,
+                        help='Directory for the local price history store')
+    parser.add_argument('--no-store', action='store_true',
+                        help='Always download full histories instead of using the local store')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse each stock\'s saved closed moves and only reanalyze its recent history')
+    parser.add_argument('--move-state-dir', default=MOVE_STATE_DIR,
+                        help=f'Directory of saved move state for --incremental (default: {MOVE_STATE_DIR})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its checkpoint instead of starting over')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE,
+                        help=f'Checkpoint journal of finished stocks (default: {CHECKPOINT_FILE})')
+    parser.add_argument('--bulk-refresh', action='store_true',
+                        help='Update the local store from bulk EOD data (a few requests) before analyzing')
+    parser.add_argument('--merge-overlaps', action='store_true', default=MERGE_OVERLAPPING_MOVES,
+                        help='Consolidate every chain of overlapping moves into one, not only moves ending the same day')
+    parser.add_argument('--result-store', default=RESULT_STORE_FILE,
+                        help=f'SQLite store the results are saved to (default: {RESULT_STORE_FILE})')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help='Screen only shard I of N (e.g. 2/4) and save its results for --merge')
+    parser.add_argument('--merge', nargs='+', metavar='FILE',
+                        help='Merge the result files of all N shards and export them')
+    args = parser.parse_args()
+    
+    if args.merge:
+        ComprehensiveScreener(checkpoint_path=None, result_store_path=args.result_store,
+                              merge_overlaps=args.merge_overlaps, merge_only=True).merge_shard_results(args.merge)
+        return
+    
     print("🚀 Comprehensive SuperPerformanceScreener")
     print("=" * 80)
     print("This will analyze ALL NYSE and NASDAQ stocks with >200k volume")
@@ -345,7 +691,19 @@ def main():
     response = input("\nDo you want to proceed? (yes/no): ").lower().strip()
     
     if response in ['yes', 'y']:
-        screener = ComprehensiveScreener()
+        screener = ComprehensiveScreener(
+            workers=args.workers,
+            history_store_dir=None if args.no_store else args.store_dir,
+            bulk_refresh=args.bulk_refresh,
+            fetch_workers=args.fetch_workers,
+            queue_size=args.queue_size,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            move_state_dir=args.move_state_dir if args.incremental else None,
+            shard=args.shard,
+            result_store_path=args.result_store,
+            merge_overlaps=args.merge_overlaps
+        )
         screener.run_comprehensive_analysis()
     else:
         print("❌ Analysis cancelled by user")
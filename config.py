@@ -17,6 +17,8 @@ EODHD_BASE_URL = "https://eodhd.com/api"
 
 # Stock Screening Parameters
 MIN_DAILY_VOLUME = 200000
+VOLUME_WINDOWS = (21,)  # trading days averaged for the volume filter (21 ~ one month); every window must pass
+VOLUME_MAX_STALE_DAYS = 10  # histories ending longer ago than this have no current volume
 MIN_GROWTH_PERCENTAGE = 5.0
 MAX_DRAWDOWN_PERCENTAGE = 30.0
 MIN_DRAWDOWN_PERCENTAGE = 15.0
@@ -44,10 +46,66 @@ HEADERS = [
     "Continuation"
 ]
 
-# API Rate Limiting
-REQUEST_DELAY = 1.0  # seconds between requests
+# API Rate Limiting (one token bucket shared by every outbound request)
+RATE_LIMIT_PER_SECOND = 5.0  # starting request rate
+RATE_LIMIT_MIN_PER_SECOND = 0.5
+RATE_LIMIT_MAX_PER_SECOND = 16.0  # EODHD paid plans allow 1000 requests/minute
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_INCREASE = 0.1  # requests/second added back after each accepted request
+RATE_LIMIT_BACKOFF = 0.5  # rate multiplier after a 429 or 5xx response
 MAX_RETRIES = 3
 RETRY_DELAY = 2.0
 
+# Async client: maximum number of requests in flight at once
+ASYNC_MAX_IN_FLIGHT = 10
+
+# Streaming pipeline: threads downloading histories, and items allowed to wait between stages
+PIPELINE_FETCH_WORKERS = 4
+PIPELINE_QUEUE_SIZE = 16
+
+# HTTP connection pool (keep-alive connections reused across requests)
+HTTP_POOL_SIZE = 10
+HTTP_CONNECT_TIMEOUT = 5.0  # seconds to establish a connection
+HTTP_READ_TIMEOUT = 30.0  # seconds to wait for response data
+
+# Local price history store (memory-mapped column files, one directory per ticker)
+HISTORY_STORE_DIR = os.getenv('HISTORY_STORE_DIR', 'data/history')
+
+# Symbol master: local NYSE/NASDAQ symbol list used for exchange lookups and the screening universe
+SYMBOL_MASTER_FILE = os.getenv('SYMBOL_MASTER_FILE', 'data/symbols.json')
+SYMBOL_MASTER_TTL_HOURS = 24
+SYMBOL_MASTER_RETRY_MINUTES = 30  # wait after a failed refresh before requesting the symbol lists again
+
+# Incremental analysis: each ticker's closed moves and open-move frontier from the last run
+MOVE_STATE_DIR = os.getenv('MOVE_STATE_DIR', 'data/moves')
+
+# Online detector: per-ticker open moves and buffered bars, updated bar by bar
+ONLINE_STATE_DIR = os.getenv('ONLINE_STATE_DIR', 'data/online')
+
+# Checkpoint journal of finished tickers, so an interrupted comprehensive run can resume
+CHECKPOINT_FILE = os.getenv('CHECKPOINT_FILE', 'data/checkpoint.jsonl')
+CHECKPOINT_SYNC_EVERY = 50  # records written between fsyncs
+CHECKPOINT_SYNC_SECONDS = 5.0  # longest time a record waits to be fsync'd
+
+# Consolidation: also merge moves whose date ranges overlap, not only those ending the same day
+MERGE_OVERLAPPING_MOVES = False
+
+# Local result store (SQLite) holding every run's consolidated moves
+RESULT_STORE_FILE = os.getenv('RESULT_STORE_FILE', 'data/results.db')
+RESULT_STORE_BATCH_SIZE = 500  # moves buffered before each insert transaction
+
+# Response cache for slow-changing API metadata (seconds each endpoint's responses stay fresh)
+RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR', 'data/responses')
+RESPONSE_CACHE_MAX_MB = 200
+RESPONSE_CACHE_TTLS = {
+    'search': 24 * 3600,
+    'fundamentals': 7 * 24 * 3600,
+    'exchange-symbol-list': 24 * 3600
+}
+
+# Bulk refresh: one eod-bulk-last-day request per trading day covers every US symbol
+BULK_EXCHANGE = 'US'
+BULK_MAX_DAYS = 5  # stores further behind than this are backfilled per ticker
+
 # Data Analysis Parameters
 LOOKBACK_YEARS = 5 
\ No newline at end of file
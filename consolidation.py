@@ -0,0 +1,63 @@
+"""
+Move consolidation for SuperPerformanceScreener
+Collapses the overlapping moves the LOD scan finds for a ticker into unique moves
+with a per-ticker sort-and-sweep over day ordinals
+"""
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List
+
+from config import MERGE_OVERLAPPING_MOVES
+
+def _day(value: Any) -> int:
+    """Day ordinal of a 'YYYY-MM-DD' string (or a date/datetime)"""
+    # date.fromisoformat is ~10x faster than parsing through numpy, which matters for millions of moves
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+def consolidate_ticker(moves: List[Dict[str, Any]], merge_overlaps: bool = MERGE_OVERLAPPING_MOVES) -> List[Dict[str, Any]]:
+    """
+    Unique moves of one ticker, ordered by start date
+
+    Moves are sorted by (start, longest end first) and swept once. By default
+    moves ending on the same day are one move, and the earliest start is kept.
+    With `merge_overlaps`, every chain of moves whose date ranges overlap is one
+    move, and the move starting the chain (the longest, if several start that
+    day) is kept. Exact ties keep the move that came first.
+    """
+    spans = sorted(
+        ((_day(move['start_date']), -_day(move['end_date']), i) for i, move in enumerate(moves))
+    )
+
+    kept = []
+    if merge_overlaps:
+        chain_end = None
+        for start, neg_end, i in spans:
+            if chain_end is not None and start <= chain_end:
+                chain_end = max(chain_end, -neg_end)
+                continue
+            kept.append(moves[i])
+            chain_end = -neg_end
+    else:
+        seen_ends = set()
+        for start, neg_end, i in spans:
+            if neg_end not in seen_ends:
+                seen_ends.add(neg_end)
+                kept.append(moves[i])
+    return kept
+
+def consolidate_moves(moves: Iterable[Dict[str, Any]], merge_overlaps: bool = MERGE_OVERLAPPING_MOVES,
+                      grouped: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Unique moves of many tickers, ordered by ticker and then start date
+
+    The moves are grouped by ticker and each group is consolidated on its own,
+    in O(n log n) overall. Pass `grouped=True` when each ticker's moves are
+    already contiguous (as the screeners produce them): the input is then
+    streamed and only one ticker's moves are held at a time, and tickers come
+    out in the order they went in.
+    """
+    if not grouped:
+        moves = sorted(moves, key=itemgetter('ticker'))
+    for _, ticker_moves in groupby(moves, key=itemgetter('ticker')):
+        yield from consolidate_ticker(list(ticker_moves), merge_overlaps)
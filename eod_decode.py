@@ -0,0 +1,100 @@
+"""
+Response decoding for SuperPerformanceScreener
+Parses EOD price history sent as CSV straight into NumPy columns,
+and decodes JSON with orjson when it is installed
+"""
+import io
+import json
+import warnings
+from typing import Any, Union
+
+import numpy as np
+
+from price_series import PriceSeries
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columns every EOD CSV must carry; volume is optional
+REQUIRED_COLUMNS = ('date', 'open', 'high', 'low', 'close')
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON response body (orjson when available, the standard library otherwise)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _parse_day(text: str) -> np.datetime64:
+    try:
+        return np.datetime64(text.strip(), 'D')
+    except ValueError:
+        return np.datetime64('NaT', 'D')
+
+def _read_columns(data: bytes, usecols, dtype) -> np.ndarray:
+    """Decode the selected CSV columns in one pass, skipping rows that don't parse"""
+    with warnings.catch_warnings():
+        # A header-only body is an empty history, not something to warn about
+        warnings.simplefilter('ignore')
+        try:
+            return np.loadtxt(io.BytesIO(data), dtype=dtype, delimiter=',', skiprows=1, usecols=usecols,
+                              comments=None, ndmin=1, encoding='utf-8')
+        except ValueError:
+            pass
+
+        # A stray row (an empty volume, a trailing note) stops loadtxt; genfromtxt
+        # drops rows of the wrong width and leaves NaN where a number won't parse
+        text_dtype = [('date', 'U32')] + dtype[1:]
+        table = np.atleast_1d(np.genfromtxt(io.BytesIO(data), dtype=text_dtype, delimiter=',', skip_header=1,
+                                            usecols=usecols, comments=None, invalid_raise=False,
+                                            encoding='utf-8'))
+
+    dates = np.array([_parse_day(text) for text in table['date']], dtype='datetime64[D]')
+    keep = ~np.isnat(dates)
+    for name in REQUIRED_COLUMNS[1:]:
+        keep &= np.isfinite(table[name])
+
+    decoded = np.empty(int(keep.sum()), dtype=dtype)
+    decoded['date'] = dates[keep]
+    for name, _ in dtype[1:]:
+        decoded[name] = table[name][keep]
+    return decoded
+
+def parse_eod_csv(data: Union[bytes, str]) -> PriceSeries:
+    """
+    Parse an EODHD `fmt=csv` history into a PriceSeries
+
+    The date and price columns are decoded by NumPy in one pass, so the history
+    is never held as JSON objects, per-bar dicts or a list of lines. Lines that
+    don't parse (a blank tail, a trailing note) are skipped.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    first_line = data.split(b'\n', 1)[0].decode('utf-8', errors='replace')
+    if not first_line.strip():
+        return PriceSeries.empty()
+
+    header = [name.strip().lower() for name in first_line.split(',')]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"EOD CSV is missing columns {missing}: {first_line[:80]!r}")
+
+    names = list(REQUIRED_COLUMNS) + (['volume'] if 'volume' in header else [])
+    dtype = [('date', 'datetime64[D]')] + [(name, np.float64) for name in names[1:]]
+    table = _read_columns(data, tuple(header.index(name) for name in names), dtype)
+
+    if 'volume' in header:
+        volumes = np.nan_to_num(table['volume'], nan=0.0).astype(np.int64)
+    else:
+        volumes = np.zeros(len(table), dtype=np.int64)
+
+    return PriceSeries(
+        table['date'].astype(np.int64),
+        table['open'],
+        table['high'],
+        table['low'],
+        table['close'],
+        volumes
+    ).sorted_by_date()
@@ -3,59 +3,181 @@ EODHD API Client for SuperPerformanceScreener
 Handles all stock data API calls with retry logic, caching, and structured responses
 """
 import json
-import time
 import requests
-from typing import Dict, List, Optional, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import logging
 from retry import retry
 
+from price_series import PriceSeries, date_to_ordinal, ordinal_to_date
+from eod_decode import loads, parse_eod_csv
+from history_cache import HistoryCache
+from history_store import HistoryStore
+from symbol_master import SymbolMaster
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from rate_governor import RateGovernor, get_default_governor
 from config import (
     EODHD_API_KEY, 
     EODHD_BASE_URL,
-    REQUEST_DELAY,
     MAX_RETRIES,
-    RETRY_DELAY
+    RETRY_DELAY,
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def validate_api_key(api_key: str = None) -> str:
+    """Return the API key to use, raising ValueError if it is missing or malformed"""
+    api_key = api_key or EODHD_API_KEY
+    if not api_key or api_key == 'your_eodhd_api_key_here':
+        raise ValueError("EODHD API key is required")
+    
+    # Basic validation - EODHD API keys are typically alphanumeric and at least 10 chars
+    # and should not contain common placeholder text
+    if (len(api_key) < 10 or 
+        not api_key.replace('_', '').replace('-', '').replace('.', '').isalnum()):
+        raise ValueError("EODHD API key appears to be invalid (too short or contains invalid characters)")
+    
+    return api_key
+
+def average_volume(historical_data: Optional[PriceSeries]) -> Optional[int]:
+    """Average daily volume over the bars that reported any volume"""
+    if not historical_data:
+        return None
+    
+    volumes = historical_data.volume[historical_data.volume > 0]
+    
+    if not len(volumes):
+        return None
+    
+    avg_volume = volumes.sum() / len(volumes)
+    return int(avg_volume)
+
+def parse_exchange_tickers(result: List[Dict[str, Any]]) -> List[str]:
+    """Extract ticker codes from an exchange-symbol-list response"""
+    tickers = []
+    for item in result:
+        ticker = item.get('Code')
+        if ticker:
+            tickers.append(ticker)
+    return tickers
+
+def create_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """Create a keep-alive session with a sized connection pool and compressed transfer"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+    return session
+
+def request_key(endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple:
+    """Hashable identity of a request, ignoring the API token"""
+    return endpoint, tuple(sorted(
+        (key, str(value)) for key, value in (params or {}).items() if key != 'api_token'
+    ))
+
+def conditional_headers(cached: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Revalidation headers for an expired cached response (empty when there is none)"""
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def decode_body(params: Optional[Dict[str, Any]], body: bytes) -> Any:
+    """Decode a response body in the format the request asked for (fmt=csv histories become a PriceSeries)"""
+    if params and params.get('fmt') == 'csv':
+        return parse_eod_csv(body)
+    return loads(body)
+
+def group_bulk_rows(result: List[Dict[str, Any]]) -> Dict[str, PriceSeries]:
+    """Split an eod-bulk-last-day response into one PriceSeries per ticker code"""
+    rows_by_ticker: Dict[str, List[Dict[str, Any]]] = {}
+    for row in result:
+        ticker = row.get('code')
+        if ticker and row.get('date'):
+            rows_by_ticker.setdefault(ticker, []).append(row)
+    
+    return {
+        ticker: PriceSeries.from_records(rows).sorted_by_date()
+        for ticker, rows in rows_by_ticker.items()
+    }
+
 class EODHDClient:
     """Client for interacting with EODHD API"""
     
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or EODHD_API_KEY
-        if not self.api_key or self.api_key == 'your_eodhd_api_key_here':
-            raise ValueError("EODHD API key is required")
-        
-        # Basic validation - EODHD API keys are typically alphanumeric and at least 10 chars
-        # and should not contain common placeholder text
-        if (len(self.api_key) < 10 or 
-            not self.api_key.replace('_', '').replace('-', '').replace('.', '').isalnum()):
-            raise ValueError("EODHD API key appears to be invalid (too short or contains invalid characters)")
-        
+    def __init__(self, api_key: str = None, governor: RateGovernor = None,
+                 pool_size: int = HTTP_POOL_SIZE, history_store: HistoryStore = None,
+                 symbol_master: SymbolMaster = None, response_cache: ResponseCache = None):
+        self.api_key = validate_api_key(api_key)
+        self.governor = governor or get_default_governor()
+        self.session = create_session(pool_size)
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
         self.cache = {}
+        self.history_cache = HistoryCache(history_store)
+        self.symbol_master = symbol_master
+        self.response_cache = response_cache
+        self._in_flight = SingleFlight()
+    
+    def __enter__(self) -> 'EODHDClient':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self.session.close()
     
-    @retry(tries=MAX_RETRIES, delay=RETRY_DELAY, backoff=2)
     def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make API request; concurrent identical requests share one fetch"""
+        return self._in_flight.do(request_key(endpoint, params),
+                                  lambda: self._request_with_retry(endpoint, params))
+    
+    @retry(tries=MAX_RETRIES, delay=RETRY_DELAY, backoff=2)
+    def _request_with_retry(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make API request with retry logic"""
         try:
             url = f"{EODHD_BASE_URL}/{endpoint}"
             
+            # Fresh metadata responses from earlier runs need no request at all
+            cached = self.response_cache.get(endpoint, params) if self.response_cache else None
+            if cached and cached['fresh']:
+                return cached['body']
+            
             # Add API key to params
             if params is None:
                 params = {}
             params['api_token'] = self.api_key
             
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            # Rate limiting: wait for a token from the shared governor
+            self.governor.acquire()
+            response = self.session.get(url, params=params, timeout=self.timeout,
+                                        headers=conditional_headers(cached))
+            self.governor.observe(response.status_code, response.headers.get('Retry-After'))
             
-            # Rate limiting
-            time.sleep(REQUEST_DELAY)
+            if response.status_code == 304 and cached:
+                self.response_cache.renew(endpoint, params)
+                return cached['body']
+            response.raise_for_status()
             
-            return response.json()
+            result = decode_body(params, response.content)
+            if self.response_cache:
+                self.response_cache.put(endpoint, params, result,
+                                        response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return result
         except requests.exceptions.RequestException as e:
             logger.error(f"EODHD API request failed: {e}")
             raise
@@ -65,7 +187,13 @@ class EODHDClient:
         return f"{endpoint}:{hash(str(params))}"
     
     def get_stock_exchange(self, ticker: str) -> Optional[str]:
-        """Get the exchange for a stock ticker"""
+        """Get the exchange for a stock ticker (None when the symbol master doesn't list it)"""
+        # The local symbol master answers without any API call; a ticker it
+        # doesn't list is not traded, so there is nothing more to ask the API
+        if self.symbol_master is not None and self.symbol_master.ensure(self):
+            return self.symbol_master.exchange_of(ticker)
+        
+        # Without a symbol master, fall back to the built-in list and the API
         # For now, assume major stocks are on NYSE/NASDAQ to avoid API endpoint issues
         # This is a temporary workaround while we fix the API endpoints
         major_stocks = {
@@ -116,48 +244,36 @@ class EODHDClient:
             
             historical_data = self.get_historical_data(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
             
-            if not historical_data:
-                return None
-            
             # Calculate average volume from recent data
-            volumes = [day.get('volume', 0) for day in historical_data if day.get('volume')]
-            
-            if not volumes:
-                return None
-            
-            avg_volume = sum(volumes) / len(volumes)
-            return int(avg_volume)
+            return average_volume(historical_data)
             
         except Exception as e:
             logger.error(f"Error getting volume for {ticker}: {e}")
             return None
     
-    def get_exchange_stocks(self, exchange: str) -> List[str]:
-        """Get all stocks for a specific exchange (NYSE or NASDAQ)"""
+    def get_exchange_symbols(self, exchange: str) -> List[Dict[str, Any]]:
+        """Get the full symbol list (Code, Name, Exchange, Type, ...) for an exchange"""
         try:
-            # Use the exchange symbols endpoint
-            endpoint = f"exchange-symbol-list/{exchange}"
-            result = self._make_request(endpoint)
-            
-            if not result:
-                logger.warning(f"No results for {exchange} exchange")
-                return []
-            
-            # Extract ticker symbols
-            tickers = []
-            for item in result:
-                ticker = item.get('Code')
-                if ticker:
-                    tickers.append(ticker)
-            
-            logger.info(f"Found {len(tickers)} stocks for {exchange}")
-            return tickers
-            
+            result = self._make_request(f"exchange-symbol-list/{exchange}")
+            return result if isinstance(result, list) else []
         except Exception as e:
-            logger.error(f"Error getting {exchange} stocks: {e}")
-            # Fallback: return empty list instead of failing
+            logger.error(f"Error getting {exchange} symbol list: {e}")
             return []
     
+    def get_exchange_stocks(self, exchange: str) -> List[str]:
+        """Get all stocks for a specific exchange (NYSE or NASDAQ)"""
+        result = self.get_exchange_symbols(exchange)
+        
+        if not result:
+            logger.warning(f"No results for {exchange} exchange")
+            return []
+        
+        # Extract ticker symbols
+        tickers = parse_exchange_tickers(result)
+        
+        logger.info(f"Found {len(tickers)} stocks for {exchange}")
+        return tickers
+    
     def get_high_volume_stocks(self) -> List[str]:
         """Get a list of high volume stocks (fallback method)"""
         # This is a fallback method that returns major stocks
@@ -170,42 +286,56 @@ class EODHDClient:
         ]
         return major_stocks
     
-    def get_historical_data(self, ticker: str, start_date: str, end_date: str) -> Optional[List[Dict]]:
-        """Get historical OHLC data for a stock ticker"""
-        cache_key = self._get_cache_key("historical", f"{ticker}:{start_date}:{end_date}")
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+    def _fetch_history(self, ticker: str, start_day: int, end_day: int) -> PriceSeries:
+        """Download the bars for [start_day, end_day] (day ordinals) from the API"""
+        result = self._make_request(
+            f"eod/{ticker}.US",
+            {
+                "from": ordinal_to_date(start_day),
+                "to": ordinal_to_date(end_day),
+                "fmt": "csv"
+            }
+        )
         
+        # CSV rows are parsed straight into columns, no JSON objects or per-bar dicts
+        return result if result is not None else PriceSeries.empty()
+    
+    def get_historical_data(self, ticker: str, start_date: str, end_date: str) -> Optional[PriceSeries]:
+        """Get historical OHLC data for a stock ticker as a columnar PriceSeries"""
         try:
-            result = self._make_request(
-                f"eod/{ticker}.US",
-                {
-                    "from": start_date,
-                    "to": end_date,
-                    "fmt": "json"
-                }
-            )
+            start_day, end_day = date_to_ordinal(start_date), date_to_ordinal(end_date)
             
-            if result and len(result) > 0:
-                # Transform EODHD format to our expected format
-                historical_data = []
-                for day in result:
-                    historical_data.append({
-                        'date': day.get('date', ''),
-                        'open': float(day.get('open', 0)),
-                        'high': float(day.get('high', 0)),
-                        'low': float(day.get('low', 0)),
-                        'close': float(day.get('close', 0)),
-                        'volume': int(day.get('volume', 0))
-                    })
-                
-                self.cache[cache_key] = historical_data
+            # Only the parts of the range not already cached are downloaded
+            for gap_start, gap_end in self.history_cache.missing(ticker, start_day, end_day):
+                bars = self._fetch_history(ticker, gap_start, gap_end)
+                self.history_cache.store(ticker, gap_start, gap_end, bars)
+            
+            historical_data = self.history_cache.get(ticker, start_day, end_day)
+            if historical_data is not None and len(historical_data) > 0:
                 return historical_data
         except Exception as e:
             logger.error(f"Error getting historical data for {ticker}: {e}")
         
         return None
     
+    def get_bulk_last_day(self, exchange: str = 'US', date: str = None) -> Optional[Dict[str, PriceSeries]]:
+        """
+        Get one trading day's bar for every symbol on an exchange (latest day unless `date` is given)
+        
+        An empty dict means the request succeeded but the market was closed that
+        day; None means the request failed.
+        """
+        params = {"fmt": "json"}
+        if date:
+            params["date"] = date
+        
+        try:
+            result = self._make_request(f"eod-bulk-last-day/{exchange}", params)
+            return group_bulk_rows(result or [])
+        except Exception as e:
+            logger.error(f"Error getting bulk EOD data for {exchange}: {e}")
+            return None
+    
     def get_stock_fundamentals(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Get fundamental data for a stock"""
         cache_key = self._get_cache_key("fundamentals", ticker)
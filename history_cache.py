@@ -0,0 +1,117 @@
+"""
+Range-aware history cache for SuperPerformanceScreener
+Keeps one contiguous span of daily bars per ticker and serves any contained
+date range by slicing it
+"""
+from typing import Dict, List, Optional, Tuple
+
+from price_series import PriceSeries
+from history_store import HistoryStore
+
+class HistoryCache:
+    """
+    Per-ticker cache of downloaded price history
+
+    For each ticker it remembers the day-ordinal span [lo, hi] that has been
+    requested from the API (weekends and holidays included, so a span with no
+    bars is still known to be covered) and the bars inside it. A request inside
+    the span is a slice; a request reaching past it only needs the missing edges,
+    which `missing()` reports and `store()` merges in.
+    
+    With a HistoryStore attached, a ticker's span is first loaded from disk (up
+    to its last stored bar, so the next request only fetches newer bars) and
+    every fetched edge is written back: appended when it extends the history
+    forward, or rewritten when it reaches further into the past.
+    """
+    
+    def __init__(self, history_store: Optional[HistoryStore] = None):
+        self.history_store = history_store
+        self._spans: Dict[str, Tuple[int, int, PriceSeries]] = {}
+    
+    def __contains__(self, ticker: str) -> bool:
+        return self._load(ticker)
+    
+    def __len__(self) -> int:
+        return len(self._spans)
+    
+    def _load(self, ticker: str) -> bool:
+        """Make sure a ticker's span is in memory, reading it from disk if needed"""
+        if ticker in self._spans:
+            return True
+        if self.history_store is None:
+            return False
+        
+        span = self.history_store.span(ticker)
+        if span is None:
+            return False
+        self._spans[ticker] = (span[0], span[1], self.history_store.load(ticker))
+        return True
+    
+    def coverage(self, ticker: str) -> Optional[Tuple[int, int]]:
+        """The [lo, hi] day-ordinal span held for a ticker (None if nothing is cached)"""
+        if not self._load(ticker):
+            return None
+        lo, hi, _ = self._spans[ticker]
+        return lo, hi
+    
+    def missing(self, ticker: str, start_day: int, end_day: int) -> List[Tuple[int, int]]:
+        """
+        Day-ordinal ranges that must be fetched before [start_day, end_day] can be served
+        
+        Edges are widened to touch the cached span so the span stays contiguous.
+        """
+        if not self._load(ticker):
+            return [(start_day, end_day)]
+        
+        lo, hi, _ = self._spans[ticker]
+        gaps = []
+        if start_day < lo:
+            gaps.append((start_day, lo - 1))
+        if end_day > hi:
+            gaps.append((hi + 1, end_day))
+        return gaps
+    
+    def store(self, ticker: str, start_day: int, end_day: int, bars: PriceSeries):
+        """Record that [start_day, end_day] was fetched and returned `bars`"""
+        merged = False
+        if self._load(ticker):
+            lo, hi, cached = self._spans[ticker]
+            # Merge when the ranges overlap or touch; otherwise the new range replaces the old
+            if start_day <= hi + 1 and end_day >= lo - 1:
+                self._spans[ticker] = (min(lo, start_day), max(hi, end_day), PriceSeries.concat([cached, bars]))
+                merged = True
+        
+        if not merged:
+            self._spans[ticker] = (start_day, end_day, bars)
+        
+        if self.history_store is not None:
+            self._persist(ticker, start_day, bars, merged)
+    
+    def _persist(self, ticker: str, start_day: int, bars: PriceSeries, merged: bool):
+        """Write a fetched edge through to the on-disk store"""
+        lo, _, cached = self._spans[ticker]
+        stored = self.history_store.span(ticker)
+        
+        # Newer bars on the end of the stored history are appended; anything else rewrites it
+        if merged and stored is not None and stored[0] <= start_day:
+            self.history_store.append(ticker, bars)
+        elif len(cached):
+            self.history_store.write(ticker, cached, lo)
+    
+    def get(self, ticker: str, start_day: int, end_day: int) -> Optional[PriceSeries]:
+        """Bars within [start_day, end_day], or None unless the whole range is covered"""
+        if not self._load(ticker):
+            return None
+        
+        lo, hi, cached = self._spans[ticker]
+        if start_day < lo or end_day > hi:
+            return None
+        return cached.between(start_day, end_day)
+    
+    def discard(self, ticker: str):
+        """Forget a ticker so its next lookup reloads it (e.g. after the store changed underneath)"""
+        self._spans.pop(ticker, None)
+    
+    def clear(self):
+        """Drop every cached ticker"""
+        self._spans.clear()
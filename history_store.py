@@ -0,0 +1,144 @@
+"""
+On-disk price history store for SuperPerformanceScreener
+Keeps each ticker's daily bars as fixed-width binary column files that are read
+back through memory mapping, so a refresh only has to download the newest bars
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from price_series import PriceSeries
+from config import HISTORY_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+# One file per PriceSeries column: <root>/<TICKER>/<column>.bin
+COLUMN_DTYPES = {
+    'dates': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64
+}
+META_FILE = 'meta.json'
+
+class HistoryStore:
+    """
+    Per-ticker column files plus a small meta.json
+
+    meta.json holds the row count, the first requested day and the day the history
+    is known to be complete through (normally the last bar). It is rewritten
+    (atomically) only after the column files are complete, so it is the commit
+    point: readers map exactly `rows` rows and never see a half-written append.
+    There is a single writer (the process that fetches); any number of processes
+    may map the files read-only at the same time.
+    """
+
+    def __init__(self, root: str = HISTORY_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.replace(os.sep, '_'))
+
+    def _column_path(self, ticker: str, column: str) -> str:
+        return os.path.join(self._ticker_dir(ticker), f"{column}.bin")
+
+    def read_meta(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """The stored meta for a ticker (None if nothing is stored)"""
+        try:
+            with open(os.path.join(self._ticker_dir(ticker), META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, ticker: str, meta: Dict[str, Any]):
+        path = os.path.join(self._ticker_dir(ticker), META_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def tickers(self) -> List[str]:
+        """Every ticker with stored history"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, META_FILE))
+        )
+
+    def span(self, ticker: str) -> Optional[Tuple[int, int]]:
+        """[first requested day, day the history is complete through] as day ordinals (None if no bars)"""
+        meta = self.read_meta(ticker)
+        if not meta or not meta.get('rows'):
+            return None
+        return meta['start_day'], meta['last_day']
+
+    def load(self, ticker: str) -> Optional[PriceSeries]:
+        """Map a ticker's stored bars read-only, without copying (None if nothing is stored)"""
+        meta = self.read_meta(ticker)
+        if not meta or not meta.get('rows'):
+            return None
+
+        rows = meta['rows']
+        columns = [
+            np.memmap(self._column_path(ticker, column), dtype=dtype, mode='r', shape=(rows,))
+            for column, dtype in COLUMN_DTYPES.items()
+        ]
+        return PriceSeries(*columns)
+
+    def write(self, ticker: str, series: PriceSeries, start_day: int):
+        """Replace a ticker's stored history with `series`, requested from `start_day`"""
+        os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+
+        # New files are swapped in whole, so existing maps keep seeing the old data
+        for column, dtype in COLUMN_DTYPES.items():
+            path = self._column_path(ticker, column)
+            tmp_path = f"{path}.tmp"
+            np.ascontiguousarray(getattr(series, column), dtype=dtype).tofile(tmp_path)
+            os.replace(tmp_path, path)
+
+        self._write_meta(ticker, {
+            'rows': len(series),
+            'start_day': int(start_day),
+            'last_day': int(series.dates[-1]) if len(series) else int(start_day) - 1
+        })
+
+    def append(self, ticker: str, bars: PriceSeries, through_day: Optional[int] = None) -> int:
+        """
+        Append the bars dated after the last stored day; returns how many were added
+
+        `through_day` marks the history complete through that day even when it
+        has no bar there (e.g. a bulk refresh in which the ticker did not trade).
+        The ticker must already have been written once.
+        """
+        meta = self.read_meta(ticker)
+        if meta is None:
+            raise KeyError(f"No stored history for {ticker}")
+
+        new_bars = bars.take(bars.dates > meta['last_day'])
+        if not len(new_bars):
+            if through_day is not None and through_day > meta['last_day']:
+                meta['last_day'] = int(through_day)
+                self._write_meta(ticker, meta)
+            return 0
+
+        rows = meta['rows']
+        for column, dtype in COLUMN_DTYPES.items():
+            with open(self._column_path(ticker, column), 'r+b') as f:
+                # Drop any tail left by an interrupted append before adding rows
+                f.truncate(rows * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+                np.ascontiguousarray(getattr(new_bars, column), dtype=dtype).tofile(f)
+
+        meta['rows'] = rows + len(new_bars)
+        meta['last_day'] = int(new_bars.dates[-1])
+        if through_day is not None:
+            meta['last_day'] = max(meta['last_day'], int(through_day))
+        self._write_meta(ticker, meta)
+        return len(new_bars)
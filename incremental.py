@@ -0,0 +1,173 @@
+"""
+Incremental move analysis for SuperPerformanceScreener
+Saves each ticker's closed moves and the point where its open moves begin, so a
+rerun on a longer history only reanalyzes the recent tail
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from price_series import PriceSeries
+from config import (
+    MIN_GROWTH_PERCENTAGE,
+    MAX_DRAWDOWN_PERCENTAGE,
+    MIN_DRAWDOWN_PERCENTAGE,
+    GROWTH_MOVE_DAYS,
+    MAX_DAYS_WITHOUT_HIGH,
+    MAX_TOTAL_DAYS,
+    CONTINUATION_WINDOW_DAYS,
+    GROWTH_THRESHOLDS,
+    MOVE_STATE_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the saved state layout or the move rules change
+STATE_VERSION = 1
+
+def analysis_fingerprint() -> str:
+    """Hash of the settings that decide moves; state saved under other settings is not reused"""
+    settings = [
+        STATE_VERSION, MIN_GROWTH_PERCENTAGE, MAX_DRAWDOWN_PERCENTAGE, MIN_DRAWDOWN_PERCENTAGE,
+        GROWTH_MOVE_DAYS, MAX_DAYS_WITHOUT_HIGH, MAX_TOTAL_DAYS, CONTINUATION_WINDOW_DAYS,
+        sorted(GROWTH_THRESHOLDS.items())
+    ]
+    return hashlib.sha1(json.dumps(settings).encode()).hexdigest()[:16]
+
+def state_applies(state: Optional[Dict[str, Any]], series: PriceSeries) -> bool:
+    """True when `state` was saved for a prefix of `series` under the current settings"""
+    if not state or state.get('fingerprint') != analysis_fingerprint():
+        return False
+    rows, restart = state['rows'], state['restart_index']
+    return (
+        len(series) >= rows
+        and int(series.dates[0]) == state['first_day']
+        and int(series.dates[rows - 1]) == state['last_day']
+        and restart < rows
+        and int(series.dates[restart]) == state['restart_day']
+    )
+
+def analyze_tail(analyzer, ticker: str, series: PriceSeries,
+                 state: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict], Dict[str, Any]]:
+    """
+    Valid moves of `series`, reanalyzing only what changed since `state`
+
+    Gives the same moves as filter_valid_moves(analyze_stock(ticker, series)).
+    A move that has hit a termination rule depends only on bars that are already
+    known, so it never changes again. Neither does the list of LOD candidates
+    with a full look-ahead window, nor the 5-bar de-duplication among the
+    candidates before the first move that is still open. The saved state
+    therefore holds the valid closed moves from before that point, plus the bar
+    analysis restarts from: the first open move's LOD, or the first bar whose
+    candidacy still waits on future bars. Only candidates from that bar onward
+    are swept again. Their moves are all younger than MAX_TOTAL_DAYS, so the
+    work is bounded by the tail rather than by the whole history.
+
+    Returns:
+        (valid moves, state to save for the next run)
+    """
+    series = series.sorted_by_date()
+    n = len(series)
+    window = GROWTH_MOVE_DAYS
+
+    restart, last_accepted, closed_moves = 0, None, []
+    if state_applies(state, series):
+        restart = state['restart_index']
+        last_accepted = state['last_accepted_index']
+        closed_moves = state['closed_moves']
+
+    tail = series.take(slice(restart, None))
+    tail_starts = [candidate['index'] for candidate in analyzer.find_lowest_of_day_candidates(tail, window)]
+    tail_moves, terminated = analyzer.move_engine.sweep(tail, tail_starts)
+
+    valid_moves = [dict(move) for move in closed_moves]
+    new_closed = list(closed_moves)
+    # Bars without a full look-ahead window may still become candidates
+    next_restart = max(0, n - window)
+    next_last_accepted = None
+    settled = True
+
+    for tail_start, move, done in zip(tail_starts, tail_moves, terminated):
+        start_index = restart + tail_start
+        if settled and not done:
+            # Everything from the first open move on is redone next time
+            settled = False
+            next_restart = start_index
+            next_last_accepted = last_accepted
+
+        # Same de-duplication as analyze_stock
+        if last_accepted is not None and start_index - last_accepted < 5:
+            continue
+        if not move:
+            continue
+
+        last_accepted = start_index
+        if analyzer.filter_valid_moves([move]):
+            analyzer.format_move(ticker, move)
+            valid_moves.append(move)
+            if settled:
+                new_closed.append(dict(move))
+
+    if settled:
+        next_last_accepted = last_accepted
+
+    new_state = {
+        'fingerprint': analysis_fingerprint(),
+        'rows': n,
+        'first_day': int(series.dates[0]) if n else 0,
+        'last_day': int(series.dates[-1]) if n else 0,
+        'restart_index': next_restart,
+        'restart_day': int(series.dates[next_restart]) if n else 0,
+        'last_accepted_index': next_last_accepted,
+        'closed_moves': new_closed
+    }
+    logger.debug(f"{ticker}: reanalyzed {n - restart} of {n} bars, {len(new_closed)} closed valid moves saved")
+    return valid_moves, new_state
+
+class MoveStateStore:
+    """One JSON file of saved move state per ticker"""
+
+    def __init__(self, root: str = MOVE_STATE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.replace(os.sep, '_')}.json")
+
+    def load(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """The saved state for a ticker (None if there is none)"""
+        try:
+            with open(self._path(ticker)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, ticker: str, state: Dict[str, Any]):
+        """Replace a ticker's saved state atomically"""
+        path = self._path(ticker)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+def analyze_incremental(analyzer, ticker: str, series: PriceSeries, states: MoveStateStore) -> List[Dict]:
+    """
+    Valid moves of a ticker, reusing and updating its saved state
+
+    Without usable state, a ticker that the can_superperform pre-filter rejects
+    is skipped the same way a full analysis would skip it. No state is saved for
+    it, so it is checked the same way next time.
+    """
+    state = states.load(ticker)
+    if not state_applies(state, series):
+        state = None
+        if not analyzer.can_superperform(series):
+            return []
+
+    valid_moves, new_state = analyze_tail(analyzer, ticker, series, state)
+    states.save(ticker, new_state)
+    return valid_moves
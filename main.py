@@ -3,16 +3,19 @@ SuperPerformanceScreener - Main Application
 Orchestrates the complete workflow for detecting growth moves and superperformance
 """
 import sys
-import time
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import argparse
 
 from eodhd_client import EODHDClient
+from history_store import HistoryStore
+from symbol_master import SymbolMaster
+from response_cache import ResponseCache
 from stock_analyzer import StockAnalyzer
+from consolidation import consolidate_moves
 from google_sheets_client import GoogleSheetsClient
-from config import LOOKBACK_YEARS, MIN_DAILY_VOLUME
+from config import LOOKBACK_YEARS, MIN_DAILY_VOLUME, VOLUME_WINDOWS, HISTORY_STORE_DIR, MERGE_OVERLAPPING_MOVES
 
 # Configure logging
 logging.basicConfig(
@@ -25,22 +28,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class SuperPerformanceScreener:
+class ResultExporter:
+    """Consolidates screening results and writes them to Google Sheets, or the console without it"""
+    
+    def __init__(self, google_credentials_file: str = None, spreadsheet_id: str = None):
+        """Initialize the Google Sheets client (optional, so results still reach the console)"""
+        try:
+            self.sheets_client = GoogleSheetsClient(google_credentials_file, spreadsheet_id)
+            logger.info("Google Sheets client initialized successfully")
+        except Exception as e:
+            logger.warning(f"Google Sheets client failed to initialize: {e}")
+            self.sheets_client = None
+    
+    def consolidate_overlapping_moves(self, results: List[Dict[str, Any]],
+                                      merge_overlaps: bool = MERGE_OVERLAPPING_MOVES) -> List[Dict[str, Any]]:
+        """Consolidate overlapping moves into unique moves, ordered by ticker and start date"""
+        if not results:
+            return results
+        
+        consolidated_list = list(consolidate_moves(results, merge_overlaps))
+        
+        logger.info(f"Consolidated {len(results)} moves to {len(consolidated_list)} unique moves")
+        return consolidated_list
+
+    def output_results(self, results: List[Dict[str, Any]], merge_overlaps: bool = MERGE_OVERLAPPING_MOVES):
+        """Output results to Google Sheets or console, consolidated as `merge_overlaps` selects"""
+        if not results:
+            logger.warning("No results to output")
+            return
+        
+        # Consolidate overlapping moves before output
+        consolidated_results = self.consolidate_overlapping_moves(results, merge_overlaps)
+        
+        if self.sheets_client:
+            try:
+                logger.info(f"Outputting {len(consolidated_results)} consolidated results to Google Sheets...")
+                self.sheets_client.write_results(consolidated_results)
+                
+                spreadsheet_url = self.sheets_client.get_spreadsheet_url()
+                logger.info(f"Results written to: {spreadsheet_url}")
+                
+            except Exception as e:
+                logger.error(f"Error outputting results to Google Sheets: {e}")
+                logger.info("Falling back to console output...")
+                self._output_to_console(consolidated_results)
+        else:
+            logger.info("Google Sheets not available, outputting to console...")
+            self._output_to_console(consolidated_results)
+    
+    def _output_to_console(self, results: List[Dict[str, Any]]):
+        """Output results to console"""
+        print(f"\n{'='*80}")
+        print(f"SUPERPERFORMANCE SCREENER RESULTS - {len(results)} UNIQUE MOVES FOUND")
+        print(f"{'='*80}")
+        
+        for i, move in enumerate(results, 1):
+            print(f"\n{i}. {move['ticker']} - {move['superperformance']}")
+            print(f"   Period: {move['start_date_formatted']} to {move['end_date_formatted']}")
+            if move.get('drawdowns_formatted'):
+                print(f"   Drawdowns: {', '.join(move['drawdowns_formatted'])}")
+            print(f"   Continuation: {move.get('continuation_formatted', 'N/A')}")
+        
+        print(f"\n{'='*80}")
+
+class SuperPerformanceScreener(ResultExporter):
     """Main application class for SuperPerformanceScreener"""
     
-    def __init__(self, eodhd_api_key: str = None, google_credentials_file: str = None, spreadsheet_id: str = None):
-        """Initialize the screener with API clients"""
+    def __init__(self, eodhd_api_key: str = None, google_credentials_file: str = None, spreadsheet_id: str = None,
+                 history_store_dir: str = None):
+        """Initialize the screener with API clients (histories persist under history_store_dir when given)"""
         try:
-            self.eodhd_client = EODHDClient(eodhd_api_key)
+            history_store = HistoryStore(history_store_dir) if history_store_dir else None
+            self.symbol_master = SymbolMaster()
+            self.eodhd_client = EODHDClient(
+                eodhd_api_key,
+                history_store=history_store,
+                symbol_master=self.symbol_master,
+                response_cache=ResponseCache()
+            )
             self.analyzer = StockAnalyzer()
             
             # Make Google Sheets optional
-            try:
-                self.sheets_client = GoogleSheetsClient(google_credentials_file, spreadsheet_id)
-                logger.info("Google Sheets client initialized successfully")
-            except Exception as e:
-                logger.warning(f"Google Sheets client failed to initialize: {e}")
-                self.sheets_client = None
+            super().__init__(google_credentials_file, spreadsheet_id)
                 
             logger.info("SuperPerformanceScreener initialized successfully")
         except Exception as e:
@@ -80,17 +149,17 @@ class SuperPerformanceScreener:
                     logger.info(f"Skipping {ticker} - not on NYSE/NASDAQ")
                     continue
                 
-                # Check volume
-                volume = self.eodhd_client.get_stock_volume(ticker)
-                if volume is None or volume < MIN_DAILY_VOLUME:
+                # Check volume on the history analyze_stock will use (cached, so fetched once)
+                start_date, end_date = self.get_analysis_date_range()
+                historical_data = self.eodhd_client.get_historical_data(ticker, start_date, end_date)
+                averages = self.analyzer.average_volumes(historical_data) if historical_data else {}
+                volume = averages.get(VOLUME_WINDOWS[0])
+                if not self.analyzer.meets_volume_requirement(averages):
                     logger.info(f"Skipping {ticker} - volume {volume} < {MIN_DAILY_VOLUME}")
                     continue
                 
                 valid_stocks.append(ticker)
                 logger.info(f"Added {ticker} ({exchange}, {volume:,.0f} volume)")
-                
-                # Rate limiting
-                time.sleep(1)
             
             logger.info(f"Found {len(valid_stocks)} valid stocks out of {len(stocks)} candidates")
             return valid_stocks
@@ -158,85 +227,10 @@ class SuperPerformanceScreener:
             
             moves = self.analyze_stock(ticker)
             all_results.extend(moves)
-            
-            # Rate limiting
-            time.sleep(2)
         
         logger.info(f"Screening complete. Found {len(all_results)} total moves across {len(stocks)} stocks")
         return all_results
     
-    def consolidate_overlapping_moves(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Consolidate overlapping moves that have the same end date into unique moves"""
-        if not results:
-            return results
-        
-        # Group moves by ticker and end date
-        consolidated = {}
-        
-        for move in results:
-            ticker = move['ticker']
-            end_date = move['end_date_formatted']
-            key = (ticker, end_date)
-            
-            if key not in consolidated:
-                consolidated[key] = move
-            else:
-                # If we already have a move with this end date, keep the one with earliest start date
-                existing_move = consolidated[key]
-                existing_start = existing_move.get('start_date_formatted', '')
-                current_start = move.get('start_date_formatted', '')
-                
-                # Compare dates and keep the earlier start date
-                if current_start < existing_start:
-                    consolidated[key] = move
-        
-        # Convert back to list and sort by ticker and start date
-        consolidated_list = list(consolidated.values())
-        consolidated_list.sort(key=lambda x: (x['ticker'], x.get('start_date_formatted', '')))
-        
-        logger.info(f"Consolidated {len(results)} moves to {len(consolidated_list)} unique moves")
-        return consolidated_list
-
-    def output_results(self, results: List[Dict[str, Any]]):
-        """Output results to Google Sheets or console"""
-        if not results:
-            logger.warning("No results to output")
-            return
-        
-        # Consolidate overlapping moves before output
-        consolidated_results = self.consolidate_overlapping_moves(results)
-        
-        if self.sheets_client:
-            try:
-                logger.info(f"Outputting {len(consolidated_results)} consolidated results to Google Sheets...")
-                self.sheets_client.write_results(consolidated_results)
-                
-                spreadsheet_url = self.sheets_client.get_spreadsheet_url()
-                logger.info(f"Results written to: {spreadsheet_url}")
-                
-            except Exception as e:
-                logger.error(f"Error outputting results to Google Sheets: {e}")
-                logger.info("Falling back to console output...")
-                self._output_to_console(consolidated_results)
-        else:
-            logger.info("Google Sheets not available, outputting to console...")
-            self._output_to_console(consolidated_results)
-    
-    def _output_to_console(self, results: List[Dict[str, Any]]):
-        """Output results to console"""
-        print(f"\n{'='*80}")
-        print(f"SUPERPERFORMANCE SCREENER RESULTS - {len(results)} UNIQUE MOVES FOUND")
-        print(f"{'='*80}")
-        
-        for i, move in enumerate(results, 1):
-            print(f"\n{i}. {move['ticker']} - {move['superperformance']}")
-            print(f"   Period: {move['start_date_formatted']} to {move['end_date_formatted']}")
-            if move.get('drawdowns_formatted'):
-                print(f"   Drawdowns: {', '.join(move['drawdowns_formatted'])}")
-            print(f"   Continuation: {move.get('continuation_formatted', 'N/A')}")
-        
-        print(f"\n{'='*80}")
-    
     def run(self, max_stocks: int = 50, test_mode: bool = False):
         """Run the complete SuperPerformanceScreener workflow"""
         try:
@@ -262,6 +256,8 @@ def main():
     parser.add_argument('--eodhd-key', help='EODHD API key (overrides .env)')
     parser.add_argument('--google-credentials', help='Google credentials file (overrides .env)')
     parser.add_argument('--spreadsheet-id', help='Google Sheets ID (overrides .env)')
+    parser.add_argument('--store-dir', default=HISTORY_STORE_DIR, help='Directory for the local price history store')
+    parser.add_argument('--no-store', action='store_true', help='Always download full histories instead of using the local store')
     
     args = parser.parse_args()
     
@@ -270,7 +266,8 @@ def main():
         screener = SuperPerformanceScreener(
             eodhd_api_key=args.eodhd_key,
             google_credentials_file=args.google_credentials,
-            spreadsheet_id=args.spreadsheet_id
+            spreadsheet_id=args.spreadsheet_id,
+            history_store_dir=None if args.no_store else args.store_dir
         )
         
         # Run screening
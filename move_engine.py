@@ -0,0 +1,433 @@
+"""
+Multi-candidate move engine for SuperPerformanceScreener
+Tracks every LOD candidate of a ticker in one forward pass over its history
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from config import (
+    MAX_DRAWDOWN_PERCENTAGE,
+    MIN_DRAWDOWN_PERCENTAGE,
+    MAX_DAYS_WITHOUT_HIGH,
+    MAX_TOTAL_DAYS,
+    CONTINUATION_WINDOW_DAYS
+)
+from price_series import PriceSeries, ordinal_to_date
+from range_index import PriceRangeIndex
+
+logger = logging.getLogger(__name__)
+
+
+class MoveTracker:
+    """
+    One open move, advanced bar by bar with the detect_growth_move rules
+
+    Holds only the running state (peak, days without a new high, drawdown
+    episodes, continuation), so its cost per bar doesn't depend on how long
+    the move has been running. The bar-by-bar path of detect_growth_move and
+    the online detector both step their moves with it.
+    """
+
+    __slots__ = ('start_index', 'start_day', 'lod', 'peak', 'peak_day', 'days_without_high',
+                 'drawdowns', 'continuation', 'new_lod', 'status', 'qualified')
+
+    def __init__(self, start_index: int, start_day: int, lod: float):
+        self.start_index = start_index
+        self.start_day = start_day
+        self.lod = lod
+        self.peak = lod
+        self.peak_day = start_day
+        self.days_without_high = 0
+        self.drawdowns: List[List[float]] = []  # [day, close] per recorded drawdown
+        self.continuation = False
+        self.new_lod = None
+        self.status = 'None'
+        self.qualified = False
+
+    def update(self, analyzer, day: int, high: float, low: float, close: float) -> Optional[str]:
+        """Apply one bar; returns the termination reason when the move ends on it"""
+        if day - self.start_day > MAX_TOTAL_DAYS:
+            return "Max total days exceeded"
+
+        if high > self.peak:
+            self.peak = high
+            self.peak_day = day
+            self.days_without_high = 0
+        else:
+            self.days_without_high += 1
+
+        drawdown = analyzer.calculate_percentage_change(self.peak, close)
+
+        if low < self.lod:
+            return "Price dropped below LOD"
+
+        if MIN_DRAWDOWN_PERCENTAGE <= drawdown < MAX_DRAWDOWN_PERCENTAGE:
+            if not self.drawdowns or day - self.drawdowns[-1][0] > 1:
+                self.drawdowns.append([day, close])
+
+        if self.drawdowns and not self.continuation:
+            days_since_peak = day - self.peak_day
+            if days_since_peak <= CONTINUATION_WINDOW_DAYS and high > self.peak:
+                self.continuation = True
+                self.new_lod = min(price for _, price in self.drawdowns)
+            elif days_since_peak <= CONTINUATION_WINDOW_DAYS and drawdown < MIN_DRAWDOWN_PERCENTAGE:
+                last_day, last_price = self.drawdowns[-1]
+                if day - last_day <= 30 and close > last_price:
+                    self.continuation = True
+
+        if drawdown >= MAX_DRAWDOWN_PERCENTAGE:
+            if not self.drawdowns or self.drawdowns[-1][0] != day:
+                self.drawdowns.append([day, close])
+            if self.days_without_high >= MAX_DAYS_WITHOUT_HIGH:
+                return f"30+ days without new high after {drawdown:.1f}% drawdown"
+
+        if self.days_without_high >= MAX_DAYS_WITHOUT_HIGH and drawdown < MIN_DRAWDOWN_PERCENTAGE:
+            return f"30+ days without new high (drawdown: {drawdown:.1f}%)"
+
+        return None
+
+    def to_move(self, analyzer, ticker: str, termination_reason: Optional[str] = None) -> Dict:
+        """The move dict analyze_stock would report for this state"""
+        growth_percentage = analyzer.calculate_percentage_change(self.lod, self.peak)
+        duration_days = int(self.peak_day - self.start_day)
+        move = {
+            'start_date': ordinal_to_date(self.start_day),
+            'end_date': ordinal_to_date(self.peak_day),
+            'start_price': self.lod,
+            'peak_price': self.peak,
+            'growth_percentage': growth_percentage,
+            'duration_days': duration_days,
+            'drawdowns': [ordinal_to_date(day) for day, _ in self.drawdowns],
+            'continuation': self.continuation,
+            'superperformance': analyzer.classify_superperformance(growth_percentage, duration_days),
+            'new_lod_after_drawdown': self.new_lod,
+            'termination_reason': termination_reason
+        }
+        return analyzer.format_move(ticker, move)
+
+    def to_state(self) -> List[Any]:
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_state(cls, values: List[Any]) -> 'MoveTracker':
+        tracker = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(tracker, name, value)
+        return tracker
+
+
+class MoveEngine:
+    """
+    Runs the detect_growth_move state machine for many candidates at once
+
+    Instead of rescanning up to MAX_TOTAL_DAYS of bars for each candidate, the
+    engine walks the series once. Per-candidate state (peak, days without a new
+    high, drawdown bookkeeping, continuation) lives in arrays indexed by
+    candidate, every open candidate is updated with vectorized operations on
+    each bar, and candidates are retired as soon as they terminate. Results are
+    identical to calling StockAnalyzer.detect_growth_move per candidate.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    def sweep(
+        self,
+        series: PriceSeries,
+        start_indices,
+        range_index: Optional[PriceRangeIndex] = None
+    ) -> Tuple[List[Optional[Dict]], np.ndarray]:
+        """
+        Track moves for every start index in a single pass over `series`
+
+        Candidates whose bars cannot trigger the drawdown rules are resolved
+        directly from the range index; only the rest are stepped bar by bar.
+
+        Args:
+            series: Date-ordered price history
+            start_indices: LOD candidate bar indices
+            range_index: Range index of `series` (built here when not given)
+
+        Returns:
+            (moves, terminated) where moves[k] is the detect_growth_move result for
+            start_indices[k] (or None) and terminated[k] tells whether that move hit
+            a termination rule before the end of the data
+        """
+        starts = [int(index) for index in start_indices]
+        n = len(series)
+        moves = [None] * len(starts)
+        terminated = np.zeros(len(starts), dtype=bool)
+        if range_index is None:
+            range_index = PriceRangeIndex(series)
+
+        stepped = []
+        for k, start_index in enumerate(starts):
+            if start_index >= n - 1:
+                continue
+            resolved = self.resolve(range_index, start_index)
+            if resolved is None:
+                stepped.append(k)
+                continue
+            peak_price, peak_index, termination_reason = resolved
+            moves[k] = self.analyzer._build_move_result(
+                series, start_index, peak_price, peak_index, [], False, None, termination_reason
+            )
+            terminated[k] = termination_reason is not None
+
+        if stepped:
+            stepped_moves, stepped_terminated = self._sweep_bars(series, [starts[k] for k in stepped])
+            for k, move, done in zip(stepped, stepped_moves, stepped_terminated):
+                moves[k] = move
+                terminated[k] = done
+
+        return moves, terminated
+
+    def resolve(self, range_index: PriceRangeIndex, start_index: int) -> Optional[Tuple[float, int, Optional[str]]]:
+        """
+        Find where a candidate's move ends by jumping between range queries
+
+        With every close at or below its high (and positive prices) the drawdown
+        from the peak is never positive, so only three rules can end a move: the
+        time limit, a low under the LOD, or MAX_DAYS_WITHOUT_HIGH bars without a
+        new high. Each is located directly: a binary search on the day ordinals,
+        a "first low below" search, and hops between successive new highs.
+
+        Returns:
+            (peak_price, peak_index, termination_reason), or None when the bars
+            the move covers could trigger the drawdown rules and it has to be
+            stepped bar by bar
+        """
+        series = range_index.series
+        n = len(series)
+        lod_price = float(series.low[start_index])
+        if not range_index.is_sorted or not lod_price > 0 or MIN_DRAWDOWN_PERCENTAGE <= 0:
+            return None
+
+        # Bars past the time limit are never evaluated
+        limit = int(np.searchsorted(series.dates, series.dates[start_index] + MAX_TOTAL_DAYS, side='right'))
+        low_break = range_index.first_low_below(start_index + 1, limit, lod_price)
+        # The bar that breaks the LOD still updates the peak before the move ends
+        high_end = low_break + 1 if low_break < limit else limit
+
+        peak_price = lod_price
+        peak_index = start_index
+        while True:
+            next_high = range_index.first_high_above(peak_index + 1, high_end, peak_price)
+            stale_bar = peak_index + MAX_DAYS_WITHOUT_HIGH
+            if stale_bar < next_high and stale_bar < low_break:
+                last_bar = stale_bar
+                drawdown = self.analyzer.calculate_percentage_change(peak_price, float(series.close[stale_bar]))
+                termination_reason = f"30+ days without new high (drawdown: {drawdown:.1f}%)"
+                break
+            if next_high >= high_end:
+                if low_break < limit:
+                    last_bar = low_break
+                    termination_reason = "Price dropped below LOD"
+                elif limit < n:
+                    last_bar = limit - 1
+                    termination_reason = "Max total days exceeded"
+                else:
+                    last_bar = n - 1
+                    termination_reason = None
+                break
+            peak_index = next_high
+            peak_price = float(series.high[next_high])
+
+        if not range_index.is_regular(start_index + 1, last_bar + 1):
+            return None
+        return peak_price, peak_index, termination_reason
+
+    def _sweep_bars(self, series: PriceSeries, start_indices) -> Tuple[List[Optional[Dict]], np.ndarray]:
+        """Step the given candidates bar by bar, all of them together in one pass"""
+        starts = np.asarray(start_indices, dtype=np.int64)
+        count = len(starts)
+        n = len(series)
+        terminated = np.zeros(count, dtype=bool)
+        if count == 0:
+            return [], terminated
+
+        # Candidates are processed in start order so the open ones always form
+        # a contiguous window [lo, hi) of the state arrays
+        order = np.argsort(starts, kind='stable')
+        starts = starts[order]
+
+        days = series.dates
+        highs = series.high
+        lows = series.low
+        closes = series.close
+
+        # Per-candidate state. Retired candidates are parked on sentinel values
+        # (lod -inf, peak +inf, huge start day, very negative days_without_high)
+        # so the vectorized rules below can never fire for them again; their
+        # drawdown evaluates to NaN, which fails every comparison.
+        start_day = days[starts].astype(np.int64)
+        lod = lows[starts].astype(np.float64)
+        working_lod = lod.copy()
+        peak = lod.copy()
+        peak_index = starts.copy()
+        peak_day = start_day.copy()
+        days_without_high = np.zeros(count, dtype=np.int64)
+        continuation = np.zeros(count, dtype=bool)
+        drawdown_count = np.zeros(count, dtype=np.int64)
+        last_drawdown_day = np.zeros(count, dtype=np.int64)
+        last_drawdown_price = np.zeros(count, dtype=np.float64)
+        retired = np.zeros(count, dtype=bool)
+        new_lod = [None] * count
+        reasons = [None] * count
+        drawdowns = {}  # candidate -> [(bar index, close)], only for candidates that have any
+
+        final_peak = peak.copy()
+        final_peak_index = peak_index.copy()
+
+        starts_list = starts.tolist()
+        has_zero_lod = bool(np.any(lod == 0))
+        check_continuation = False
+        lo = hi = 0
+
+        def record_drawdowns(candidates, i, close):
+            drawdown_count[candidates] += 1
+            last_drawdown_day[candidates] = days[i]
+            last_drawdown_price[candidates] = close
+            for k in candidates.tolist():
+                drawdowns.setdefault(k, []).append((i, float(close)))
+
+        def retire(candidates, reason_for):
+            final_peak[candidates] = peak[candidates]
+            final_peak_index[candidates] = peak_index[candidates]
+            terminated[candidates] = True
+            retired[candidates] = True
+            working_lod[candidates] = -np.inf
+            peak[candidates] = np.inf
+            start_day[candidates] = np.iinfo(np.int64).max // 2
+            days_without_high[candidates] = np.iinfo(np.int64).min // 2
+            drawdown_count[candidates] = 0
+            for pos, k in enumerate(candidates.tolist()):
+                reasons[k] = reason_for(pos)
+
+        i = starts_list[0] + 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            while i < n:
+                # Open every candidate whose LOD bar is before this bar
+                while hi < count and starts_list[hi] < i:
+                    hi += 1
+                while lo < hi and retired[lo]:
+                    lo += 1
+                if lo == hi:
+                    if hi >= count:
+                        break
+                    i = starts_list[hi] + 1
+                    continue
+
+                day = days[i]
+                high = highs[i]
+                low = lows[i]
+                close = closes[i]
+
+                # Time limit is checked before the bar updates anything; the
+                # oldest open candidate is always at lo
+                if day - start_day[lo] > MAX_TOTAL_DAYS:
+                    expired = np.flatnonzero((day - start_day[lo:hi]) > MAX_TOTAL_DAYS) + lo
+                    retire(expired, lambda pos: "Max total days exceeded")
+
+                # Peak tracking
+                p = peak[lo:hi]
+                new_high = high > p
+                p[new_high] = high
+                peak_index[lo:hi][new_high] = i
+                peak_day[lo:hi][new_high] = day
+                dwh = days_without_high[lo:hi]
+                dwh += 1
+                dwh[new_high] = 0
+
+                # Same formula as calculate_percentage_change(peak, close)
+                drawdown = ((close - p) / p) * 100
+                if has_zero_lod:
+                    drawdown[p == 0] = 0.0
+
+                below = low < working_lod[lo:hi]
+                if below.any():
+                    retire(np.flatnonzero(below) + lo, lambda pos: "Price dropped below LOD")
+                    drawdown[below] = np.nan
+
+                if np.fmax.reduce(drawdown, initial=-np.inf) >= MIN_DRAWDOWN_PERCENTAGE:
+                    # Drawdowns in the 15-29.9% band start a new episode unless one
+                    # was recorded on the previous calendar day
+                    band = (drawdown >= MIN_DRAWDOWN_PERCENTAGE) & (drawdown < MAX_DRAWDOWN_PERCENTAGE)
+                    if band.any():
+                        b = np.flatnonzero(band) + lo
+                        fresh = (drawdown_count[b] == 0) | ((day - last_drawdown_day[b]) > 1)
+                        if fresh.any():
+                            record_drawdowns(b[fresh], i, close)
+                            check_continuation = True
+
+                # Continuation checks for candidates that have a drawdown but no continuation yet
+                if check_continuation:
+                    pending = (drawdown_count[lo:hi] > 0) & ~continuation[lo:hi]
+                    check_continuation = bool(pending.any())
+                    if check_continuation:
+                        q = np.flatnonzero(pending) + lo
+                        within = (day - peak_day[q]) <= CONTINUATION_WINDOW_DAYS
+                        above_peak = high > peak[q]
+                        by_new_high = within & above_peak
+                        by_recovery = (
+                            within & ~above_peak
+                            & (drawdown[q - lo] < MIN_DRAWDOWN_PERCENTAGE)
+                            & ((day - last_drawdown_day[q]) <= 30)
+                            & (close > last_drawdown_price[q])
+                        )
+                        continuation[q[by_new_high | by_recovery]] = True
+                        for k in q[by_new_high].tolist():
+                            new_lod[k] = min(price for _, price in drawdowns[k])
+
+                # Major drawdowns are recorded once per day and end the move after
+                # MAX_DAYS_WITHOUT_HIGH bars without a new high
+                if np.fmax.reduce(drawdown, initial=-np.inf) >= MAX_DRAWDOWN_PERCENTAGE:
+                    major = drawdown >= MAX_DRAWDOWN_PERCENTAGE
+                    mj = np.flatnonzero(major) + lo
+                    fresh = (drawdown_count[mj] == 0) | (last_drawdown_day[mj] != day)
+                    if fresh.any():
+                        record_drawdowns(mj[fresh], i, close)
+                        check_continuation = True
+
+                    stale = major & (dwh >= MAX_DAYS_WITHOUT_HIGH)
+                    if stale.any():
+                        stale_drawdowns = drawdown[stale]
+                        retire(np.flatnonzero(stale) + lo,
+                               lambda pos: f"30+ days without new high after {stale_drawdowns[pos]:.1f}% drawdown")
+                        drawdown[stale] = np.nan
+
+                if dwh.max() >= MAX_DAYS_WITHOUT_HIGH:
+                    stale = (dwh >= MAX_DAYS_WITHOUT_HIGH) & (drawdown < MIN_DRAWDOWN_PERCENTAGE)
+                    if stale.any():
+                        stale_drawdowns = drawdown[stale]
+                        retire(np.flatnonzero(stale) + lo,
+                               lambda pos: f"30+ days without new high (drawdown: {stale_drawdowns[pos]:.1f}%)")
+
+                i += 1
+
+        # Candidates still open at the end of the data keep their current state
+        still_open = ~retired
+        final_peak[still_open] = peak[still_open]
+        final_peak_index[still_open] = peak_index[still_open]
+
+        # Map results back to the caller's candidate order
+        moves = [None] * count
+        for k in range(count):
+            if starts_list[k] >= n - 1:
+                continue
+            moves[order[k]] = self.analyzer._build_move_result(
+                series,
+                starts_list[k],
+                float(final_peak[k]),
+                int(final_peak_index[k]),
+                [index for index, _ in drawdowns.get(k, [])],
+                bool(continuation[k]),
+                new_lod[k],
+                reasons[k]
+            )
+
+        terminated[order] = terminated.copy()
+        logger.debug(f"Stepped {count} candidates over {n} bars, {int(terminated.sum())} terminated")
+        return moves, terminated
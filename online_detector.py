@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Online move detector for SuperPerformanceScreener
+Feeds each ticker's new end-of-day bars through the growth-move state machine one
+bar at a time, from a small saved state, and reports moves as they qualify or end
+"""
+import argparse
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from stock_analyzer import StockAnalyzer
+from move_engine import MoveTracker
+from history_store import HistoryStore
+from incremental import MoveStateStore, analysis_fingerprint
+from price_series import PriceSeries, ordinal_to_date
+from config import (
+    MIN_GROWTH_PERCENTAGE,
+    GROWTH_MOVE_DAYS,
+    HISTORY_STORE_DIR,
+    ONLINE_STATE_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+# Event types
+GROWTH_EVENT = 'growth'
+SUPERPERFORMANCE_EVENT = 'superperformance'
+TERMINATED_EVENT = 'terminated'
+
+QUALIFYING_STATUSES = ('Growth', 'Superperformance')
+
+class TickerDetector:
+    """
+    Online equivalent of analyze_stock for one ticker
+
+    A bar becomes an LOD candidate once the GROWTH_MOVE_DAYS bars after it are
+    known, so the last few bars are buffered. A confirmed candidate replays them
+    to catch up and then joins the open moves. The 5-bar de-duplication of
+    analyze_stock is applied as candidates are confirmed. Fed the same bars, the
+    open moves plus the moves reported as terminated match analyze_stock.
+
+    Events are dicts with 'event' (growth, superperformance or terminated),
+    'ticker', 'date' and the 'move'. A qualifying event is sent whenever a move
+    moves into Growth or Superperformance. A terminated event is sent only for
+    moves that qualified at some point.
+    """
+
+    def __init__(self, ticker: str, analyzer: StockAnalyzer):
+        self.ticker = ticker
+        self.analyzer = analyzer
+        self.bars = 0
+        self.last_day: Optional[int] = None
+        self.last_accepted: Optional[int] = None
+        self.recent = deque(maxlen=GROWTH_MOVE_DAYS + 1)  # (day, high, low, close)
+        self.open_moves: List[MoveTracker] = []
+
+    def _advance(self, tracker: MoveTracker, bar, events: List[Dict]) -> Optional[str]:
+        """Apply a bar to one move and collect the events it causes"""
+        day, high, low, close = bar
+        reason = tracker.update(self.analyzer, day, high, low, close)
+
+        status = self.analyzer.classify_superperformance(
+            self.analyzer.calculate_percentage_change(tracker.lod, tracker.peak),
+            int(tracker.peak_day - tracker.start_day)
+        )
+        if status != tracker.status:
+            tracker.status = status
+            if status in QUALIFYING_STATUSES:
+                tracker.qualified = True
+                events.append({
+                    'event': SUPERPERFORMANCE_EVENT if status == 'Superperformance' else GROWTH_EVENT,
+                    'ticker': self.ticker,
+                    'date': ordinal_to_date(day),
+                    'move': tracker.to_move(self.analyzer, self.ticker)
+                })
+
+        if reason is not None and tracker.qualified:
+            events.append({
+                'event': TERMINATED_EVENT,
+                'ticker': self.ticker,
+                'date': ordinal_to_date(day),
+                'move': tracker.to_move(self.analyzer, self.ticker, reason)
+            })
+        return reason
+
+    def update(self, day: int, high: float, low: float, close: float) -> List[Dict]:
+        """Feed the next bar (day ordinal, after every bar fed so far); returns the events it causes"""
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"{self.ticker}: bar {ordinal_to_date(day)} is not after {ordinal_to_date(self.last_day)}")
+
+        bar = (int(day), float(high), float(low), float(close))
+        events = []
+        self.open_moves = [tracker for tracker in self.open_moves if self._advance(tracker, bar, events) is None]
+
+        self.recent.append(bar)
+        self.last_day = bar[0]
+        self.bars += 1
+
+        if len(self.recent) == self.recent.maxlen:
+            self._confirm_candidate(events)
+        return events
+
+    def _confirm_candidate(self, events: List[Dict]):
+        """Start tracking the oldest buffered bar if it qualifies as an LOD candidate"""
+        start_index = self.bars - len(self.recent)
+        start_day, _, lod, _ = self.recent[0]
+        future_high = max(high for _, high, _, _ in list(self.recent)[1:])
+        # Same test as find_lowest_of_day_candidates
+        growth = self.analyzer.calculate_percentage_change(lod, future_high)
+        if growth < MIN_GROWTH_PERCENTAGE:
+            return
+        if self.last_accepted is not None and start_index - self.last_accepted < 5:
+            return
+
+        tracker = MoveTracker(start_index, start_day, lod)
+        reason = None
+        for bar in list(self.recent)[1:]:
+            reason = self._advance(tracker, bar, events)
+            if reason is not None:
+                break
+
+        # analyze_stock only counts candidates whose move rose above the LOD
+        if not tracker.peak > tracker.lod:
+            return
+        self.last_accepted = start_index
+        if reason is None:
+            self.open_moves.append(tracker)
+
+    def feed(self, series: PriceSeries) -> List[Dict]:
+        """Feed every bar of `series` dated after the last bar fed; returns their events"""
+        events = []
+        start = 0
+        if self.last_day is not None:
+            start = int(series.dates.searchsorted(self.last_day, side='right'))
+        for day, high, low, close in zip(series.dates[start:].tolist(), series.high[start:].tolist(),
+                                         series.low[start:].tolist(), series.close[start:].tolist()):
+            events.extend(self.update(day, high, low, close))
+        return events
+
+    def current_moves(self) -> List[Dict]:
+        """The open moves as analyze_stock would report them now"""
+        return [tracker.to_move(self.analyzer, self.ticker) for tracker in self.open_moves]
+
+    def to_state(self) -> Dict[str, Any]:
+        """Compact JSON-ready state: counters, the buffered bars and the open moves"""
+        return {
+            'fingerprint': analysis_fingerprint(),
+            'bars': self.bars,
+            'last_day': self.last_day,
+            'last_accepted': self.last_accepted,
+            'recent': [list(bar) for bar in self.recent],
+            'open_moves': [tracker.to_state() for tracker in self.open_moves]
+        }
+
+    @classmethod
+    def from_state(cls, ticker: str, analyzer: StockAnalyzer, state: Dict[str, Any]) -> 'TickerDetector':
+        detector = cls(ticker, analyzer)
+        detector.bars = state['bars']
+        detector.last_day = state['last_day']
+        detector.last_accepted = state['last_accepted']
+        detector.recent.extend(tuple(bar) for bar in state['recent'])
+        detector.open_moves = [MoveTracker.from_state(values) for values in state['open_moves']]
+        return detector
+
+class OnlineDetector:
+    """Per-ticker detectors saved between runs in a MoveStateStore"""
+
+    def __init__(self, states: MoveStateStore, analyzer: StockAnalyzer = None):
+        self.states = states
+        self.analyzer = analyzer or StockAnalyzer()
+
+    def load(self, ticker: str) -> Optional[TickerDetector]:
+        """A ticker's saved detector (None if there is none, or it was saved under other settings)"""
+        state = self.states.load(ticker)
+        if not state or state.get('fingerprint') != analysis_fingerprint():
+            return None
+        return TickerDetector.from_state(ticker, self.analyzer, state)
+
+    def update(self, ticker: str, series: PriceSeries) -> List[Dict]:
+        """
+        Feed a ticker's bars newer than its saved state and save it again
+
+        A ticker without saved state is seeded from the whole of `series`
+        without reporting events, since those moves are history rather than
+        news.
+        """
+        detector = self.load(ticker)
+        if detector is None:
+            detector = TickerDetector(ticker, self.analyzer)
+            detector.feed(series)
+            events = []
+        else:
+            events = detector.feed(series)
+        self.states.save(ticker, detector.to_state())
+        return events
+
+def main():
+    """Update every stored ticker's detector from the local history store and print the events"""
+    parser = argparse.ArgumentParser(description='Report moves that qualified or ended in the newest stored bars')
+    parser.add_argument('--store-dir', default=HISTORY_STORE_DIR, help='Directory of the local price history store')
+    parser.add_argument('--state-dir', default=ONLINE_STATE_DIR, help='Directory of saved detector state')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = HistoryStore(args.store_dir)
+    tickers = store.tickers()
+    if not tickers:
+        print(f"❌ No stored histories in {args.store_dir}. Run a screen or bulk refresh first.")
+        return
+
+    detector = OnlineDetector(MoveStateStore(args.state_dir))
+    print(f"🔍 Updating move detectors for {len(tickers)} tickers...")
+
+    event_count = 0
+    for ticker in tickers:
+        series = store.load(ticker)
+        if series is None:
+            continue
+        for event in detector.update(ticker, series):
+            event_count += 1
+            move = event['move']
+            if event['event'] == TERMINATED_EVENT:
+                print(f"🏁 {ticker}: move from {move['start_date_formatted']} ended on {event['date']} "
+                      f"({move['growth_percentage']:.1f}%, {move['termination_reason']})")
+            else:
+                print(f"🚀 {ticker}: {move['superperformance']} move from {move['start_date_formatted']} "
+                      f"({move['growth_percentage']:.1f}% over {move['duration_days']} days)")
+
+    print(f"✅ {event_count} events")
+
+if __name__ == "__main__":
+    main()
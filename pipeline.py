@@ -0,0 +1,188 @@
+"""
+Streaming pipeline for SuperPerformanceScreener
+Runs each step of a screen in its own group of worker threads, joined by bounded
+queues, so downloading, analysis and result emission overlap
+"""
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+from config import PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Sent down a queue once everything before it has finished
+_DONE = object()
+
+class PipelineStopped(Exception):
+    """Raised inside worker threads once the pipeline is shutting down early"""
+
+class Stage:
+    """
+    One step of a Pipeline
+
+    `fn(item)` returns the item to hand to the next stage, or None to drop it
+    (a filter). `workers` threads run `fn` concurrently, and at most
+    `queue_size` items wait in front of the stage.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1,
+                 queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+
+class Pipeline:
+    """
+    source → stages → sink, with a bounded queue in front of every step
+
+    A feeder thread takes items from the source. Each stage's workers take
+    items from its queue and put their results on the next stage's queue. The
+    sink runs in the calling thread, so it needs no locking. When a step falls
+    behind, the queue in front of it fills and the steps upstream block. Memory
+    therefore stays bounded by the queue sizes, however large the source is.
+
+    Items reach the sink in the order they finish, not the order they were
+    fed. An exception raised by a stage counts as an error: the item is
+    dropped and `on_error(stage_name, item, exception)` is called. An
+    exception from the source or the sink, or a KeyboardInterrupt, stops
+    every thread and is re-raised from run().
+    """
+
+    def __init__(self, stages: List[Stage], sink_queue_size: int = PIPELINE_QUEUE_SIZE,
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.sink_queue_size = max(1, sink_queue_size)
+        self.on_error = on_error
+        self.errors = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item: Any):
+        """Blocking put that gives up once the pipeline is stopping"""
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Blocking get that gives up once the pipeline is stopping"""
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _feed(self, source: Iterable, outbox: queue.Queue, consumers: int, failure: List[BaseException]):
+        try:
+            for item in source:
+                self._put(outbox, item)
+        except PipelineStopped:
+            return
+        except BaseException as e:
+            failure.append(e)
+            self._stop.set()
+            return
+
+        try:
+            for _ in range(consumers):
+                self._put(outbox, _DONE)
+        except PipelineStopped:
+            pass
+
+    def _work(self, stage: Stage, inbox: queue.Queue, outbox: queue.Queue, consumers: int,
+              remaining: Dict[str, int]):
+        stats = self.stats[stage.name]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE:
+                    break
+
+                try:
+                    result = stage.fn(item)
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                        stats['errors'] += 1
+                    logger.debug(f"Pipeline stage {stage.name} failed: {e}")
+                    if self.on_error:
+                        self.on_error(stage.name, item, e)
+                    continue
+
+                with self._lock:
+                    stats['processed'] += 1
+                    if result is None:
+                        stats['dropped'] += 1
+                if result is not None:
+                    self._put(outbox, result)
+
+            # The last worker of a stage to finish tells the next step it is done
+            with self._lock:
+                remaining[stage.name] -= 1
+                last = remaining[stage.name] == 0
+            if last:
+                for _ in range(consumers):
+                    self._put(outbox, _DONE)
+        except PipelineStopped:
+            pass
+
+    def run(self, source: Iterable, sink: Callable[[Any], None]) -> int:
+        """Push every source item through the stages into `sink`; returns how many reached the sink"""
+        self._stop.clear()
+        self.errors = 0
+        self.stats = {stage.name: {'processed': 0, 'dropped': 0, 'errors': 0} for stage in self.stages}
+
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue(maxsize=self.sink_queue_size))
+        remaining = {stage.name: stage.workers for stage in self.stages}
+        failure: List[BaseException] = []
+
+        threads = [threading.Thread(target=self._feed, name='pipeline-source', daemon=True,
+                                    args=(source, queues[0], self.stages[0].workers, failure))]
+        for i, stage in enumerate(self.stages):
+            consumers = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, name=f"pipeline-{stage.name}-{n}", daemon=True,
+                    args=(stage, queues[i], queues[i + 1], consumers, remaining)
+                ))
+        for thread in threads:
+            thread.start()
+
+        emitted = 0
+        try:
+            while True:
+                try:
+                    item = self._get(queues[-1])
+                except PipelineStopped:
+                    break
+                if item is _DONE:
+                    break
+                sink(item)
+                emitted += 1
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            if self._stop.is_set():
+                for thread in threads:
+                    thread.join(timeout=1)
+            else:
+                for thread in threads:
+                    thread.join()
+
+        if failure:
+            raise failure[0]
+        return emitted
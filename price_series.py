@@ -0,0 +1,148 @@
+"""
+Columnar price series for SuperPerformanceScreener
+Stores OHLCV history as NumPy arrays instead of one dict per bar
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+
+def date_to_ordinal(date_str: str) -> int:
+    """Convert a 'YYYY-MM-DD' string to a day ordinal (days since 1970-01-01)"""
+    return int(np.datetime64(date_str, 'D').astype(np.int64))
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    """Convert a day ordinal back to a 'YYYY-MM-DD' string"""
+    return str(np.datetime64(int(ordinal), 'D'))
+
+
+class PriceSeries:
+    """
+    Daily OHLCV history for one ticker in columnar form
+
+    dates holds int64 day ordinals (days since 1970-01-01), the price columns
+    are float64 and volume is int64. All columns have the same length and are
+    ordered by date.
+    """
+
+    __slots__ = ('dates', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, dates, open, high, low, close, volume=None):
+        self.dates = np.asarray(dates, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        if volume is None:
+            volume = np.zeros(len(self.dates), dtype=np.int64)
+        self.volume = np.asarray(volume, dtype=np.int64)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'PriceSeries':
+        """Build a series from a list of per-bar dicts (date, open, high, low, close, volume)"""
+        records = list(records)
+        if not records:
+            return cls.empty()
+
+        dates = np.array([r['date'] for r in records], dtype='datetime64[D]').astype(np.int64)
+        return cls(
+            dates,
+            [r.get('open', 0) for r in records],
+            [r.get('high', 0) for r in records],
+            [r.get('low', 0) for r in records],
+            [r.get('close', 0) for r in records],
+            [r.get('volume', 0) or 0 for r in records]
+        )
+
+    @classmethod
+    def empty(cls) -> 'PriceSeries':
+        """Create a series with no bars"""
+        return cls([], [], [], [], [], [])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return 'PriceSeries(empty)'
+        return f"PriceSeries({len(self)} bars, {self.date_str(0)} to {self.date_str(-1)})"
+
+    def date_str(self, index: int) -> str:
+        """Return the date of bar `index` as a 'YYYY-MM-DD' string"""
+        return ordinal_to_date(self.dates[index])
+
+    def sorted_by_date(self) -> 'PriceSeries':
+        """Return the series ordered by date (self if it is already ordered)"""
+        if len(self) < 2 or np.all(self.dates[1:] >= self.dates[:-1]):
+            return self
+        order = np.argsort(self.dates, kind='stable')
+        return self.take(order)
+
+    def between(self, start_day: int, end_day: int) -> 'PriceSeries':
+        """Return the bars dated within [start_day, end_day] (day ordinals, inclusive) as views"""
+        lo = int(np.searchsorted(self.dates, start_day, side='left'))
+        hi = int(np.searchsorted(self.dates, end_day, side='right'))
+        return self.take(slice(lo, hi))
+
+    @classmethod
+    def concat(cls, parts: Iterable['PriceSeries']) -> 'PriceSeries':
+        """
+        Join several series into one ordered by date
+
+        When more than one part has a bar for the same date, the bar from the
+        earliest part is kept.
+        """
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+
+        joined = cls(*(np.concatenate([getattr(p, name) for p in parts]) for name in cls.__slots__))
+        order = np.argsort(joined.dates, kind='stable')
+        dates = joined.dates[order]
+        keep = np.concatenate([[True], dates[1:] != dates[:-1]])
+        return joined.take(order[keep])
+
+    def take(self, indices) -> 'PriceSeries':
+        """Return a new series containing the bars at `indices`"""
+        return PriceSeries(
+            self.dates[indices],
+            self.open[indices],
+            self.high[indices],
+            self.low[indices],
+            self.close[indices],
+            self.volume[indices]
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert back to the legacy list-of-dicts format"""
+        dates = np.asarray(self.dates).astype('datetime64[D]').astype(str)
+        return [
+            {
+                'date': date,
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'volume': v
+            }
+            for date, o, h, l, c, v in zip(
+                dates.tolist(),
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist()
+            )
+        ]
+
+
+def as_price_series(data: Optional[Union[PriceSeries, List[Dict[str, Any]]]]) -> PriceSeries:
+    """Accept either a PriceSeries or a legacy list of per-bar dicts"""
+    if isinstance(data, PriceSeries):
+        return data
+    if not data:
+        return PriceSeries.empty()
+    return PriceSeries.from_records(data)
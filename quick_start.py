@@ -20,7 +20,7 @@ def check_dependencies():
     """Check if required dependencies are installed"""
     required_packages = [
         'requests', 'google-auth', 'google-api-python-client', 
-        'python-dotenv', 'retry'
+        'python-dotenv', 'retry', 'numpy', 'aiohttp'
     ]
     
     missing_packages = []
@@ -0,0 +1,127 @@
+"""
+Range query index for SuperPerformanceScreener
+Sparse tables answering range max/min and "first bar beyond a price" questions
+"""
+import numpy as np
+
+
+class SparseTable:
+    """
+    Static range-max or range-min table over one column
+
+    Level k holds the reduction of every window of 2**k values, so any range
+    reduction is answered in O(1) from two overlapping windows and the first
+    index crossing a threshold is found in O(log n) by descending the levels.
+    """
+
+    def __init__(self, values, op: str = 'max'):
+        if op not in ('max', 'min'):
+            raise ValueError("op must be 'max' or 'min'")
+
+        self.op = op
+        self._reduce = np.maximum if op == 'max' else np.minimum
+        values = np.asarray(values, dtype=np.float64)
+        self.levels = [values]
+
+        width = 1
+        while 2 * width <= len(values):
+            previous = self.levels[-1]
+            self.levels.append(self._reduce(previous[:-width], previous[width:]))
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def query(self, start: int, end: int) -> float:
+        """Reduce values[start:end] (end exclusive, start < end)"""
+        k = (end - start).bit_length() - 1
+        level = self.levels[k]
+        return float(self._reduce(level[start], level[end - (1 << k)]))
+
+    def query_many(self, starts, ends) -> np.ndarray:
+        """Vectorized query for many [start, end) ranges at once (all non-empty)"""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        result = np.empty(len(starts), dtype=np.float64)
+        ks = np.floor(np.log2(np.maximum(ends - starts, 1))).astype(np.int64)
+
+        for k in np.unique(ks).tolist():
+            mask = ks == k
+            level = self.levels[k]
+            result[mask] = self._reduce(level[starts[mask]], level[ends[mask] - (1 << k)])
+        return result
+
+    def first_index(self, start: int, end: int, threshold: float, strict: bool = True) -> int:
+        """
+        First index in [start, end) whose value crosses `threshold`
+
+        For a max table that is the first value > threshold (>= when strict is
+        False); for a min table the first value < threshold (<=). Returns `end`
+        when no value in the range crosses it.
+        """
+        end = min(end, len(self))
+        pos = start
+        is_max = self.op == 'max'
+
+        for k in range(len(self.levels) - 1, -1, -1):
+            width = 1 << k
+            if pos + width > end:
+                continue
+            value = self.levels[k][pos]
+            # Skip the whole block when nothing in it crosses the threshold
+            if is_max:
+                skip = value <= threshold if strict else value < threshold
+            else:
+                skip = value >= threshold if strict else value > threshold
+            if skip:
+                pos += width
+
+        return pos
+
+
+class PriceRangeIndex:
+    """
+    Per-ticker range index over a PriceSeries
+
+    Built once per ticker and shared by every candidate: range max over highs,
+    range min over lows, and a prefix count of bars whose close is above the
+    high (or that hold NaNs), which are the only bars where the drawdown rules
+    of a move can fire.
+    """
+
+    def __init__(self, series):
+        self.series = series
+        self.is_sorted = bool(np.all(series.dates[1:] >= series.dates[:-1]))
+        self.high_max = SparseTable(series.high, 'max')
+        self.low_min = SparseTable(series.low, 'min')
+
+        irregular = (
+            (series.close > series.high)
+            | np.isnan(series.high)
+            | np.isnan(series.low)
+            | np.isnan(series.close)
+        )
+        self._irregular_count = np.concatenate([[0], np.cumsum(irregular, dtype=np.int64)])
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def highest_high(self, start: int, end: int) -> float:
+        """Highest high over bars [start, end)"""
+        return self.high_max.query(start, end)
+
+    def lowest_low(self, start: int, end: int) -> float:
+        """Lowest low over bars [start, end)"""
+        return self.low_min.query(start, end)
+
+    def first_high_above(self, start: int, end: int, price: float, strict: bool = True) -> int:
+        """First bar in [start, end) whose high is above `price` (end if none)"""
+        return self.high_max.first_index(start, end, price, strict)
+
+    def first_low_below(self, start: int, end: int, price: float, strict: bool = True) -> int:
+        """First bar in [start, end) whose low is below `price` (end if none)"""
+        return self.low_min.first_index(start, end, price, strict)
+
+    def is_regular(self, start: int, end: int) -> bool:
+        """True when no bar in [start, end) has a close above its high or a NaN price"""
+        return self._irregular_count[end] == self._irregular_count[start]
@@ -0,0 +1,121 @@
+"""
+Rate governor for SuperPerformanceScreener
+One token bucket shared by every outbound EODHD request, with additive-increase /
+multiplicative-decrease adjustment when the API starts throttling
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+import logging
+
+from config import (
+    RATE_LIMIT_PER_SECOND,
+    RATE_LIMIT_MIN_PER_SECOND,
+    RATE_LIMIT_MAX_PER_SECOND,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (None if absent or not numeric)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+class RateGovernor:
+    """
+    Thread-safe token bucket with AIMD rate control
+
+    Every request takes one token before it is sent; tokens refill at `rate` per
+    second up to `burst`. A 429 or 5xx response multiplies the rate by `backoff`
+    (and honours Retry-After), every other response adds `increase` back, so the
+    rate settles just under whatever the API plan allows.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND,
+                 burst: int = RATE_LIMIT_BURST,
+                 min_rate: float = RATE_LIMIT_MIN_PER_SECOND,
+                 max_rate: float = RATE_LIMIT_MAX_PER_SECOND,
+                 increase: float = RATE_LIMIT_INCREASE,
+                 backoff: float = RATE_LIMIT_BACKOFF):
+        if min_rate <= 0 or max_rate < min_rate:
+            raise ValueError("rate limits must satisfy 0 < min_rate <= max_rate")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _reserve(self) -> float:
+        """Take one token (possibly going into debt) and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> float:
+        """Block until the caller may send one request; returns the time waited"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Asyncio variant of acquire()"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_success(self):
+        """Additive increase after a request the API accepted"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease after a 429/5xx, pausing for Retry-After if given"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            # Drop any saved-up burst so the lower rate takes effect immediately
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"EODHD API throttling, request rate lowered to {self.rate:.2f}/s")
+
+    def observe(self, status_code: int, retry_after: Optional[str] = None):
+        """Feed a response status back into the rate controller"""
+        if status_code == 429 or status_code >= 500:
+            self.record_throttle(parse_retry_after(retry_after))
+        elif status_code < 400:
+            self.record_success()
+
+_default_governor = None
+_default_lock = threading.Lock()
+
+def get_default_governor() -> RateGovernor:
+    """The process-wide governor shared by every client that isn't given its own"""
+    global _default_governor
+    with _default_lock:
+        if _default_governor is None:
+            _default_governor = RateGovernor()
+        return _default_governor
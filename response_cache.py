@@ -0,0 +1,134 @@
+"""
+Persistent API response cache for SuperPerformanceScreener
+Keeps slow-changing metadata responses (search, fundamentals, symbol lists) on
+disk between runs, with a TTL per endpoint and ETag/Last-Modified revalidation
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+import logging
+
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    One JSON file per (endpoint, params) response, bounded in total size
+
+    Only endpoints with a TTL are cached; the first path segment of the endpoint
+    selects it ('fundamentals/AAPL.US' uses the 'fundamentals' TTL). A fresh
+    entry is served without touching the network. An expired entry keeps its
+    validators so the next request can be conditional, and a 304 reply renews
+    it. When the directory grows past `max_bytes`, the least recently used
+    files are removed.
+    """
+
+    def __init__(self, root: str = RESPONSE_CACHE_DIR, max_bytes: int = RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+                 ttls: Dict[str, float] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = RESPONSE_CACHE_TTLS if ttls is None else ttls
+        self._total_bytes = None
+        os.makedirs(root, exist_ok=True)
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """Seconds a response from `endpoint` stays fresh (None if it isn't cached)"""
+        return self.ttls.get(endpoint.split('/', 1)[0])
+
+    def _path(self, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        params = {k: v for k, v in (params or {}).items() if k != 'api_token'}
+        key = json.dumps([endpoint, sorted(params.items())], default=str)
+        return os.path.join(self.root, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        The cached entry for a request, or None
+
+        The entry holds 'body', 'etag', 'last_modified' and 'fresh' (whether it
+        can be used without revalidating).
+        """
+        ttl = self.ttl_for(endpoint)
+        if ttl is None:
+            return None
+
+        path = self._path(endpoint, params)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        entry['fresh'] = time.time() - entry['stored_at'] < ttl
+        # Reads count as use for eviction
+        os.utime(path)
+        return entry
+
+    def put(self, endpoint: str, params: Optional[Dict[str, Any]], body: Any,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a response (ignored for endpoints without a TTL)"""
+        if self.ttl_for(endpoint) is None:
+            return
+
+        path = self._path(endpoint, params)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'endpoint': endpoint,
+                'stored_at': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': body
+            }, f)
+        os.replace(tmp_path, path)
+
+        self._track(os.path.getsize(path) - previous_size)
+
+    def renew(self, endpoint: str, params: Optional[Dict[str, Any]] = None):
+        """Mark an entry fresh again after the server confirmed it is unchanged (HTTP 304)"""
+        entry = self.get(endpoint, params)
+        if entry is not None:
+            self.put(endpoint, params, entry['body'], entry.get('etag'), entry.get('last_modified'))
+
+    def _track(self, delta: int):
+        """Keep the running size total and evict once it exceeds the limit"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.root)
+                                    if entry.name.endswith('.json'))
+        else:
+            self._total_bytes += delta
+
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is back under 90% of its limit"""
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.root) if entry.name.endswith('.json')
+        )
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        logger.debug(f"Response cache evicted down to {total} bytes")
+        self._total_bytes = total
+
+    def clear(self):
+        """Remove every cached response"""
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.json'):
+                os.remove(entry.path)
+        self._total_bytes = 0
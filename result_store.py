@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Local result store for SuperPerformanceScreener
+Keeps the consolidated moves of every comprehensive run in an indexed SQLite
+database, so past results can be sliced without loading them all
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+import numpy as np
+
+from config import RESULT_STORE_FILE, RESULT_STORE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    source TEXT,
+    move_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    ticker TEXT NOT NULL,
+    exchange TEXT,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    classification TEXT,
+    growth_percentage REAL,
+    duration_days INTEGER,
+    avg_volume INTEGER,
+    move TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_by_run ON moves (run_id);
+CREATE INDEX IF NOT EXISTS moves_by_ticker ON moves (ticker, start_date);
+CREATE INDEX IF NOT EXISTS moves_by_start ON moves (start_date);
+CREATE INDEX IF NOT EXISTS moves_by_end ON moves (end_date);
+CREATE INDEX IF NOT EXISTS moves_by_classification ON moves (classification, start_date);
+"""
+
+# Backup files written before the store existed: comprehensive_results_YYYYMMDD_HHMMSS.json
+_BACKUP_NAME = re.compile(r'(\d{8}_\d{6})')
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for the non-JSON values a move can carry"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _iso(value: Any) -> str:
+    return value.isoformat()[:10] if isinstance(value, (datetime, date)) else str(value)
+
+class ResultStore:
+    """
+    Moves of every run, one row each, indexed by ticker, start and end date,
+    classification and run id
+
+    Each row keeps the whole move as JSON next to the indexed columns, so a
+    query returns the same dicts the screener produced. Moves are buffered and
+    written `batch_size` at a time, one transaction per batch. A run is
+    "finished" once all of its moves are in; queries read the latest finished
+    run unless told otherwise. The database uses WAL, so it can be queried
+    while a run is still writing to it.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_FILE, batch_size: int = RESULT_STORE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self._pending = []
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start_run(self, run_id: Optional[str] = None, source: Optional[str] = None,
+                  started_at: Optional[datetime] = None) -> str:
+        """Register a new run and return its id (its start time unless given)"""
+        started_at = started_at or datetime.now()
+        if run_id is None:
+            run_id = started_at.strftime('%Y%m%d_%H%M%S')
+            base, n = run_id, 1
+            while self.conn.execute('SELECT 1 FROM runs WHERE run_id = ?', (run_id,)).fetchone():
+                n += 1
+                run_id = f"{base}_{n}"
+        with self.conn:
+            self.conn.execute('INSERT INTO runs (run_id, started_at, source) VALUES (?, ?, ?)',
+                              (run_id, started_at.isoformat(timespec='seconds'), source))
+        return run_id
+
+    def add_moves(self, run_id: str, moves: List[Dict[str, Any]]):
+        """Queue moves for a run; they are written once a full batch is waiting"""
+        for move in moves:
+            self._pending.append((
+                run_id,
+                move['ticker'],
+                move.get('exchange'),
+                _iso(move['start_date']),
+                _iso(move['end_date']),
+                move.get('superperformance'),
+                move.get('growth_percentage'),
+                move.get('duration_days'),
+                move.get('avg_volume'),
+                json.dumps(move, default=_to_json)
+            ))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every queued move in one transaction"""
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO moves (run_id, ticker, exchange, start_date, end_date, classification, '
+                'growth_percentage, duration_days, avg_volume, move) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                self._pending
+            )
+        logger.debug(f"Wrote {len(self._pending)} moves to {self.path}")
+        self._pending = []
+
+    def finish_run(self, run_id: str) -> int:
+        """Write the run's remaining moves, mark it finished and return its move count"""
+        self.flush()
+        with self.conn:
+            count = self.conn.execute('SELECT COUNT(*) FROM moves WHERE run_id = ?', (run_id,)).fetchone()[0]
+            self.conn.execute('UPDATE runs SET finished_at = ?, move_count = ? WHERE run_id = ?',
+                              (datetime.now().isoformat(timespec='seconds'), count, run_id))
+        return count
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Every run, oldest first"""
+        cursor = self.conn.execute(
+            'SELECT run_id, started_at, finished_at, source, move_count FROM runs ORDER BY started_at, run_id'
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def latest_run_id(self) -> Optional[str]:
+        """The most recent finished run (None if there is none)"""
+        row = self.conn.execute(
+            'SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY started_at DESC, run_id DESC LIMIT 1'
+        ).fetchone()
+        return row[0] if row else None
+
+    def query(self, run_id: Optional[str] = None, all_runs: bool = False, ticker: Optional[str] = None,
+              exchange: Optional[str] = None, classification: Optional[str] = None,
+              start_from: Optional[str] = None, start_to: Optional[str] = None,
+              end_from: Optional[str] = None, end_to: Optional[str] = None,
+              min_growth: Optional[float] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Moves matching every given filter, ordered by ticker and start date
+
+        Dates are 'YYYY-MM-DD' and the ranges include both ends. Reads the
+        latest finished run unless `run_id` or `all_runs` says otherwise. Rows
+        are decoded one at a time as the result is iterated.
+        """
+        conditions, params = [], []
+        if not all_runs:
+            run_id = run_id or self.latest_run_id()
+            if run_id is None:
+                return
+            conditions.append('run_id = ?')
+            params.append(run_id)
+        for column, op, value in (
+            ('ticker', '=', ticker),
+            ('exchange', '=', exchange),
+            ('classification', '=', classification),
+            ('start_date', '>=', start_from),
+            ('start_date', '<=', start_to),
+            ('end_date', '>=', end_from),
+            ('end_date', '<=', end_to),
+            ('growth_percentage', '>=', min_growth)
+        ):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+
+        sql = 'SELECT move FROM moves'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY ticker, start_date, id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        for (move,) in self.conn.execute(sql, params):
+            yield json.loads(move)
+
+    def import_json(self, path: str, run_id: Optional[str] = None) -> str:
+        """Load a JSON list of moves (e.g. an old comprehensive_results_*.json backup) as a finished run"""
+        with open(path) as f:
+            moves = json.load(f)
+        # Date the run by the timestamp in the backup's name, so it sorts among the others
+        match = _BACKUP_NAME.search(os.path.basename(path))
+        started_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S') if match else None
+        run_id = self.start_run(run_id, source=os.path.basename(path), started_at=started_at)
+        for i in range(0, len(moves), self.batch_size):
+            self.add_moves(run_id, moves[i:i + self.batch_size])
+        self.finish_run(run_id)
+        return run_id
+
+    def close(self):
+        """Write any queued moves and close the database"""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+def main():
+    """Query or fill the result store from the command line"""
+    parser = argparse.ArgumentParser(description='SuperPerformanceScreener result store')
+    parser.add_argument('--db', default=RESULT_STORE_FILE, help=f'Result store (default: {RESULT_STORE_FILE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('runs', help='List the stored runs')
+
+    query = commands.add_parser('query', help='Print the moves matching the filters')
+    query.add_argument('--run', help='Run id (default: the latest finished run)')
+    query.add_argument('--all-runs', action='store_true', help='Search every run')
+    query.add_argument('--ticker')
+    query.add_argument('--exchange')
+    query.add_argument('--class', dest='classification', help='e.g. Growth or Superperformance')
+    query.add_argument('--start-from', metavar='YYYY-MM-DD')
+    query.add_argument('--start-to', metavar='YYYY-MM-DD')
+    query.add_argument('--end-from', metavar='YYYY-MM-DD')
+    query.add_argument('--end-to', metavar='YYYY-MM-DD')
+    query.add_argument('--min-growth', type=float, help='Smallest growth percentage')
+    query.add_argument('--limit', type=int)
+    query.add_argument('--json', action='store_true', help='Print one JSON move per line')
+
+    import_json = commands.add_parser('import-json', help='Import JSON result backups as finished runs')
+    import_json.add_argument('files', nargs='+', metavar='FILE')
+    args = parser.parse_args()
+
+    with ResultStore(args.db) as store:
+        if args.command == 'runs':
+            for run in store.runs():
+                state = f"finished {run['finished_at']}" if run['finished_at'] else 'unfinished'
+                print(f"{run['run_id']}  {run['move_count']:>6} moves  {state}  {run['source'] or ''}")
+        elif args.command == 'import-json':
+            for path in args.files:
+                run_id = store.import_json(path)
+                print(f"📥 Imported {path} as run {run_id}")
+        else:
+            count = 0
+            for move in store.query(run_id=args.run, all_runs=args.all_runs, ticker=args.ticker,
+                                    exchange=args.exchange, classification=args.classification,
+                                    start_from=args.start_from, start_to=args.start_to,
+                                    end_from=args.end_from, end_to=args.end_to,
+                                    min_growth=args.min_growth, limit=args.limit):
+                count += 1
+                if args.json:
+                    print(json.dumps(move))
+                else:
+                    print(f"{move['ticker']:<8} {move['start_date']} → {move['end_date']}  "
+                          f"{move['growth_percentage']:>8.1f}%  {move['duration_days']:>4}d  "
+                          f"{move.get('superperformance', '')}")
+            if not args.json:
+                print(f"{count} moves")
+
+if __name__ == "__main__":
+    main()
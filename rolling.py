@@ -0,0 +1,51 @@
+"""
+Rolling window helpers for SuperPerformanceScreener
+Vectorized sliding-window reductions over price and volume columns
+"""
+import numpy as np
+
+
+def sliding_max(values, window: int) -> np.ndarray:
+    """
+    Maximum of every length-`window` slice of `values`
+
+    Returns an array of length len(values) - window + 1 where element i is
+    max(values[i:i + window]). Uses the van Herk/Gil-Werman block scheme, so the
+    cost is O(n) regardless of the window size.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < window:
+        return np.empty(0, dtype=np.float64)
+    if window == 1:
+        return values.copy()
+
+    # Pad to a whole number of blocks, then take prefix/suffix maxima per block
+    pad = (-n) % window
+    blocks = np.concatenate([values, np.full(pad, -np.inf)]).reshape(-1, window)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # Any window covers the tail of one block and the head of the next
+    return np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def sliding_min(values, window: int) -> np.ndarray:
+    """Minimum of every length-`window` slice of `values` (see sliding_max)"""
+    return -sliding_max(-np.asarray(values, dtype=np.float64), window)
+
+
+def forward_max(values, window: int) -> np.ndarray:
+    """
+    Maximum of the `window` values strictly after each position
+
+    Element i is max(values[i + 1:i + window + 1]) for every i that has a full
+    window ahead of it, i.e. the result has len(values) - window elements.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= window:
+        return np.empty(0, dtype=np.float64)
+    return sliding_max(values[1:], window)
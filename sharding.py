@@ -0,0 +1,91 @@
+"""
+Universe sharding for SuperPerformanceScreener
+Splits the stock universe across machines by a stable hash of the ticker, and
+merges the per-shard result files back into one result set
+"""
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse 'i/N' (1-based, e.g. '2/4') into (i, N)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N (e.g. 2/4), got {spec!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {spec!r} is out of range: need 1 <= i <= N")
+    return index, count
+
+def shard_of(ticker: str, count: int) -> int:
+    """The 1-based shard a ticker belongs to (CRC32, so every machine agrees)"""
+    return zlib.crc32(ticker.encode('utf-8')) % count + 1
+
+def select_shard(stocks: List[Tuple[str, str]], index: int, count: int) -> List[Tuple[str, str]]:
+    """The (ticker, exchange) pairs that belong to shard `index` of `count`"""
+    return [(ticker, exchange) for ticker, exchange in stocks if shard_of(ticker, count) == index]
+
+def shard_label(index: int, count: int) -> str:
+    """Label used in per-shard file names, e.g. 'shard2of4'"""
+    return f"shard{index}of{count}"
+
+def shard_path(path: str, index: int, count: int) -> str:
+    """Per-shard variant of a file path: data/checkpoint.jsonl -> data/checkpoint.shard2of4.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard_label(index, count)}{ext}"
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def write_shard_results(path: str, index: int, count: int, results: List[Dict[str, Any]],
+                        stocks: int, processed: int, complete: bool):
+    """Save one shard's raw (unconsolidated) moves along with which shard produced them"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'shard': index,
+            'shards': count,
+            'complete': complete,
+            'stocks': stocks,
+            'processed': processed,
+            'results': results
+        }, f, default=_to_json)
+    os.replace(tmp_path, path)
+
+def load_shard_results(paths: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Combine the moves from a full set of shard result files
+
+    Every file must come from the same N-way split, and together they must cover
+    shards 1..N exactly once. Returns (moves, warnings); a warning is given for
+    each shard whose run did not finish.
+    """
+    shards = {}
+    counts = set()
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        if data['shard'] in shards:
+            raise ValueError(f"Shard {data['shard']} appears twice ({shards[data['shard']][0]} and {path})")
+        shards[data['shard']] = (path, data)
+        counts.add(data['shards'])
+
+    if len(counts) != 1:
+        raise ValueError(f"Shard files come from different splits: {sorted(counts)}")
+    count = counts.pop()
+    missing = sorted(set(range(1, count + 1)) - set(shards))
+    if missing:
+        raise ValueError(f"Missing results for shards {missing} of {count}")
+
+    results = []
+    warnings = []
+    for index in sorted(shards):
+        path, data = shards[index]
+        if not data['complete']:
+            warnings.append(f"Shard {index}/{count} ({path}) did not finish; its results are partial")
+        results.extend(data['results'])
+    return results, warnings
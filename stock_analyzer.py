@@ -2,20 +2,24 @@
 Stock Analysis Engine for SuperPerformanceScreener
 Implements the core logic for detecting growth moves, superperformance, and drawdowns
 """
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 from config import (
     MIN_GROWTH_PERCENTAGE,
-    MAX_DRAWDOWN_PERCENTAGE,
-    MIN_DRAWDOWN_PERCENTAGE,
     GROWTH_MOVE_DAYS,
-    MAX_DAYS_WITHOUT_HIGH,
-    MAX_TOTAL_DAYS,
-    CONTINUATION_WINDOW_DAYS,
-    GROWTH_THRESHOLDS
+    GROWTH_THRESHOLDS,
+    MIN_DAILY_VOLUME,
+    VOLUME_WINDOWS,
+    VOLUME_MAX_STALE_DAYS
 )
+from price_series import PriceSeries, as_price_series, date_to_ordinal
+from rolling import forward_max
+from move_engine import MoveEngine, MoveTracker
+from range_index import PriceRangeIndex
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,7 @@ class StockAnalyzer:
     
     def __init__(self):
         self.data_cache = {}
+        self.move_engine = MoveEngine(self)
         # Set up debug logging for this class
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
@@ -46,189 +51,158 @@ class StockAnalyzer:
             return 0.0
         return ((end_price - start_price) / start_price) * 100
     
-    def find_lowest_of_day_candidates(self, data: List[Dict]) -> List[Dict]:
-        """Find potential LOD (Lowest of Day) candidates"""
-        candidates = []
-        
-        for i, day in enumerate(data):
-            if i < len(data) - GROWTH_MOVE_DAYS:
-                # Check if this day's low is the lowest in the next 5 days
-                current_low = day['low']
-                future_highs = [d['high'] for d in data[i+1:i+GROWTH_MOVE_DAYS+1]]
-                
-                # Check if we get 5% growth within 5 days
-                max_future_price = max(future_highs)
-                growth = self.calculate_percentage_change(current_low, max_future_price)
-                
-                if growth >= MIN_GROWTH_PERCENTAGE:
-                    candidates.append({
-                        'date': day['date'],
-                        'low': current_low,
-                        'growth': growth,
-                        'index': i
-                    })
-        
-        return candidates
+    def find_lowest_of_day_candidates(
+        self,
+        data: Union[PriceSeries, List[Dict]],
+        window: int = GROWTH_MOVE_DAYS,
+        min_growth: float = MIN_GROWTH_PERCENTAGE
+    ) -> List[Dict]:
+        """
+        Find potential LOD (Lowest of Day) candidates
+        
+        A bar is a candidate when the highest high over the next `window` bars is
+        at least `min_growth` percent above its low. The forward maxima for all
+        bars are computed in a single vectorized pass.
+        """
+        series = as_price_series(data)
+        if len(series) <= window:
+            return []
+        
+        lows = series.low[:len(series) - window]
+        future_highs = forward_max(series.high, window)
+        
+        # Same formula as calculate_percentage_change, applied to every bar at once
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(lows == 0, 0.0, ((future_highs - lows) / lows) * 100)
+        
+        indices = np.flatnonzero(growth >= min_growth)
+        
+        return [
+            {
+                'date': series.date_str(i),
+                'low': low,
+                'growth': g,
+                'index': i
+            }
+            for i, low, g in zip(indices.tolist(), lows[indices].tolist(), growth[indices].tolist())
+        ]
     
-    def detect_growth_move(self, data: List[Dict], start_index: int) -> Optional[Dict]:
+    def detect_growth_move(
+        self,
+        data: Union[PriceSeries, List[Dict]],
+        start_index: int,
+        range_index: Optional[PriceRangeIndex] = None
+    ) -> Optional[Dict]:
         """
         Detect a growth move starting from a given LOD candidate
         
+        Args:
+            data: Historical OHLC data
+            start_index: Index of the LOD bar
+            range_index: Range index of the series; pass one in when analyzing
+                several candidates of the same ticker so it is built only once
+        
         Returns:
             Dict with move details or None if no valid move
         """
-        if start_index >= len(data) - 1:
+        series = as_price_series(data)
+        if start_index >= len(series) - 1:
             return None
         
-        start_data = data[start_index]
-        start_date = start_data['date']
-        lod_price = start_data['low']
-        start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
+        # Jump straight to the termination point when the drawdown rules cannot fire
+        if range_index is None:
+            range_index = PriceRangeIndex(series)
+        resolved = self.move_engine.resolve(range_index, start_index)
+        if resolved is not None:
+            peak_price, peak_index, termination_reason = resolved
+            return self._build_move_result(series, start_index, peak_price, peak_index, [], False, None, termination_reason)
         
-        peak_price = lod_price
-        peak_date = start_date
-        peak_index = start_index
-        days_without_high = 0
-        drawdowns = []
-        continuation_occurred = False
-        new_lod_after_drawdown = None
+        return self._detect_growth_move_stepped(series, start_index)
+    
+    def _detect_growth_move_stepped(self, series: PriceSeries, start_index: int) -> Optional[Dict]:
+        """
+        Track a move bar by bar through every termination and drawdown rule
         
-        # Track the move with improved logic
-        move_terminated = False
+        detect_growth_move falls back to this when the range index cannot resolve
+        the move; tests use it as the reference for MoveEngine. The rules live in
+        MoveTracker, which the online detector steps in the same way.
+        """
+        if start_index >= len(series) - 1:
+            return None
+        
+        days = series.dates.tolist()
+        highs = series.high.tolist()
+        lows = series.low.tolist()
+        closes = series.close.tolist()
+        
+        tracker = MoveTracker(start_index, int(days[start_index]), float(lows[start_index]))
+        peak_index = start_index
+        drawdown_indices = []
         termination_reason = None
         
-        self.logger.debug(f"Starting move analysis for {start_date} at LOD price {lod_price}")
+        self.logger.debug(f"Starting move analysis for {series.date_str(start_index)} at LOD price {tracker.lod}")
         
-        for i in range(start_index + 1, len(data)):
-            current_data = data[i]
-            current_date = current_data['date']
-            current_high = current_data['high']
-            current_low = current_data['low']
-            current_close = current_data['close']
-            
-            current_datetime = datetime.strptime(current_date, '%Y-%m-%d')
-            days_since_start = (current_datetime - start_datetime).days
-            
-            # Check if we've exceeded time limits
-            if days_since_start > MAX_TOTAL_DAYS:
-                move_terminated = True
-                termination_reason = "Max total days exceeded"
-                self.logger.debug(f"Move terminated: {termination_reason} at {current_date}")
-                break
-            
-            # Update peak if we have a new high
-            if current_high > peak_price:
-                peak_price = current_high
-                peak_date = current_date
+        for i in range(start_index + 1, len(series)):
+            termination_reason = tracker.update(self, int(days[i]), float(highs[i]), float(lows[i]), float(closes[i]))
+            # The tracker keeps days; the move result needs the bar indices
+            if tracker.peak_day == days[i]:
                 peak_index = i
-                days_without_high = 0
-                self.logger.debug(f"New peak: {peak_price} at {peak_date}")
-            else:
-                days_without_high += 1
-            
-            # Calculate current drawdown from peak
-            current_drawdown = self.calculate_percentage_change(peak_price, current_close)
-            
-            # Check if price drops below LOD (this should terminate the move)
-            if current_low < lod_price:
-                move_terminated = True
-                termination_reason = "Price dropped below LOD"
-                self.logger.debug(f"Move terminated: {termination_reason} at {current_date} (low: {current_low}, LOD: {lod_price})")
+            if len(tracker.drawdowns) > len(drawdown_indices):
+                drawdown_indices.append(i)
+            if termination_reason is not None:
+                self.logger.debug(f"Move terminated: {termination_reason} at {series.date_str(i)}")
                 break
-            
-            # Check for drawdowns (15-29.9%) - FIX 2: Separate drawdown detection
-            if MIN_DRAWDOWN_PERCENTAGE <= current_drawdown < MAX_DRAWDOWN_PERCENTAGE:
-                # Check if this is a new drawdown or continuation of existing one
-                if not drawdowns or (current_datetime - datetime.strptime(drawdowns[-1]['date'], '%Y-%m-%d')).days > 1:
-                    drawdowns.append({
-                        'date': current_date,
-                        'drawdown': current_drawdown,
-                        'price': current_close
-                    })
-                    self.logger.debug(f"Drawdown detected: {current_drawdown:.1f}% at {current_date}")
-            
-            # Check for continuation (recovery to new high within 90 days of peak) - FIX 3: Proper continuation detection
-            if drawdowns and not continuation_occurred:
-                peak_datetime = datetime.strptime(peak_date, '%Y-%m-%d')
-                days_since_peak = (current_datetime - peak_datetime).days
-                
-                # Allow continuation if we recover to a new high within the continuation window
-                if days_since_peak <= CONTINUATION_WINDOW_DAYS and current_high > peak_price:
-                    continuation_occurred = True
-                    # Find the lowest point during the drawdown
-                    drawdown_prices = [d['price'] for d in drawdowns]
-                    if drawdown_prices:
-                        new_lod_after_drawdown = min(drawdown_prices)
-                    self.logger.debug(f"Continuation detected: new high {current_high} > peak {peak_price} at {current_date}")
-                
-                # Also check for continuation if we're still within the window and showing recovery signs
-                elif days_since_peak <= CONTINUATION_WINDOW_DAYS and current_drawdown < MIN_DRAWDOWN_PERCENTAGE:
-                    # If we're recovering from a drawdown and still within the window, mark as potential continuation
-                    if len(drawdowns) > 0:
-                        last_drawdown = drawdowns[-1]
-                        last_drawdown_datetime = datetime.strptime(last_drawdown['date'], '%Y-%m-%d')
-                        days_since_last_drawdown = (current_datetime - last_drawdown_datetime).days
-                        
-                        # If we're showing recovery within 30 days of the last drawdown, consider it a continuation
-                        if days_since_last_drawdown <= 30 and current_close > last_drawdown['price']:
-                            continuation_occurred = True
-                            self.logger.debug(f"Continuation detected: recovery from drawdown at {current_date}")
-            
-            # FIX 1: Restructure termination logic - don't terminate immediately on 30%+ drawdown
-            # Instead, continue tracking to capture the full drawdown and potential recovery
-            if current_drawdown >= MAX_DRAWDOWN_PERCENTAGE:
-                # Record this as a significant drawdown but don't terminate yet
-                if not any(d['date'] == current_date for d in drawdowns):
-                    drawdowns.append({
-                        'date': current_date,
-                        'drawdown': current_drawdown,
-                        'price': current_close
-                    })
-                    self.logger.debug(f"Major drawdown recorded: {current_drawdown:.1f}% at {current_date}")
-                
-                # Only terminate if we've gone too long without recovery
-                if days_without_high >= MAX_DAYS_WITHOUT_HIGH:
-                    move_terminated = True
-                    termination_reason = f"30+ days without new high after {current_drawdown:.1f}% drawdown"
-                    self.logger.debug(f"Move terminated: {termination_reason} at {current_date}")
-                    break
-            
-            # Check if we've gone too long without a new high (but allow for drawdown recovery)
-            if days_without_high >= MAX_DAYS_WITHOUT_HIGH:
-                # Only terminate if we're not in a significant drawdown recovery period
-                if current_drawdown < MIN_DRAWDOWN_PERCENTAGE:
-                    move_terminated = True
-                    termination_reason = f"30+ days without new high (drawdown: {current_drawdown:.1f}%)"
-                    self.logger.debug(f"Move terminated: {termination_reason} at {current_date}")
-                    break
-        
-        # Calculate final metrics
-        if peak_price > lod_price:
-            growth_percentage = self.calculate_percentage_change(lod_price, peak_price)
-            duration_days = (datetime.strptime(peak_date, '%Y-%m-%d') - start_datetime).days
-            
-            # Determine superperformance status
-            superperformance_status = self.classify_superperformance(growth_percentage, duration_days)
-            
-            self.logger.debug(f"Move completed: {growth_percentage:.1f}% growth over {duration_days} days")
-            self.logger.debug(f"Drawdowns found: {len(drawdowns)}")
-            self.logger.debug(f"Continuation: {continuation_occurred}")
-            
-            return {
-                'start_date': start_date,
-                'end_date': peak_date,
-                'start_price': lod_price,
-                'peak_price': peak_price,
-                'growth_percentage': growth_percentage,
-                'duration_days': duration_days,
-                'drawdowns': [d['date'] for d in drawdowns],
-                'continuation': continuation_occurred,
-                'superperformance': superperformance_status,
-                'new_lod_after_drawdown': new_lod_after_drawdown,
-                'termination_reason': termination_reason if move_terminated else None
-            }
         
-        return None
+        return self._build_move_result(
+            series,
+            start_index,
+            tracker.peak,
+            peak_index,
+            drawdown_indices,
+            tracker.continuation,
+            tracker.new_lod,
+            termination_reason
+        )
+    
+    def _build_move_result(
+        self,
+        series: PriceSeries,
+        start_index: int,
+        peak_price: float,
+        peak_index: int,
+        drawdown_indices: List[int],
+        continuation: bool,
+        new_lod_after_drawdown: Optional[float],
+        termination_reason: Optional[str]
+    ) -> Optional[Dict]:
+        """Turn the final state of a tracked move into the move dict (None if it never rose above the LOD)"""
+        lod_price = float(series.low[start_index])
+        if not peak_price > lod_price:
+            return None
+        
+        growth_percentage = self.calculate_percentage_change(lod_price, peak_price)
+        duration_days = int(series.dates[peak_index] - series.dates[start_index])
+        
+        # Determine superperformance status
+        superperformance_status = self.classify_superperformance(growth_percentage, duration_days)
+        
+        self.logger.debug(f"Move completed: {growth_percentage:.1f}% growth over {duration_days} days")
+        self.logger.debug(f"Drawdowns found: {len(drawdown_indices)}")
+        self.logger.debug(f"Continuation: {continuation}")
+        
+        return {
+            'start_date': series.date_str(start_index),
+            'end_date': series.date_str(peak_index),
+            'start_price': lod_price,
+            'peak_price': peak_price,
+            'growth_percentage': growth_percentage,
+            'duration_days': duration_days,
+            'drawdowns': [series.date_str(index) for index in drawdown_indices],
+            'continuation': continuation,
+            'superperformance': superperformance_status,
+            'new_lod_after_drawdown': new_lod_after_drawdown,
+            'termination_reason': termination_reason
+        }
     
     def classify_superperformance(self, growth_percentage: float, duration_days: int) -> str:
         """Classify the move as Growth, Superperformance, or None"""
@@ -245,53 +219,154 @@ class StockAnalyzer:
         
         return 'None'
     
-    def analyze_stock(self, ticker: str, data: List[Dict]) -> List[Dict]:
+    def can_superperform(self, data: Union[PriceSeries, List[Dict]], range_index: Optional[PriceRangeIndex] = None) -> bool:
+        """
+        Cheap check whether a ticker could produce any Growth or Superperformance move
+        
+        A qualifying move runs from some bar's low to a later high 64-252 days
+        (or 252-504 days) away with at least the Growth gain for that span. For
+        every bar this takes the highest high in each calendar window with one
+        sparse-table query and applies the same percentage formula and thresholds
+        as classify_superperformance. A real move's peak lies inside one of those
+        windows, so its gain can never exceed the bound tested here: a ticker
+        rejected by this check has no valid moves and analyze_stock can be skipped.
+        """
+        series = as_price_series(data).sorted_by_date()
+        n = len(series)
+        if n < GROWTH_MOVE_DAYS + 1:
+            return False
+        
+        # NaN highs would hide real peaks from the range maxima; don't filter such data
+        if np.isnan(series.high).any():
+            return True
+        
+        if range_index is None or range_index.series is not series:
+            range_index = PriceRangeIndex(series)
+        
+        days = series.dates
+        lows = series.low
+        
+        # Duration windows match classify_superperformance: [64, 252] and (252, 504]
+        spans = [
+            (64, 252, min(GROWTH_THRESHOLDS['growth_64_252'], GROWTH_THRESHOLDS['super_64_252'])),
+            (253, 504, min(GROWTH_THRESHOLDS['growth_252_504'], GROWTH_THRESHOLDS['super_252_504']))
+        ]
+        
+        for min_days, max_days, threshold in spans:
+            window_start = np.searchsorted(days, days + min_days, side='left')
+            window_end = np.searchsorted(days, days + max_days, side='right')
+            has_window = window_end > window_start
+            if not has_window.any():
+                continue
+            
+            starts = np.flatnonzero(has_window)
+            future_high = range_index.high_max.query_many(window_start[starts], window_end[starts])
+            start_lows = lows[starts]
+            
+            # Non-positive or missing lows fall outside the bound; keep them conservatively
+            with np.errstate(divide='ignore', invalid='ignore'):
+                growth = ((future_high - start_lows) / start_lows) * 100
+            if np.any((growth >= threshold) | ~(start_lows > 0)):
+                return True
+        
+        return False
+    
+    def analyze_stock(
+        self,
+        ticker: str,
+        data: Union[PriceSeries, List[Dict]],
+        window: int = GROWTH_MOVE_DAYS,
+        min_growth: float = MIN_GROWTH_PERCENTAGE
+    ) -> List[Dict]:
         """
         Analyze a stock for all growth moves
         
         Args:
             ticker: Stock ticker symbol
-            data: Historical OHLC data
+            data: Historical OHLC data as a PriceSeries (or legacy list of per-bar dicts)
+            window: Bars to look ahead when qualifying an LOD candidate
+            min_growth: Minimum percentage gain within `window` bars for a candidate
             
         Returns:
             List of growth move results
         """
-        if not data or len(data) < GROWTH_MOVE_DAYS + 1:
+        series = as_price_series(data)
+        if len(series) < window + 1:
             return []
         
         # Sort data by date
-        data = sorted(data, key=lambda x: x['date'])
+        series = series.sorted_by_date()
         
         # Find LOD candidates
-        lod_candidates = self.find_lowest_of_day_candidates(data)
+        lod_candidates = self.find_lowest_of_day_candidates(series, window, min_growth)
+        
+        # Track every candidate's move in one forward pass over the series
+        start_indices = [candidate['index'] for candidate in lod_candidates]
+        candidate_moves, _ = self.move_engine.sweep(series, start_indices)
         
         moves = []
-        processed_indices = set()
+        last_processed_index = None
         
-        for candidate in lod_candidates:
-            start_index = candidate['index']
-            
-            # Skip if we've already processed this area
-            if any(abs(start_index - idx) < 5 for idx in processed_indices):
+        for start_index, move in zip(start_indices, candidate_moves):
+            # Skip if we've already processed this area (candidates are in index order,
+            # so only the most recent accepted start can be within 5 bars)
+            if last_processed_index is not None and start_index - last_processed_index < 5:
                 continue
             
-            # Detect growth move
-            move = self.detect_growth_move(data, start_index)
-            
             if move:
-                # Format dates for output
-                move['ticker'] = ticker
-                move['start_date_formatted'] = self.format_date(move['start_date'])
-                move['end_date_formatted'] = self.format_date(move['end_date'])
-                move['drawdowns_formatted'] = [self.format_date(d) for d in move['drawdowns']]
-                move['continuation_formatted'] = 'Yes' if move['continuation'] else 'No'
-                move['superperformance_formatted'] = 'Yes' if move['superperformance'] in ['Growth', 'Superperformance'] else 'No'
-                
-                moves.append(move)
-                processed_indices.add(start_index)
+                moves.append(self.format_move(ticker, move))
+                last_processed_index = start_index
         
         return moves
     
+    def format_move(self, ticker: str, move: Dict) -> Dict:
+        """Add the ticker and the display fields to a move dict (in place) and return it"""
+        move['ticker'] = ticker
+        move['start_date_formatted'] = self.format_date(move['start_date'])
+        move['end_date_formatted'] = self.format_date(move['end_date'])
+        move['drawdowns_formatted'] = [self.format_date(d) for d in move['drawdowns']]
+        move['continuation_formatted'] = 'Yes' if move['continuation'] else 'No'
+        move['superperformance_formatted'] = 'Yes' if move['superperformance'] in ['Growth', 'Superperformance'] else 'No'
+        return move
+    
+    def average_volumes(
+        self,
+        data: Union[PriceSeries, List[Dict]],
+        windows: Tuple[int, ...] = VOLUME_WINDOWS,
+        as_of_date: Optional[str] = None
+    ) -> Dict[int, Optional[int]]:
+        """
+        Recent average daily volume over each window (in trading days)
+        
+        Computed from history that has already been fetched, so no API call is
+        needed. Days without reported volume are left out of each average, and a
+        ticker with fewer bars than a window is averaged over what it has. A
+        history ending more than VOLUME_MAX_STALE_DAYS before `as_of_date`
+        (default today) has no current volume.
+        """
+        series = as_price_series(data).sorted_by_date()
+        averages = {window: None for window in windows}
+        if not len(series):
+            return averages
+        
+        as_of_day = date_to_ordinal(as_of_date or datetime.now().strftime('%Y-%m-%d'))
+        if series.dates[-1] < as_of_day - VOLUME_MAX_STALE_DAYS:
+            return averages
+        
+        for window in windows:
+            recent = series.volume[-window:]
+            reported = recent[recent != 0]
+            if len(reported):
+                averages[window] = int(reported.mean())
+        
+        return averages
+    
+    def meets_volume_requirement(self, averages: Dict[int, Optional[int]], min_volume: int = MIN_DAILY_VOLUME) -> bool:
+        """True when every window's average volume is at least `min_volume`"""
+        return bool(averages) and all(
+            volume is not None and volume >= min_volume for volume in averages.values()
+        )
+    
     def filter_valid_moves(self, moves: List[Dict]) -> List[Dict]:
         """Filter moves to only include those that meet criteria"""
         valid_moves = []
@@ -316,7 +391,7 @@ class StockAnalyzer:
             move['continuation_formatted']
         ] 
 
-    def debug_move_analysis(self, ticker: str, data: List[Dict], start_index: int) -> Dict:
+    def debug_move_analysis(self, ticker: str, data: Union[PriceSeries, List[Dict]], start_index: int) -> Dict:
         """
         Debug method to analyze a single move with detailed logging
         
@@ -330,18 +405,18 @@ class StockAnalyzer:
         """
         self.logger.info(f"🔍 DEBUG: Analyzing move for {ticker} starting at index {start_index}")
         
-        if start_index >= len(data) - 1:
-            self.logger.warning(f"❌ DEBUG: Invalid start index {start_index} for data length {len(data)}")
+        series = as_price_series(data)
+        if start_index >= len(series) - 1:
+            self.logger.warning(f"❌ DEBUG: Invalid start index {start_index} for data length {len(series)}")
             return {}
         
-        start_data = data[start_index]
-        start_date = start_data['date']
-        lod_price = start_data['low']
+        start_date = series.date_str(start_index)
+        lod_price = float(series.low[start_index])
         
         self.logger.info(f"📊 DEBUG: LOD Date: {start_date}, LOD Price: {lod_price}")
         
         # Run the normal analysis
-        result = self.detect_growth_move(data, start_index)
+        result = self.detect_growth_move(series, start_index)
         
         if result:
             self.logger.info(f"✅ DEBUG: Move found for {ticker}")
@@ -0,0 +1,133 @@
+"""
+Symbol master for SuperPerformanceScreener
+A local, periodically refreshed copy of the exchange symbol lists, indexed by
+ticker code so exchange lookups and universe discovery need no API calls
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from config import SYMBOL_MASTER_FILE, SYMBOL_MASTER_TTL_HOURS, SYMBOL_MASTER_RETRY_MINUTES
+
+logger = logging.getLogger(__name__)
+
+# Exchanges the screener covers
+SCREENED_EXCHANGES = ('NYSE', 'NASDAQ')
+
+class SymbolMaster:
+    """
+    Symbol list for NYSE and NASDAQ, saved to disk and indexed by code
+
+    Built from the per-exchange symbol lists. When those come back empty, the
+    combined US list is used instead and each row's own Exchange field decides
+    where it belongs. The saved copy is reused until it is older than the TTL;
+    if a refresh fails, a stale copy is still better than none, and no new
+    refresh is tried until the retry cooldown has passed.
+    """
+
+    def __init__(self, path: str = SYMBOL_MASTER_FILE, ttl_hours: float = SYMBOL_MASTER_TTL_HOURS,
+                 retry_minutes: float = SYMBOL_MASTER_RETRY_MINUTES):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.retry_cooldown = timedelta(minutes=retry_minutes)
+        self.built_at: Optional[datetime] = None
+        self._last_attempt: Optional[datetime] = None
+        self.symbols: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.symbols
+
+    def is_fresh(self) -> bool:
+        """True when the symbols in memory are younger than the TTL"""
+        return self.built_at is not None and datetime.now() - self.built_at < self.ttl
+
+    def load(self) -> bool:
+        """Read the saved symbol master from disk; returns False if there is none"""
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        self.built_at = datetime.fromisoformat(saved['built_at'])
+        self.symbols = {row['code']: row for row in saved['symbols']}
+        return True
+
+    def save(self):
+        """Write the symbol master to disk atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'built_at': self.built_at.isoformat(),
+                'symbols': list(self.symbols.values())
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, client) -> bool:
+        """Rebuild from the EODHD symbol lists and save; returns False if nothing came back"""
+        rows = []
+        for exchange in SCREENED_EXCHANGES:
+            rows.extend(dict(row, Exchange=row.get('Exchange') or exchange)
+                        for row in client.get_exchange_symbols(exchange))
+        if not rows:
+            rows = client.get_exchange_symbols('US')
+
+        symbols = {}
+        for row in rows:
+            code = row.get('Code')
+            if not code or code in symbols:
+                continue
+            symbols[code] = {
+                'code': code,
+                'exchange': (row.get('Exchange') or '').upper(),
+                'name': row.get('Name') or '',
+                'type': row.get('Type') or ''
+            }
+
+        if not symbols:
+            logger.warning("Symbol lists came back empty; keeping the existing symbol master")
+            return False
+
+        self.symbols = symbols
+        self.built_at = datetime.now()
+        self.save()
+        logger.info(f"Symbol master rebuilt with {len(symbols)} symbols")
+        return True
+
+    def ensure(self, client) -> bool:
+        """Make sure usable symbols are loaded, refreshing them when they are missing or expired"""
+        if self.is_fresh():
+            return True
+        # A refresh failed recently: serve whatever is loaded until the cooldown expires
+        if self._last_attempt is not None and datetime.now() - self._last_attempt < self.retry_cooldown:
+            return bool(self.symbols)
+        if self.load() and self.is_fresh():
+            return True
+        if self.refresh(client):
+            self._last_attempt = None
+            return True
+        self._last_attempt = datetime.now()
+        return bool(self.symbols)
+
+    def exchange_of(self, code: str) -> Optional[str]:
+        """Exchange a ticker is listed on (None if it is not in the symbol master)"""
+        row = self.symbols.get(code)
+        return row['exchange'] if row else None
+
+    def universe(self, exchanges: Tuple[str, ...] = SCREENED_EXCHANGES,
+                 types: Tuple[str, ...] = ('Common Stock',)) -> List[Tuple[str, str]]:
+        """(ticker, exchange) pairs for every listed symbol of the given types, sorted by ticker"""
+        return sorted(
+            (row['code'], row['exchange'])
+            for row in self.symbols.values()
+            if row['exchange'] in exchanges and (not types or row['type'] in types)
+        )
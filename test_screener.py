@@ -2,12 +2,61 @@
 Unit tests for SuperPerformanceScreener
 Tests the core logic for growth move detection and superperformance classification
 """
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 from datetime import datetime, timedelta
 from typing import List, Dict
 
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from aiohttp import web
+
 from stock_analyzer import StockAnalyzer
-from config import GROWTH_THRESHOLDS
+from price_series import PriceSeries, date_to_ordinal
+from range_index import PriceRangeIndex, SparseTable
+from eod_decode import loads, parse_eod_csv
+from history_cache import HistoryCache
+from history_store import HistoryStore
+from bulk_ingest import bulk_refresh
+from symbol_master import SymbolMaster
+from pipeline import Pipeline, Stage
+from checkpoint import CheckpointJournal, ANALYZED, LOW_VOLUME
+from incremental import MoveStateStore, analyze_incremental, analyze_tail, state_applies
+from online_detector import TickerDetector, OnlineDetector, TERMINATED_EVENT
+from result_store import ResultStore
+from consolidation import consolidate_ticker, consolidate_moves
+from sharding import parse_shard, shard_of, select_shard, shard_path, write_shard_results, load_shard_results
+from response_cache import ResponseCache
+from single_flight import SingleFlight, AsyncSingleFlight
+from rate_governor import RateGovernor, parse_retry_after
+from async_eodhd_client import AsyncEODHDClient
+from eodhd_client import EODHDClient
+from comprehensive_screener import ComprehensiveScreener
+from config import GROWTH_THRESHOLDS, MAX_RETRIES, HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+def _unpickle_or_kill_worker(marker_path, columns):
+    """Kill the worker process unpickling this history the first time, rebuild it afterwards"""
+    if not os.path.exists(marker_path):
+        open(marker_path, 'w').close()
+        os._exit(1)
+    return PriceSeries(*columns)
+
+class WorkerKillingSeries(PriceSeries):
+    """History that takes down the first pool worker it is sent to, as an out-of-memory kill would"""
+    
+    __slots__ = ('marker_path',)
+    
+    def __reduce__(self):
+        return _unpickle_or_kill_worker, (self.marker_path, tuple(getattr(self, name) for name in PriceSeries.__slots__))
 
 class TestStockAnalyzer(unittest.TestCase):
     """Test cases for StockAnalyzer"""
@@ -57,6 +106,37 @@ class TestStockAnalyzer(unittest.TestCase):
         
         return data
     
+    def _generate_random_walk_data(self, seed: int, days: int = 1500, close_spikes: bool = False) -> List[Dict]:
+        """Generate a reproducible random walk; close_spikes adds closes above the high to trigger drawdown logic"""
+        rng = random.Random(seed)
+        data = []
+        price = 20.0
+        current_date = datetime(2005, 1, 3)
+        volatility = rng.choice([0.01, 0.03, 0.06])
+        
+        for i in range(days):
+            price = max(price * (1 + rng.gauss(0.001, volatility)), 0.5)
+            open_price = price * (1 + rng.gauss(0, volatility / 2))
+            close = price * (1 + rng.gauss(0, volatility / 2))
+            high = max(open_price, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+            low = min(open_price, close) * (1 - abs(rng.gauss(0, volatility / 2)))
+            if close_spikes and rng.random() < 0.02:
+                close = high * rng.uniform(1.0, 1.6)
+            
+            data.append({
+                'date': current_date.strftime('%Y-%m-%d'),
+                'open': open_price,
+                'high': high,
+                'low': low,
+                'close': close,
+                'volume': rng.randint(0, 1000000)
+            })
+            
+            # Skip weekends and the odd holiday
+            current_date += timedelta(days=rng.choice([1, 1, 1, 1, 3, 4]))
+        
+        return data
+    
     def test_calculate_percentage_change(self):
         """Test percentage change calculation"""
         # Test normal case
@@ -176,6 +256,21 @@ class TestStockAnalyzer(unittest.TestCase):
             # Verify growth is at least 5%
             self.assertGreaterEqual(candidate['growth'], 5.0)
     
+    def test_find_lowest_of_day_candidates_matches_naive_scan(self):
+        """Test the vectorized candidate scan against a per-bar window scan"""
+        data = self.sample_data
+        
+        for window, min_growth in [(5, 5.0), (10, 3.0), (1, 1.0)]:
+            expected = []
+            for i in range(len(data) - window):
+                future_high = max(d['high'] for d in data[i+1:i+window+1])
+                growth = self.analyzer.calculate_percentage_change(data[i]['low'], future_high)
+                if growth >= min_growth:
+                    expected.append((i, growth))
+            
+            candidates = self.analyzer.find_lowest_of_day_candidates(data, window, min_growth)
+            self.assertEqual([(c['index'], c['growth']) for c in candidates], expected)
+    
     def test_detect_growth_move(self):
         """Test growth move detection"""
         # Create test data with a clear growth move
@@ -213,6 +308,104 @@ class TestStockAnalyzer(unittest.TestCase):
             self.assertIn('end_date', move)
             self.assertIn('superperformance', move)
     
+    def test_move_engine_matches_detect_growth_move(self):
+        """Test that the single-sweep engine reproduces per-candidate results exactly"""
+        for seed, close_spikes in [(1, False), (2, True), (3, True)]:
+            series = PriceSeries.from_records(self._generate_random_walk_data(seed, close_spikes=close_spikes))
+            start_indices = [c['index'] for c in self.analyzer.find_lowest_of_day_candidates(series)]
+            
+            moves, terminated = self.analyzer.move_engine.sweep(series, start_indices)
+            
+            self.assertEqual(len(moves), len(start_indices))
+            for start_index, move, done in zip(start_indices, moves, terminated):
+                # The bar-by-bar loop, never shortcut through the range index
+                expected = self.analyzer._detect_growth_move_stepped(series, start_index)
+                self.assertEqual(move, expected)
+                self.assertEqual(self.analyzer.detect_growth_move(series, start_index), expected)
+                if expected:
+                    self.assertEqual(bool(done), expected['termination_reason'] is not None)
+    
+    def test_sparse_table_queries(self):
+        """Test range max/min and first-crossing searches against direct scans"""
+        rng = random.Random(7)
+        values = [rng.uniform(0, 100) for _ in range(300)]
+        max_table = SparseTable(values, 'max')
+        min_table = SparseTable(values, 'min')
+        
+        for _ in range(200):
+            start = rng.randrange(0, 299)
+            end = rng.randrange(start + 1, 301)
+            threshold = rng.uniform(0, 100)
+            
+            self.assertEqual(max_table.query(start, end), max(values[start:end]))
+            self.assertEqual(min_table.query(start, end), min(values[start:end]))
+            self.assertEqual(
+                max_table.first_index(start, end, threshold),
+                next((i for i in range(start, end) if values[i] > threshold), end)
+            )
+            self.assertEqual(
+                min_table.first_index(start, end, threshold),
+                next((i for i in range(start, end) if values[i] < threshold), end)
+            )
+        
+        starts = [0, 5, 17, 250]
+        ends = [1, 64, 300, 251]
+        self.assertEqual(
+            max_table.query_many(starts, ends).tolist(),
+            [max(values[a:b]) for a, b in zip(starts, ends)]
+        )
+    
+    def test_range_index_jumps_match_bar_stepping(self):
+        """Test that moves resolved by range-index jumps match the bar-by-bar state machine"""
+        engine = self.analyzer.move_engine
+        for seed, close_spikes in [(4, False), (2, True), (3, True), (5, True)]:
+            series = PriceSeries.from_records(self._generate_random_walk_data(seed, close_spikes=close_spikes))
+            range_index = PriceRangeIndex(series)
+            start_indices = [c['index'] for c in self.analyzer.find_lowest_of_day_candidates(series)]
+            
+            vectorized_moves, _ = engine._sweep_bars(series, start_indices)
+            
+            resolved_count = 0
+            for start_index, vectorized in zip(start_indices, vectorized_moves):
+                expected = self.analyzer._detect_growth_move_stepped(series, start_index)
+                self.assertEqual(vectorized, expected)
+                
+                resolved = engine.resolve(range_index, start_index)
+                if resolved is not None:
+                    resolved_count += 1
+                    peak_price, peak_index, termination_reason = resolved
+                    self.assertEqual(
+                        self.analyzer._build_move_result(series, start_index, peak_price, peak_index,
+                                                         [], False, None, termination_reason),
+                        expected
+                    )
+            
+            # Clean data never needs the bar-by-bar fallback; close spikes sometimes do
+            if not close_spikes:
+                self.assertEqual(resolved_count, len(start_indices))
+            else:
+                self.assertGreater(resolved_count, 0)
+    
+    def test_can_superperform_is_conservative(self):
+        """Test that the feasibility pre-filter never rejects a ticker with valid moves"""
+        for seed in range(12):
+            data = self._generate_random_walk_data(seed, close_spikes=seed % 2 == 0)
+            valid_moves = self.analyzer.filter_valid_moves(self.analyzer.analyze_stock('TEST', data))
+            if valid_moves:
+                self.assertTrue(self.analyzer.can_superperform(data))
+        
+        # A flat ticker can never qualify
+        flat = [
+            {'date': (datetime(2019, 1, 1) + timedelta(days=i)).strftime('%Y-%m-%d'),
+             'open': 100, 'high': 101, 'low': 99, 'close': 100}
+            for i in range(600)
+        ]
+        self.assertFalse(self.analyzer.can_superperform(flat))
+        
+        # Linear 400% growth over a year is feasible
+        nvda_data = self._generate_example_data('NVDA', '2016-02-11', '2017-02-07', 400.0)
+        self.assertTrue(self.analyzer.can_superperform(nvda_data))
+    
     def test_analyze_stock(self):
         """Test complete stock analysis"""
         # Test with sample data
@@ -233,6 +426,947 @@ class TestStockAnalyzer(unittest.TestCase):
             for field in required_fields:
                 self.assertIn(field, move)
     
+    def test_price_series_adapter(self):
+        """Test that columnar and legacy dict-list inputs give identical results"""
+        series = PriceSeries.from_records(self.sample_data)
+        
+        self.assertEqual(len(series), len(self.sample_data))
+        self.assertEqual(series.date_str(0), '2019-01-01')
+        self.assertEqual(series.to_records()[10]['high'], self.sample_data[10]['high'])
+        
+        # Both input formats should produce the same moves
+        self.assertEqual(
+            self.analyzer.analyze_stock('TEST', series),
+            self.analyzer.analyze_stock('TEST', self.sample_data)
+        )
+        
+        # Out-of-order bars are sorted before analysis
+        shuffled = PriceSeries.from_records(self.sample_data[::-1])
+        self.assertEqual(
+            self.analyzer.analyze_stock('TEST', shuffled),
+            self.analyzer.analyze_stock('TEST', series)
+        )
+    
+    def test_average_volumes_from_history(self):
+        """Test windowed volume averages computed from fetched history"""
+        data = self._generate_random_walk_data(3, days=200)
+        for bar in data[-5:]:
+            bar['volume'] = 0  # days without reported volume are left out
+        series = PriceSeries.from_records(data)
+        as_of = series.date_str(-1)
+        
+        averages = self.analyzer.average_volumes(series, windows=(10, 50, 500), as_of_date=as_of)
+        for window, average in averages.items():
+            recent = [bar['volume'] for bar in data[-window:] if bar['volume'] > 0]
+            self.assertEqual(average, int(sum(recent) / len(recent)))
+        
+        self.assertTrue(self.analyzer.meets_volume_requirement(averages, min_volume=min(averages.values())))
+        self.assertFalse(self.analyzer.meets_volume_requirement(averages, min_volume=max(averages.values()) + 1))
+        
+        # A window of nothing but zero-volume days, or a stale history, has no volume
+        self.assertIsNone(self.analyzer.average_volumes(series, windows=(5,), as_of_date=as_of)[5])
+        self.assertEqual(self.analyzer.average_volumes(series, windows=(10,), as_of_date='2030-01-01'), {10: None})
+        self.assertFalse(self.analyzer.meets_volume_requirement({10: None}))
+    
+    def test_history_cache_serves_sub_ranges(self):
+        """Test that the history cache slices covered ranges and reports only missing edges"""
+        series = PriceSeries.from_records(self.sample_data)
+        cache = HistoryCache()
+        first, last = int(series.dates[0]), int(series.dates[-1])
+        
+        # Cache the middle of the history, then a contained range is a plain slice
+        cache.store('TEST', first + 100, first + 300, series.between(first + 100, first + 300))
+        self.assertEqual(cache.missing('TEST', first + 150, first + 200), [])
+        sub_range = cache.get('TEST', first + 150, first + 200)
+        self.assertEqual(sub_range.dates.tolist(), series.between(first + 150, first + 200).dates.tolist())
+        
+        # A wider request only needs the edges on either side
+        gaps = cache.missing('TEST', first, last)
+        self.assertEqual(gaps, [(first, first + 99), (first + 301, last)])
+        self.assertIsNone(cache.get('TEST', first, last))
+        
+        for gap_start, gap_end in gaps:
+            cache.store('TEST', gap_start, gap_end, series.between(gap_start, gap_end))
+        self.assertEqual(cache.coverage('TEST'), (first, last))
+        self.assertEqual(cache.get('TEST', first, last).to_records(), series.to_records())
+    
+    def test_history_store_appends_only_new_bars(self):
+        """Test that the on-disk store maps stored bars and appends only newer ones"""
+        series = PriceSeries.from_records(self.sample_data)
+        
+        with tempfile.TemporaryDirectory() as root:
+            store = HistoryStore(root)
+            self.assertIsNone(store.load('TEST'))
+            
+            store.write('TEST', series.take(slice(0, 300)), int(series.dates[0]))
+            
+            # Overlapping bars are ignored, only those after the last stored date are added
+            self.assertEqual(store.append('TEST', series.take(slice(250, 400))), 100)
+            self.assertEqual(store.append('TEST', series.take(slice(0, 400))), 0)
+            
+            loaded = store.load('TEST')
+            self.assertIsInstance(loaded.high.base, np.memmap)  # mapped, not copied
+            self.assertEqual(loaded.to_records(), series.take(slice(0, 400)).to_records())
+            self.assertEqual(store.span('TEST'), (int(series.dates[0]), int(series.dates[399])))
+            
+            # A cache backed by the store only has to fetch bars after the last stored day
+            cache = HistoryCache(store)
+            self.assertEqual(
+                cache.missing('TEST', int(series.dates[0]), int(series.dates[-1])),
+                [(int(series.dates[399]) + 1, int(series.dates[-1]))]
+            )
+    
+    def test_bulk_refresh_appends_recent_days(self):
+        """Test that a bulk refresh appends recent days and backfills stale tickers per ticker"""
+        # Exchanges only trade on weekdays
+        series = PriceSeries.from_records(self.sample_data)
+        series = series.take(np.is_busday(series.dates.astype('datetime64[D]')))
+        last = len(series) - 1
+        
+        class FakeClient:
+            def __init__(self, store):
+                self.history_cache = HistoryCache(store)
+                self.history_requests = []
+            
+            def get_bulk_last_day(self, exchange='US', date=None):
+                index = last if date is None else int(np.searchsorted(series.dates, date_to_ordinal(date)))
+                if index > last or series.date_str(index) != (date or series.date_str(last)):
+                    return {}
+                return {'NEAR': series.take(slice(index, index + 1)), 'FAR': series.take(slice(index, index + 1))}
+            
+            def get_historical_data(self, ticker, start_date, end_date):
+                self.history_requests.append(ticker)
+                for gap in self.history_cache.missing(ticker, date_to_ordinal(start_date), date_to_ordinal(end_date)):
+                    self.history_cache.store(ticker, gap[0], gap[1], series.between(*gap))
+                return self.history_cache.get(ticker, date_to_ordinal(start_date), date_to_ordinal(end_date))
+        
+        with tempfile.TemporaryDirectory() as root:
+            store = HistoryStore(root)
+            store.write('NEAR', series.take(slice(0, last - 2)), int(series.dates[0]))
+            store.write('FAR', series.take(slice(0, last - 30)), int(series.dates[0]))
+            client = FakeClient(store)
+            
+            summary = bulk_refresh(client, ['NEAR', 'FAR', 'NEW'], max_days=5)
+            
+            self.assertEqual(summary['as_of'], series.date_str(last))
+            self.assertEqual((summary['refreshed'], summary['backfilled'], summary['not_stored']), (1, 1, 1))
+            self.assertEqual(client.history_requests, ['FAR'])
+            for ticker in ['NEAR', 'FAR']:
+                self.assertEqual(store.load(ticker).to_records(), series.to_records())
+
+    def test_bulk_refresh_covers_holidays(self):
+        """Test that a holiday's empty bulk day counts as covered while a failed bulk request does not"""
+        series = PriceSeries.from_records(self.sample_data)
+        series = series.take(np.is_busday(series.dates.astype('datetime64[D]')))
+        last = len(series) - 1
+        holiday = int(series.dates[last - 2])
+        series = series.take(series.dates != holiday)
+        last -= 1
+
+        class FakeClient:
+            def __init__(self, store, failed_day=None):
+                self.history_cache = HistoryCache(store)
+                self.failed_day = failed_day
+                self.history_requests = []
+
+            def get_bulk_last_day(self, exchange='US', date=None):
+                day = int(series.dates[last]) if date is None else date_to_ordinal(date)
+                if day == self.failed_day:
+                    return None
+                bars = series.between(day, day)
+                return {'AAA': bars, 'BBB': bars} if len(bars) else {}
+
+            def get_historical_data(self, ticker, start_date, end_date):
+                self.history_requests.append(ticker)
+                for gap in self.history_cache.missing(ticker, date_to_ordinal(start_date), date_to_ordinal(end_date)):
+                    self.history_cache.store(ticker, gap[0], gap[1], series.between(*gap))
+                return self.history_cache.get(ticker, date_to_ordinal(start_date), date_to_ordinal(end_date))
+
+        for failed_day, bulk_refreshed, backfilled in [(None, 2, 0), (int(series.dates[last - 1]), 0, 2)]:
+            with tempfile.TemporaryDirectory() as root:
+                store = HistoryStore(root)
+                for ticker in ['AAA', 'BBB']:
+                    store.write(ticker, series.take(slice(0, last - 3)), int(series.dates[0]))
+                client = FakeClient(store, failed_day)
+
+                summary = bulk_refresh(client, ['AAA', 'BBB'], max_days=5)
+
+                self.assertEqual((summary['refreshed'], summary['backfilled']), (bulk_refreshed, backfilled))
+                self.assertEqual(len(client.history_requests), backfilled)
+                for ticker in ['AAA', 'BBB']:
+                    self.assertEqual(store.load(ticker).to_records(), series.to_records())
+
+    def test_symbol_master_index(self):
+        """Test that the symbol master indexes the exchange lists and reuses its saved copy"""
+        class FakeClient:
+            def __init__(self):
+                self.requests = 0
+            
+            def get_exchange_symbols(self, exchange):
+                self.requests += 1
+                # Only the combined US list is available, as with the real API
+                if exchange != 'US':
+                    return []
+                return [
+                    {'Code': 'AAPL', 'Exchange': 'NASDAQ', 'Type': 'Common Stock', 'Name': 'Apple Inc'},
+                    {'Code': 'KO', 'Exchange': 'NYSE', 'Type': 'Common Stock', 'Name': 'Coca-Cola Co'},
+                    {'Code': 'SPY', 'Exchange': 'NYSE ARCA', 'Type': 'ETF', 'Name': 'SPDR S&P 500'},
+                    {'Code': 'KO', 'Exchange': 'NYSE', 'Type': 'Common Stock', 'Name': 'Coca-Cola Co'}
+                ]
+        
+        with tempfile.TemporaryDirectory() as root:
+            client = FakeClient()
+            master = SymbolMaster(os.path.join(root, 'symbols.json'), ttl_hours=24)
+            self.assertTrue(master.ensure(client))
+            self.assertEqual(client.requests, 3)
+            
+            self.assertEqual(master.exchange_of('KO'), 'NYSE')
+            self.assertEqual(master.exchange_of('SPY'), 'NYSE ARCA')
+            self.assertIsNone(master.exchange_of('ZZZZ'))
+            self.assertEqual(master.universe(), [('AAPL', 'NASDAQ'), ('KO', 'NYSE')])
+            
+            # A second instance within the TTL loads from disk without any requests
+            reloaded = SymbolMaster(os.path.join(root, 'symbols.json'), ttl_hours=24)
+            self.assertTrue(reloaded.ensure(client))
+            self.assertEqual(client.requests, 3)
+            self.assertEqual(reloaded.universe(), master.universe())
+            
+            # An expired copy is rebuilt
+            expired = SymbolMaster(os.path.join(root, 'symbols.json'), ttl_hours=0)
+            self.assertTrue(expired.ensure(client))
+            self.assertEqual(client.requests, 6)
+
+    def test_exchange_lookup_uses_only_the_symbol_master(self):
+        """Test that exchange lookups are answered from the symbol master without API requests"""
+        governor = RateGovernor(rate=1000.0, burst=100, min_rate=100.0, max_rate=1000.0)
+
+        with tempfile.TemporaryDirectory() as root:
+            master = SymbolMaster(os.path.join(root, 'symbols.json'))
+            master.symbols = {'KO': {'code': 'KO', 'exchange': 'NYSE', 'name': 'Coca-Cola Co', 'type': 'Common Stock'}}
+            master.built_at = datetime.now()
+            client = EODHDClient('test_api_key_123', governor=governor, symbol_master=master)
+
+            with mock.patch.object(client, '_make_request') as make_request:
+                self.assertEqual(client.get_stock_exchange('KO'), 'NYSE')
+                # Unlisted tickers, even well-known ones, are not looked up again
+                self.assertIsNone(client.get_stock_exchange('ZZZZ'))
+                self.assertIsNone(client.get_stock_exchange('AAPL'))
+            make_request.assert_not_called()
+
+        # Without a symbol master the built-in list and the API are still used
+        client = EODHDClient('test_api_key_123', governor=governor)
+        with mock.patch.object(client, '_make_request', return_value=[{'Code': 'ZZZZ', 'Exchange': 'NASDAQ'}]) as make_request:
+            self.assertEqual(client.get_stock_exchange('AAPL'), 'NASDAQ')
+            make_request.assert_not_called()
+            self.assertEqual(client.get_stock_exchange('ZZZZ'), 'NASDAQ')
+            make_request.assert_called_once_with('search', {'q': 'ZZZZ'})
+
+    def test_symbol_master_backs_off_after_failed_refresh(self):
+        """Test that a failed refresh is not retried on every lookup until the cooldown expires"""
+        class EmptyClient:
+            def __init__(self):
+                self.requests = 0
+
+            def get_exchange_symbols(self, exchange):
+                self.requests += 1
+                return []
+
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'symbols.json')
+            client = EmptyClient()
+
+            # Nothing saved and nothing from the API: one refresh attempt, then none during the cooldown
+            master = SymbolMaster(path, ttl_hours=24, retry_minutes=30)
+            self.assertFalse(master.ensure(client))
+            self.assertEqual(client.requests, 3)
+            for _ in range(100):
+                self.assertFalse(master.ensure(client))
+            self.assertEqual(client.requests, 3)
+
+            # A stale saved copy keeps being served while the API is down
+            master.symbols = {'KO': {'code': 'KO', 'exchange': 'NYSE', 'name': 'Coca-Cola Co', 'type': 'Common Stock'}}
+            master.built_at = datetime.now() - timedelta(days=2)
+            master.save()
+            stale = SymbolMaster(path, ttl_hours=24, retry_minutes=30)
+            self.assertTrue(stale.ensure(client))
+            self.assertEqual(client.requests, 6)
+            for _ in range(100):
+                self.assertEqual(stale.exchange_of('KO') if stale.ensure(client) else None, 'NYSE')
+            self.assertEqual(client.requests, 6)
+
+            # Once the cooldown has passed the lists are requested again
+            stale._last_attempt -= timedelta(minutes=31)
+            self.assertTrue(stale.ensure(client))
+            self.assertEqual(client.requests, 9)
+
+    def test_response_cache_ttl_and_eviction(self):
+        """Test per-endpoint TTLs, revalidation metadata and size-bounded eviction"""
+        with tempfile.TemporaryDirectory() as root:
+            cache = ResponseCache(root, max_bytes=4000, ttls={'search': 3600, 'fundamentals': 0})
+            
+            # Endpoints without a TTL (e.g. price history) are never cached
+            cache.put('eod/AAPL.US', {'from': '2020-01-01'}, [1, 2, 3])
+            self.assertIsNone(cache.get('eod/AAPL.US', {'from': '2020-01-01'}))
+            
+            # The API token is not part of the key
+            cache.put('search', {'q': 'AAPL', 'api_token': 'secret'}, [{'Code': 'AAPL'}], etag='"v1"')
+            entry = cache.get('search', {'q': 'AAPL'})
+            self.assertTrue(entry['fresh'])
+            self.assertEqual((entry['body'], entry['etag']), ([{'Code': 'AAPL'}], '"v1"'))
+            
+            # Expired entries are still returned, with their validators, for revalidation
+            cache.put('fundamentals/AAPL.US', None, {'General': {}}, last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+            stale = cache.get('fundamentals/AAPL.US')
+            self.assertFalse(stale['fresh'])
+            self.assertEqual(stale['last_modified'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+            
+            for i in range(40):
+                cache.put('search', {'q': f'T{i}'}, ['x' * 200])
+            total = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+            self.assertLessEqual(total, 4000)
+            self.assertIsNotNone(cache.get('search', {'q': 'T39'}))
+    
+    def test_parse_eod_csv_into_columns(self):
+        """Test that CSV history decodes into the same columns as the JSON records"""
+        body = (
+            b"Date,Open,High,Low,Close,Adjusted_close,Volume\n"
+            b"2024-01-03,10.5,11,10.25,10.75,10.75,120000\n"
+            b"2024-01-02,10,10.8,9.9,10.5,10.5,98000\n"
+            b"\n"
+        )
+        series = parse_eod_csv(body)
+        expected = PriceSeries.from_records([
+            {'date': '2024-01-02', 'open': 10, 'high': 10.8, 'low': 9.9, 'close': 10.5, 'volume': 98000},
+            {'date': '2024-01-03', 'open': 10.5, 'high': 11, 'low': 10.25, 'close': 10.75, 'volume': 120000}
+        ])
+        
+        self.assertEqual(len(series), 2)
+        for column in PriceSeries.__slots__:
+            np.testing.assert_array_equal(getattr(series, column), getattr(expected, column))
+        self.assertEqual(len(parse_eod_csv(b"Date,Open,High,Low,Close,Adjusted_close,Volume\n")), 0)
+        
+        # Rows that don't parse are dropped and an empty volume reads as zero
+        stray = parse_eod_csv(body + b"2024-01-04,10.75,11.2,10.5,11,11,\nbad,1,1,1,1,1,1\nData by EODHD\n")
+        self.assertEqual(stray.dates.tolist(), expected.dates.tolist() + [date_to_ordinal('2024-01-04')])
+        self.assertEqual(stray.volume.tolist(), [98000, 120000, 0])
+        with self.assertRaises(ValueError):
+            parse_eod_csv(b'{"error": "Ticker not found"}')
+        self.assertEqual(loads(b'[{"code": "AAPL"}]'), [{'code': 'AAPL'}])
+    
+    def test_pipeline_streams_through_bounded_stages(self):
+        """Test that the pipeline filters, reports errors and bounds the items in flight"""
+        def fetch(i):
+            if i == 13:
+                raise ValueError('bad ticker')
+            return i if i % 2 == 0 else None
+        
+        results, errors = [], []
+        pipeline = Pipeline(
+            [Stage('fetch', fetch, workers=3, queue_size=4), Stage('analyze', lambda i: i * 10, workers=2, queue_size=4)],
+            sink_queue_size=4,
+            on_error=lambda stage, item, error: errors.append((stage, item))
+        )
+        emitted = pipeline.run(range(200), results.append)
+        
+        self.assertEqual(emitted, 100)
+        self.assertEqual(sorted(results), [i * 10 for i in range(0, 200, 2)])
+        self.assertEqual(errors, [('fetch', 13)])
+        self.assertEqual(pipeline.errors, 1)
+        self.assertEqual(pipeline.stats['fetch']['dropped'], 99)
+        
+        # A slow sink holds the source back: only the queues and workers hold items
+        counts = {'fed': 0, 'sunk': 0, 'most_waiting': 0}
+        
+        def source():
+            for i in range(100):
+                counts['fed'] += 1
+                counts['most_waiting'] = max(counts['most_waiting'], counts['fed'] - counts['sunk'])
+                yield i
+        
+        def slow_sink(value):
+            time.sleep(0.001)
+            counts['sunk'] += 1
+        
+        Pipeline(
+            [Stage('fetch', lambda i: i, workers=3, queue_size=4), Stage('analyze', lambda i: i, workers=2, queue_size=4)],
+            sink_queue_size=4
+        ).run(source(), slow_sink)
+        self.assertEqual(counts['sunk'], 100)
+        self.assertLessEqual(counts['most_waiting'], 4 + 3 + 4 + 2 + 4 + 2)
+        
+        def failing_source():
+            yield 1
+            raise RuntimeError('discovery failed')
+        with self.assertRaises(RuntimeError):
+            Pipeline([Stage('fetch', lambda i: i)]).run(failing_source(), lambda value: None)
+    
+    def _comprehensive_screener(self, root, **kwargs):
+        """ComprehensiveScreener with a test API key and its caches under `root` (Google Sheets unconfigured)"""
+        kwargs.setdefault('history_store_dir', None)
+        kwargs.setdefault('checkpoint_path', None)
+        with mock.patch('eodhd_client.EODHD_API_KEY', 'test_api_key_123'), \
+             mock.patch('main.ResponseCache', lambda: ResponseCache(os.path.join(root, 'responses'))):
+            return ComprehensiveScreener(**kwargs)
+    
+    def test_process_pool_matches_sequential_run(self):
+        """Test that worker-pool analysis matches the sequential run and survives failing tickers and dead workers"""
+        histories = {
+            f"T{seed}": PriceSeries.from_records(self._generate_random_walk_data(seed, close_spikes=seed % 2 == 0))
+            for seed in range(6)
+        }
+        as_of_date = histories['T0'].date_str(-1)
+
+        # Analysis of BAD raises (object prices); DIES kills the first worker it is sent to
+        bad = PriceSeries.from_records(self._generate_random_walk_data(6))
+        bad.high = bad.high.astype(object)
+        histories['BAD'] = bad
+        stocks = [(ticker, 'NYSE') for ticker in sorted(histories)] + [('DIES', 'NASDAQ')]
+
+        def run(root, workers):
+            screener = self._comprehensive_screener(root, workers=workers, fetch_workers=1, result_store_path=None)
+            dies = WorkerKillingSeries(*(getattr(histories['T0'], name) for name in PriceSeries.__slots__))
+            dies.marker_path = os.path.join(root, 'worker_killed')
+            screener.screener.eodhd_client.get_historical_data = \
+                lambda ticker, start_date, end_date: dies if ticker == 'DIES' else histories[ticker]
+            screener.get_all_exchange_stocks = lambda: stocks
+            screener.export_results = lambda: None
+            screener.as_of_date = as_of_date
+            screener.run_comprehensive_analysis()
+            return screener
+
+        with tempfile.TemporaryDirectory() as root:
+            sequential = run(os.path.join(root, 'sequential'), workers=1)
+            pooled = run(os.path.join(root, 'pooled'), workers=2)
+            self.assertTrue(os.path.exists(os.path.join(root, 'pooled', 'worker_killed')))
+
+        def key(move):
+            return move['ticker'], move['start_date'], move['end_date']
+
+        self.assertTrue(sequential.results)
+        self.assertEqual(sorted(pooled.results, key=key), sorted(sequential.results, key=key))
+        self.assertTrue(any(move['ticker'] == 'DIES' for move in pooled.results))
+        self.assertEqual(sequential.error_count, 1)
+        self.assertEqual((pooled.processed_count, pooled.volume_skipped, pooled.error_count),
+                         (sequential.processed_count, sequential.volume_skipped, sequential.error_count))
+
+    def test_incremental_analysis_matches_full_recompute(self):
+        """Test that reanalyzing only the tail gives the same valid moves as a full analysis"""
+        for seed, close_spikes in [(5, True), (7, False)]:
+            full = PriceSeries.from_records(self._generate_random_walk_data(seed, days=1800, close_spikes=close_spikes))
+            state = None
+            
+            for rows in [1000, 1003, 1400, 1800]:
+                series = full.take(slice(0, rows))
+                expected = self.analyzer.filter_valid_moves(self.analyzer.analyze_stock('TEST', series))
+                
+                moves, state = analyze_tail(self.analyzer, 'TEST', series, state)
+                self.assertEqual(moves, expected)
+                self.assertLess(state['restart_index'], rows)
+        
+        # State saved for a different history is not reused
+        other = PriceSeries.from_records(self._generate_random_walk_data(9, days=1200))
+        self.assertFalse(state_applies(state, other))
+        
+        with tempfile.TemporaryDirectory() as root:
+            states = MoveStateStore(root)
+            moves = analyze_incremental(self.analyzer, 'TEST', full, states)
+            self.assertEqual(moves, self.analyzer.filter_valid_moves(self.analyzer.analyze_stock('TEST', full)))
+            self.assertTrue(state_applies(states.load('TEST'), full))
+    
+    def test_online_detector_matches_full_analysis(self):
+        """Test that feeding bars one at a time reports the same moves as analyze_stock"""
+        for seed, close_spikes in [(5, True), (7, False)]:
+            series = PriceSeries.from_records(self._generate_random_walk_data(seed, close_spikes=close_spikes))
+            detector = TickerDetector('TEST', self.analyzer)
+            closed, qualified = [], []
+            
+            for i, (day, high, low, close) in enumerate(zip(series.dates.tolist(), series.high.tolist(),
+                                                            series.low.tolist(), series.close.tolist())):
+                for event in detector.update(day, high, low, close):
+                    if event['event'] == TERMINATED_EVENT:
+                        closed.append(event['move'])
+                    else:
+                        qualified.append(event['move']['start_date'])
+                # The saved state round-trips through JSON mid-stream
+                if i % 500 == 499:
+                    detector = TickerDetector.from_state('TEST', self.analyzer, json.loads(json.dumps(detector.to_state())))
+            
+            moves = self.analyzer.filter_valid_moves(closed + detector.current_moves())
+            expected = self.analyzer.filter_valid_moves(self.analyzer.analyze_stock('TEST', series))
+            self.assertEqual(sorted(moves, key=lambda move: move['start_date']), expected)
+            self.assertTrue(set(move['start_date'] for move in expected) <= set(qualified))
+        
+        with self.assertRaises(ValueError):
+            detector.update(int(series.dates[0]), 1.0, 1.0, 1.0)
+        
+        # A ticker without saved state is seeded silently, then reports only new bars
+        with tempfile.TemporaryDirectory() as root:
+            online = OnlineDetector(MoveStateStore(root), self.analyzer)
+            self.assertEqual(online.update('TEST', series.take(slice(0, 1400))), [])
+            online.update('TEST', series)
+            self.assertEqual(online.load('TEST').last_day, int(series.dates[-1]))
+    
+    def test_checkpoint_journal_survives_torn_records(self):
+        """Test that the journal reloads finished tickers and drops a half-written record"""
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'checkpoint.jsonl')
+            move = {'ticker': 'AAPL', 'start_date': '2020-03-23', 'growth_percentage': np.float64(120.5)}
+            
+            with CheckpointJournal(path, sync_every=2) as journal:
+                journal.open()
+                journal.record('AAPL', 'NASDAQ', ANALYZED, [move])
+                journal.record('TINY', 'NYSE', LOW_VOLUME)
+            
+            # A crash in the middle of a write leaves a partial last line
+            with open(path, 'ab') as f:
+                f.write(b'{"ticker": "MSFT", "exch')
+            
+            journal = CheckpointJournal(path)
+            records = journal.load()
+            self.assertEqual(sorted(records), ['AAPL', 'TINY'])
+            self.assertEqual(records['AAPL']['moves'][0]['growth_percentage'], 120.5)
+            self.assertEqual(records['TINY']['status'], LOW_VOLUME)
+            
+            # Resuming cuts the torn line off before appending
+            journal.open(resume=True)
+            journal.record('MSFT', 'NASDAQ', ANALYZED, [])
+            journal.close()
+            self.assertEqual(sorted(journal.load()), ['AAPL', 'MSFT', 'TINY'])
+            
+            # Starting a fresh run replaces the old journal
+            journal.open()
+            journal.close()
+            self.assertEqual(journal.load(), {})
+    
+    def test_shards_partition_universe_and_merge(self):
+        """Test that shards split the universe exactly once each and merge back in full"""
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for spec in ['0/4', '5/4', '2', 'a/b']:
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+        
+        stocks = [(f"T{i}", 'NYSE' if i % 2 else 'NASDAQ') for i in range(200)]
+        shards = [select_shard(stocks, index, 4) for index in range(1, 5)]
+        self.assertEqual(sorted(stock for shard in shards for stock in shard), sorted(stocks))
+        self.assertTrue(all(shards))
+        self.assertEqual(shard_of('AAPL', 4), shard_of('AAPL', 4))
+        self.assertEqual(shard_path('data/checkpoint.jsonl', 2, 4), 'data/checkpoint.shard2of4.jsonl')
+        
+        with tempfile.TemporaryDirectory() as root:
+            paths = []
+            for index, shard in enumerate(shards, start=1):
+                path = os.path.join(root, f"results_{index}.json")
+                moves = [{'ticker': ticker, 'start_date_formatted': 'Jan 02, 2020'} for ticker, _ in shard]
+                write_shard_results(path, index, 4, moves, len(shard), len(shard), complete=index != 3)
+                paths.append(path)
+            
+            results, warnings = load_shard_results(list(reversed(paths)))
+            self.assertEqual(sorted(move['ticker'] for move in results), sorted(ticker for ticker, _ in stocks))
+            self.assertEqual(len(warnings), 1)
+            
+            with self.assertRaises(ValueError):
+                load_shard_results(paths[:3])
+            with self.assertRaises(ValueError):
+                load_shard_results(paths + paths[:1])
+    
+    def test_merge_exports_shard_results_without_api_client(self):
+        """Test that --merge consolidates and stores shard results without building an EODHD client"""
+        series = PriceSeries.from_records(self._generate_random_walk_data(0, close_spikes=True))
+        moves = self.analyzer.filter_valid_moves(self.analyzer.analyze_stock('AAA', series))
+        self.assertTrue(moves)
+        
+        with tempfile.TemporaryDirectory() as root:
+            paths = [os.path.join(root, f"results_{index}.json") for index in (1, 2)]
+            write_shard_results(paths[0], 1, 2, moves, 1, 1, complete=True)
+            write_shard_results(paths[1], 2, 2, [], 1, 1, complete=True)
+            
+            path = os.path.join(root, 'results.db')
+            with mock.patch('eodhd_client.EODHD_API_KEY', None), \
+                 mock.patch('main.EODHDClient', side_effect=AssertionError('merge built an API client')):
+                screener = ComprehensiveScreener(checkpoint_path=None, result_store_path=path, merge_only=True)
+                screener.merge_shard_results(paths)
+            
+            self.assertIsNone(screener.screener)
+            with ResultStore(path) as store:
+                self.assertEqual(len(list(store.query())), len(list(consolidate_moves(moves, screener.merge_overlaps))))
+    
+    def test_consolidation_sweeps_date_ordinals(self):
+        """Test that consolidation compares real dates and can merge overlapping ranges"""
+        def move(ticker, start, end):
+            return {'ticker': ticker, 'start_date': start, 'end_date': end}
+        
+        # 'Feb 11, 2003' sorts before 'Mar 09, 2002' as text; the 2002 start is the earliest
+        moves = [move('AAA', '2003-02-11', '2003-09-08'), move('AAA', '2002-03-09', '2003-09-08'),
+                 move('AAA', '2003-05-01', '2003-11-03'), move('AAA', '2004-01-05', '2004-06-01')]
+        self.assertEqual([(m['start_date'], m['end_date']) for m in consolidate_ticker(moves)],
+                         [('2002-03-09', '2003-09-08'), ('2003-05-01', '2003-11-03'), ('2004-01-05', '2004-06-01')])
+        
+        # Overlap merging keeps the first move of each chain of overlapping ranges
+        merged = consolidate_ticker(moves, merge_overlaps=True)
+        self.assertEqual([(m['start_date'], m['end_date']) for m in merged],
+                         [('2002-03-09', '2003-09-08'), ('2004-01-05', '2004-06-01')])
+        
+        # Grouped input streams ticker by ticker; ungrouped input is sorted by ticker first
+        mixed = [move('BBB', '2010-01-04', '2010-06-01'), move('AAA', '2012-01-03', '2012-06-01'),
+                 move('BBB', '2009-01-05', '2010-06-01')]
+        self.assertEqual([(m['ticker'], m['start_date']) for m in consolidate_moves(mixed)],
+                         [('AAA', '2012-01-03'), ('BBB', '2009-01-05')])
+        stream = consolidate_moves(iter(moves + [move('BBB', '2010-01-04', '2010-06-01')]), grouped=True)
+        self.assertEqual(next(stream)['start_date'], '2002-03-09')
+        self.assertEqual(len(list(stream)), 3)
+    
+    def test_result_store_batches_and_queries(self):
+        """Test that moves are written in batches and sliced by indexed filters"""
+        def move(ticker, start, end, classification, growth):
+            return {'ticker': ticker, 'exchange': 'NYSE', 'start_date': start, 'end_date': end,
+                    'superperformance': classification, 'growth_percentage': growth,
+                    'duration_days': 100, 'avg_volume': np.int64(500000), 'drawdowns': []}
+        
+        with tempfile.TemporaryDirectory() as root:
+            with ResultStore(os.path.join(root, 'results.db'), batch_size=3) as store:
+                old_run = store.start_run(source='old')
+                store.add_moves(old_run, [move('AAA', '2015-01-05', '2015-06-01', 'Growth', 80.0)])
+                store.finish_run(old_run)
+                
+                run_id = store.start_run()
+                store.add_moves(run_id, [move('AAA', '2019-01-02', '2019-05-01', 'Growth', 90.0),
+                                         move('BBB', '2019-03-01', '2019-12-02', 'Superperformance', 400.0)])
+                self.assertEqual(store.conn.execute('SELECT COUNT(*) FROM moves').fetchone()[0], 1)
+                store.add_moves(run_id, [move('AAA', '2020-04-01', '2020-09-01', 'Superperformance', 300.0)])
+                self.assertEqual(store.conn.execute('SELECT COUNT(*) FROM moves').fetchone()[0], 4)
+                
+                # An unfinished run is not read by default
+                self.assertEqual(store.latest_run_id(), old_run)
+                self.assertEqual(store.finish_run(run_id), 3)
+                self.assertEqual(store.latest_run_id(), run_id)
+                
+                aaa = list(store.query(ticker='AAA'))
+                self.assertEqual([m['start_date'] for m in aaa], ['2019-01-02', '2020-04-01'])
+                self.assertEqual(aaa[0]['avg_volume'], 500000)
+                self.assertEqual([m['ticker'] for m in store.query(classification='Superperformance')], ['AAA', 'BBB'])
+                self.assertEqual(len(list(store.query(start_from='2019-02-01', end_to='2019-12-31'))), 1)
+                self.assertEqual(len(list(store.query(ticker='AAA', all_runs=True))), 3)
+                self.assertEqual(len(list(store.query(run_id=old_run, min_growth=85.0))), 0)
+                self.assertEqual(len(list(store.query(limit=2))), 2)
+                
+                # Old JSON backups import as finished runs dated by their file name
+                backup = os.path.join(root, 'comprehensive_results_20250825_233339.json')
+                with open(backup, 'w') as f:
+                    json.dump([move('CCC', '2024-01-02', '2024-08-01', 'Growth', 120.0)], f, default=int)
+                self.assertEqual(store.import_json(backup), '20250825_233339')
+                self.assertEqual([run['run_id'] for run in store.runs()], ['20250825_233339', old_run, run_id])
+                self.assertEqual([m['ticker'] for m in store.query(run_id='20250825_233339')], ['CCC'])
+    
+    def test_http_session_is_pooled_and_reused(self):
+        """Test that every request goes through one pooled session with compression and the configured timeouts"""
+        governor = RateGovernor(rate=1000.0, burst=100, min_rate=100.0, max_rate=1000.0)
+        client = EODHDClient('test_api_key_123', governor=governor, pool_size=7)
+        session = client.session
+        
+        adapter = session.get_adapter('https://eodhd.com/api/search')
+        self.assertIsInstance(adapter, HTTPAdapter)
+        self.assertIs(session.get_adapter('http://eodhd.com/api/search'), adapter)
+        self.assertEqual((adapter._pool_connections, adapter._pool_maxsize), (7, 7))
+        
+        sent = []
+        
+        def send(request, **kwargs):
+            sent.append((request, kwargs))
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'[]'
+            response.request = request
+            response.url = request.url
+            return response
+        
+        with mock.patch.object(adapter, 'send', side_effect=send), \
+             mock.patch.object(session, 'get', wraps=session.get) as get:
+            client._make_request('search', {'q': 'AAPL'})
+            client._make_request('exchange-symbol-list/NYSE')
+            client.close()
+        
+        self.assertIs(client.session, session)
+        self.assertEqual(len(sent), 2)
+        for request, kwargs in sent:
+            self.assertEqual(request.headers['Accept-Encoding'], 'gzip, deflate')
+            self.assertEqual(request.headers['Connection'], 'keep-alive')
+            self.assertEqual(kwargs['timeout'], (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        self.assertEqual(get.call_count, 2)
+        for call in get.call_args_list:
+            self.assertEqual(call.kwargs['timeout'], (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        
+        # Without an explicit size the pool is sized from config
+        default_adapter = EODHDClient('test_api_key_123', governor=governor).session.get_adapter('https://eodhd.com')
+        self.assertEqual(default_adapter._pool_maxsize, HTTP_POOL_SIZE)
+    
+    async def _serve(self, handlers):
+        """Start a local HTTP server routing GET paths to handlers; returns (runner, base URL)"""
+        app = web.Application()
+        app.add_routes([web.get(path, handler) for path, handler in handlers.items()])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        return runner, f"http://127.0.0.1:{runner.addresses[0][1]}"
+    
+    def _run_async_client(self, handlers, scenario, response_cache=None, max_in_flight=3, history_store=None):
+        """Run `scenario(client)` against a local server standing in for the EODHD API"""
+        async def main():
+            runner, base_url = await self._serve(handlers)
+            try:
+                with mock.patch('async_eodhd_client.EODHD_BASE_URL', base_url), \
+                     mock.patch('async_eodhd_client.RETRY_DELAY', 0.01):
+                    governor = RateGovernor(rate=1000.0, burst=100, min_rate=100.0, max_rate=1000.0)
+                    async with AsyncEODHDClient('test_api_key_123', max_in_flight=max_in_flight, governor=governor,
+                                                history_store=history_store, response_cache=response_cache) as client:
+                        return await scenario(client)
+            finally:
+                await runner.cleanup()
+        
+        return asyncio.run(main())
+    
+    def test_async_client_bounds_and_coalesces_requests(self):
+        """Test that the async client caps requests in flight, decodes CSV and shares identical requests"""
+        series = PriceSeries.from_records(self.sample_data)
+        in_flight = {'now': 0, 'max': 0, 'search': 0}
+        
+        async def eod(request):
+            self.assertEqual(request.query['fmt'], 'csv')
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            await asyncio.sleep(0.02)
+            in_flight['now'] -= 1
+            bars = series.between(date_to_ordinal(request.query['from']), date_to_ordinal(request.query['to']))
+            lines = ['Date,Open,High,Low,Close,Adjusted_close,Volume'] + [
+                f"{bar['date']},{bar['open']},{bar['high']},{bar['low']},{bar['close']},{bar['close']},{bar['volume']}"
+                for bar in bars.to_records()
+            ]
+            return web.Response(text='\n'.join(lines), content_type='text/csv')
+        
+        async def search(request):
+            in_flight['search'] += 1
+            await asyncio.sleep(0.05)
+            return web.json_response([{'Code': request.query['q'], 'Exchange': 'NASDAQ'}])
+        
+        tickers = [f"T{i}" for i in range(10)]
+        
+        async def scenario(client):
+            histories = await client.get_many_historical_data(tickers, '2019-02-01', '2020-06-30')
+            searches = await asyncio.gather(*(client.search_stocks('AAPL') for _ in range(5)))
+            return histories, searches
+        
+        histories, searches = self._run_async_client(
+            {'/eod/{symbol}': eod, '/search': search}, scenario, max_in_flight=3
+        )
+        
+        self.assertEqual(in_flight['max'], 3)
+        expected = series.between(date_to_ordinal('2019-02-01'), date_to_ordinal('2020-06-30'))
+        for ticker in tickers:
+            self.assertEqual(histories[ticker].to_records(), expected.to_records())
+        
+        self.assertEqual(in_flight['search'], 1)
+        self.assertEqual(searches, [[{'Code': 'AAPL', 'Exchange': 'NASDAQ'}]] * 5)
+    
+    def test_async_client_serializes_same_ticker_history(self):
+        """Test that concurrent history requests for one ticker fetch each day once and store it once"""
+        series = PriceSeries.from_records(self.sample_data)
+        requested = []
+        
+        async def eod(request):
+            start_day, end_day = date_to_ordinal(request.query['from']), date_to_ordinal(request.query['to'])
+            requested.append((start_day, end_day))
+            await asyncio.sleep(0.02)
+            lines = ['Date,Open,High,Low,Close,Adjusted_close,Volume'] + [
+                f"{bar['date']},{bar['open']},{bar['high']},{bar['low']},{bar['close']},{bar['close']},{bar['volume']}"
+                for bar in series.between(start_day, end_day).to_records()
+            ]
+            return web.Response(text='\n'.join(lines), content_type='text/csv')
+        
+        ranges = [('2019-01-01', '2019-12-31'), ('2019-06-01', '2020-06-30'), ('2018-06-01', '2019-03-31')]
+        
+        async def scenario(client):
+            return await asyncio.gather(*(client.get_historical_data('AAA', start, end) for start, end in ranges))
+        
+        with tempfile.TemporaryDirectory() as root:
+            store = HistoryStore(root)
+            histories = self._run_async_client({'/eod/{symbol}': eod}, scenario, history_store=store)
+            
+            for (start, end), history in zip(ranges, histories):
+                expected = series.between(date_to_ordinal(start), date_to_ordinal(end))
+                self.assertEqual(history.to_records(), expected.to_records())
+            
+            # Each request only fetched what the ones before it had not
+            days = sorted(day for start_day, end_day in requested for day in range(start_day, end_day + 1))
+            self.assertEqual(len(days), len(set(days)))
+            stored = store.load('AAA')
+            self.assertEqual(len(np.unique(stored.dates)), len(stored))
+            self.assertEqual(stored.to_records(), series.between(date_to_ordinal('2018-06-01'),
+                                                                  date_to_ordinal('2020-06-30')).to_records())
+    
+    def test_async_client_retries_and_revalidates(self):
+        """Test the async client's retry loop and its conditional requests against the response cache"""
+        hits = {'fundamentals': 0, 'search': 0, 'symbols': 0, 'not_modified': 0}
+        symbols = [{'Code': 'KO', 'Exchange': 'NYSE', 'Type': 'Common Stock'}]
+        
+        async def fundamentals(request):
+            hits['fundamentals'] += 1
+            if hits['fundamentals'] < 3:
+                return web.Response(status=503)
+            return web.json_response({'General': {'Exchange': 'NYSE'}})
+        
+        async def search(request):
+            hits['search'] += 1
+            return web.Response(status=500)
+        
+        async def symbol_list(request):
+            hits['symbols'] += 1
+            if request.headers.get('If-None-Match') == '"v1"':
+                hits['not_modified'] += 1
+                return web.Response(status=304)
+            return web.json_response(symbols, headers={'ETag': '"v1"'})
+        
+        async def scenario(client):
+            general = await client.get_stock_fundamentals('KO')
+            found = await client.search_stocks('KO')
+            first = await client.get_exchange_symbols('NYSE')
+            
+            # Age the cached list past its TTL so the next lookup has to revalidate it
+            path = client.response_cache._path('exchange-symbol-list/NYSE', None)
+            with open(path) as f:
+                entry = json.load(f)
+            entry['stored_at'] -= 7200
+            with open(path, 'w') as f:
+                json.dump(entry, f)
+            self.assertFalse(client.response_cache.get('exchange-symbol-list/NYSE')['fresh'])
+            
+            second = await client.get_exchange_symbols('NYSE')
+            return general, found, first, second, client.response_cache.get('exchange-symbol-list/NYSE')['fresh']
+        
+        with tempfile.TemporaryDirectory() as root:
+            cache = ResponseCache(root, ttls={'exchange-symbol-list': 3600})
+            general, found, first, second, renewed = self._run_async_client(
+                {'/fundamentals/{symbol}': fundamentals, '/search': search,
+                 '/exchange-symbol-list/{exchange}': symbol_list},
+                scenario, response_cache=cache
+            )
+        
+        # Two 503s are retried, a request failing every attempt gives up after MAX_RETRIES
+        self.assertEqual(general, {'General': {'Exchange': 'NYSE'}})
+        self.assertEqual(hits['fundamentals'], 3)
+        self.assertEqual(found, [])
+        self.assertEqual(hits['search'], MAX_RETRIES)
+        
+        # The stale symbol list is requested conditionally, served from the cache on 304 and renewed
+        self.assertEqual((first, second), (symbols, symbols))
+        self.assertEqual((hits['symbols'], hits['not_modified']), (2, 1))
+        self.assertTrue(renewed)
+    
+    def test_streamed_run_finishes_without_google_sheets(self):
+        """Test that a streamed run is marked finished in the result store when Google Sheets is not configured"""
+        series = PriceSeries.from_records(self._generate_random_walk_data(0, close_spikes=True))
+        
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'results.db')
+            screener = self._comprehensive_screener(root, result_store_path=path)
+            self.assertIsNone(screener.screener.sheets_client)
+            
+            screener.screener.eodhd_client.get_historical_data = lambda ticker, start_date, end_date: series
+            screener.get_all_exchange_stocks = lambda: [('AAA', 'NYSE')]
+            screener.as_of_date = series.date_str(-1)
+            screener.run_comprehensive_analysis()
+            self.assertTrue(screener.results)
+            
+            with ResultStore(path) as store:
+                self.assertIsNotNone(store.latest_run_id())
+                self.assertEqual(store.latest_run_id(), screener.run_id)
+                self.assertEqual(len(list(store.query())),
+                                 len(consolidate_ticker(screener.results, screener.merge_overlaps)))
+    
+    def test_interrupted_run_exports_with_merge_overlaps(self):
+        """Test that partial results exported after Ctrl-C are consolidated as --merge-overlaps asks"""
+        series = PriceSeries.from_records(self._generate_random_walk_data(0, close_spikes=True))
+
+        def get_historical_data(ticker, start_date, end_date):
+            if ticker == 'BBB':
+                raise KeyboardInterrupt
+            return series
+
+        with tempfile.TemporaryDirectory() as root:
+            screener = self._comprehensive_screener(root, fetch_workers=1, result_store_path=None, merge_overlaps=True)
+            screener.screener.eodhd_client.get_historical_data = get_historical_data
+            screener.get_all_exchange_stocks = lambda: [('AAA', 'NYSE'), ('BBB', 'NYSE')]
+            screener.as_of_date = series.date_str(-1)
+
+            consolidate = screener.screener.consolidate_overlapping_moves
+            with mock.patch.object(screener.screener, 'consolidate_overlapping_moves', wraps=consolidate) as spy:
+                screener.run_comprehensive_analysis()
+
+        self.assertTrue(screener.results)
+        spy.assert_called_once_with(screener.results, True)
+
+    def test_single_flight_coalesces_concurrent_calls(self):
+        """Test that concurrent identical calls share one execution and its errors"""
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+        
+        def slow_fetch():
+            calls.append(1)
+            release.wait(5)
+            return ['result']
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, 'search:AAPL', slow_fetch) for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            results = [future.result() for future in futures]
+        
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        
+        # The key is released afterwards, and failures propagate to the caller
+        def failing_fetch():
+            raise ValueError('boom')
+        with self.assertRaises(ValueError):
+            flight.do('search:AAPL', failing_fetch)
+        
+        async_flight = AsyncSingleFlight()
+        async_calls = []
+        
+        async def async_fetch():
+            async_calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'General': {}}
+        
+        async def run_concurrently():
+            return await asyncio.gather(*(async_flight.do('fundamentals', async_fetch) for _ in range(5)))
+        
+        self.assertEqual(asyncio.run(run_concurrently()), [{'General': {}}] * 5)
+        self.assertEqual(len(async_calls), 1)
+    
+    def test_rate_governor_aimd(self):
+        """Test token bucket bursts and AIMD rate adjustment"""
+        governor = RateGovernor(rate=4.0, burst=3, min_rate=1.0, max_rate=5.0, increase=0.5, backoff=0.5)
+        
+        # The burst is served without waiting, the next token has to refill
+        self.assertEqual([governor.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(governor._reserve(), 0.0)
+        
+        governor.observe(429)
+        self.assertEqual(governor.rate, 2.0)
+        governor.observe(503)
+        governor.observe(500)
+        self.assertEqual(governor.rate, 1.0)  # never below min_rate
+        
+        governor.observe(404)
+        self.assertEqual(governor.rate, 1.0)  # client errors leave the rate alone
+        for _ in range(20):
+            governor.observe(200)
+        self.assertEqual(governor.rate, 5.0)  # never above max_rate
+        
+        self.assertEqual(parse_retry_after('2'), 2.0)
+        self.assertIsNone(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+    
     def test_filter_valid_moves(self):
         """Test filtering of valid moves"""
         # Create test moves